@@ -0,0 +1,127 @@
+"""
+Alert parsing throughput per source adapter.
+
+For each source a representative webhook is parsed repeatedly through
+`parse_alerts`, once identified by its payload keys only and once by its
+headers; `select_us` is the adapter lookup alone. Alertmanager and Grafana
+payloads carry --group alerts each, so their rate counts alerts, not requests.
+Usage: python -m benchmarks.bench_alert_parsing [--repeat 20000] [--group 5]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+from src.alert_layer import ALERT_SOURCES, parse_alerts
+
+
+def samples(group: int) -> dict[str, tuple[dict[str, Any], dict[str, str]]]:
+    """Source name -> (payload, headers the tool sends)."""
+    am_alerts = [
+        {
+            "status": "firing",
+            "labels": {"alertname": "HighRequestLatency", "service": "api-gateway", "pod": f"api-{i}", "severity": "page"},
+            "annotations": {"summary": "p99 above 1s", "threshold": "1000", "value": str(1500 + i)},
+            "startsAt": "2026-10-18T12:00:00Z",
+            "fingerprint": f"{i:016x}",
+        }
+        for i in range(group)
+    ]
+    message = {
+        "AlarmName": "orders-db-CPUUtilization-high",
+        "NewStateValue": "ALARM",
+        "NewStateReason": "Threshold Crossed: 1 datapoint [93.5 (18/10/26 12:00:00)] was greater than the threshold (80.0).",
+        "StateChangeTime": "2026-10-18T12:00:00.000+0000",
+        "Region": "EU (Ireland)",
+        "Trigger": {
+            "MetricName": "CPUUtilization",
+            "Namespace": "AWS/RDS",
+            "Threshold": 80.0,
+            "Dimensions": [{"name": "DBInstanceIdentifier", "value": "orders-db"}],
+        },
+    }
+    return {
+        "alertmanager": (
+            {"version": "4", "groupKey": "{}:{alertname=\"HighRequestLatency\"}", "status": "firing",
+             "receiver": "incident-bot", "commonLabels": {"service": "api-gateway"}, "alerts": am_alerts},
+            {"User-Agent": "Alertmanager/0.27.0"},
+        ),
+        "grafana": (
+            {"orgId": 1, "title": "[FIRING] HighRequestLatency", "state": "alerting", "groupKey": "{}",
+             "commonLabels": {"service": "api-gateway"},
+             "alerts": [{**a, "values": {"B": 1500.0 + i}} for i, a in enumerate(am_alerts)]},
+            {"User-Agent": "Grafana/11.2.0"},
+        ),
+        "datadog": (
+            {"id": "1234", "title": "[Triggered] Error rate high on checkout", "alert_type": "error",
+             "alert_transition": "Triggered", "alert_metric": "trace.http.request.errors", "priority": "P2",
+             "tags": "service:checkout,env:prod,team:payments", "date": 1792324800000, "hostname": "i-0abc"},
+            {"User-Agent": "Datadog/1.0"},
+        ),
+        "pagerduty": (
+            {"event": {"id": "01ABC", "event_type": "incident.triggered", "resource_type": "incident",
+                       "occurred_at": "2026-10-18T12:00:00Z",
+                       "data": {"id": "Q1XYZ", "type": "incident", "title": "billing pods CrashLoopBackOff",
+                                "urgency": "high", "service": {"id": "PSVC", "summary": "billing"},
+                                "priority": {"id": "P1ID", "summary": "P1"}}}},
+            {"X-PagerDuty-Signature": "v1=abc"},
+        ),
+        "cloudwatch": (
+            {"Type": "Notification", "MessageId": "m-1", "TopicArn": "arn:aws:sns:eu-west-1:1:alarms",
+             "Subject": "ALARM", "Message": json.dumps(message), "Timestamp": "2026-10-18T12:00:01.000Z"},
+            {"x-amz-sns-message-type": "Notification"},
+        ),
+        "generic": (
+            {"trigger_type": "latency_spike", "service": "api-gateway", "threshold": 1000, "value": 2500,
+             "labels": {"env": "prod"}, "timestamp": "2026-10-18T12:00:00Z"},
+            {},
+        ),
+    }
+
+
+def _rate(fn: Callable[[], int], repeat: int) -> tuple[float, float]:
+    alerts = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        alerts += fn()
+    elapsed = time.perf_counter() - start
+    return round(alerts / elapsed), round(elapsed * 1e6 / repeat, 2)
+
+
+def bench_source(name: str, payload: dict, headers: dict, repeat: int) -> dict:
+    assert ALERT_SOURCES.select(payload).name == name, name
+    assert ALERT_SOURCES.select(payload, headers).name == name, name
+    by_payload, per_request_us = _rate(lambda: len(parse_alerts(payload)), repeat)
+    by_headers, _ = _rate(lambda: len(parse_alerts(payload, headers)), repeat)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ALERT_SOURCES.select(payload)
+    return {
+        "alerts_per_request": len(parse_alerts(payload)),
+        "alerts_per_s": by_payload,
+        "alerts_per_s_with_headers": by_headers,
+        "request_us": per_request_us,
+        "select_us": round((time.perf_counter() - start) * 1e6 / repeat, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--group", type=int, default=5, help="alerts per Alertmanager/Grafana notification")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {
+        name: bench_source(name, payload, headers, args.repeat)
+        for name, (payload, headers) in samples(args.group).items()
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Per-incident overhead of the investigation pipeline, excluding LLM time.
+
+before: every incident builds new agents, new LLM clients and compiles the graph
+        (the pre-CommanderAgent-reuse behaviour of run_graph).
+after:  one long-lived CommanderAgent with a compiled graph and shared LLM client.
+
+The LLM is a zero-latency fake, so the numbers are pure orchestration overhead.
+Usage: python -m benchmarks.bench_graph_overhead [--incidents N] [--provider openai]
+"""
+import argparse
+import json
+import os
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+RCA_JSON = json.dumps(
+    {
+        "summary": "Database pool exhausted",
+        "root_cause": "pool_size raised in v2.3.1",
+        "evidence_summary": ["Too many connections"],
+        "recommended_actions": ["Rollback to v2.3.0"],
+    }
+)
+
+
+def _per_incident_ms(fn, incidents: int) -> float:
+    start = time.perf_counter()
+    for _ in range(incidents):
+        fn()
+    return (time.perf_counter() - start) * 1000 / incidents
+
+
+def bench_setup(provider: str, incidents: int) -> dict:
+    """Cost of constructing agents + LLM clients + compiling the graph."""
+    from src.agents import llm
+    from src.agents.commander import CommanderAgent
+    from src.agents.graph import build_graph
+
+    def before():
+        llm._build_llm.cache_clear()
+        build_graph()
+
+    commander = CommanderAgent()
+
+    def after():
+        return commander.graph
+
+    return {
+        "provider": provider,
+        "before_ms": _per_incident_ms(before, incidents),
+        "after_ms": _per_incident_ms(after, incidents),
+    }
+
+
+def bench_execution(incidents: int) -> dict:
+    """End-to-end run_graph with a zero-latency fake LLM."""
+    from src.agents import llm
+    from src.agents.commander import CommanderAgent
+    from src.agents.graph import build_graph, run_graph
+    from src.alert_layer import parse_alert
+
+    fake = FakeListChatModel(responses=[RCA_JSON])
+    real_build = llm._build_llm
+    llm._build_llm = lambda *args: fake
+    try:
+        alert = parse_alert({"trigger_type": "latency_spike", "service": "api-gateway", "threshold": 1000})
+        commander = CommanderAgent()
+        before = _per_incident_ms(lambda: run_graph(alert, graph=build_graph()), incidents)
+        after = _per_incident_ms(lambda: commander.run(alert), incidents)
+    finally:
+        llm._build_llm = real_build
+    return {"before_ms": before, "after_ms": after}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=50)
+    parser.add_argument("--provider", choices=["openai", "anthropic", "ollama"], default="openai")
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = args.provider
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-benchmark")
+    from src.config import get_settings
+
+    get_settings.cache_clear()
+
+    results = {
+        "incidents": args.incidents,
+        "setup": bench_setup(args.provider, args.incidents),
+        "execution": bench_execution(args.incidents),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Cold-start cost: import time of the app and of building the Commander on first use.
+
+Each measurement runs in a fresh interpreter. Sections:
+
+  import      `python -X importtime -c "import <module>"` for each module; median
+              cumulative import time and the heaviest modules it imports directly
+  warm_up     constructing CommanderAgent and calling `warm_up` (agents, LLM
+              clients for the configured providers, graph compilation)
+
+The run fails (exit status 1) when the median import of `src.main` exceeds
+--budget-ms, or when a module that should load on first use (provider SDKs,
+LangGraph) is imported at startup.
+Usage: python -m benchmarks.bench_import_time [--repeats 5] [--budget-ms 1500]
+       [--modules src.main,src.agents] [--output out.json]
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+# Modules that must not be imported by `import src.main`
+DEFERRED = ("langchain_openai", "langchain_anthropic", "langchain_ollama", "langgraph")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+WARM_UP = """
+import time
+start = time.perf_counter()
+from src.agents import CommanderAgent
+commander = CommanderAgent()
+constructed = time.perf_counter()
+commander.warm_up()
+print((constructed - start) * 1000, (time.perf_counter() - constructed) * 1000)
+"""
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def import_profile(module: str) -> tuple[dict[str, int], dict[str, int]]:
+    """
+    One `-X importtime` run: cumulative microseconds of every module loaded, and of
+    the modules `module` imports directly (its children in the import tree).
+    """
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    loaded: dict[str, int] = {}
+    children: dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        loaded[name] = int(cumulative)
+        # Children are reported before their parent, one level deeper
+        if not indent:
+            if name == module:
+                break
+            children.clear()
+        elif len(indent) == 2:
+            children[name] = int(cumulative)
+    return loaded, children
+
+
+def bench_import(module: str, repeats: int) -> dict:
+    runs = [import_profile(module) for _ in range(repeats + 1)][1:]  # first run warms the bytecode cache
+    totals = [loaded[module] / 1000 for loaded, _ in runs]
+    loaded, children = runs[-1]
+    heaviest = sorted(children.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "median_ms": statistics.median(totals),
+        "min_ms": min(totals),
+        "max_ms": max(totals),
+        "heaviest_imports_ms": {name: us / 1000 for name, us in heaviest},
+        "modules_loaded": len(loaded),
+        "deferred_loaded": [name for name in DEFERRED if name in loaded],
+    }
+
+
+def bench_warm_up(repeats: int) -> dict:
+    runs = [tuple(map(float, _run(["-c", WARM_UP]).stdout.split())) for _ in range(repeats)]
+    return {
+        "construct_median_ms": statistics.median(r[0] for r in runs),
+        "warm_up_median_ms": statistics.median(r[1] for r in runs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="startup budget for `import src.main`")
+    parser.add_argument("--modules", default="src.main,src.agents")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    if "src.main" not in modules:
+        modules.insert(0, "src.main")
+    results = {
+        "python": sys.version.split()[0],
+        "import": {module: bench_import(module, args.repeats) for module in modules},
+        "warm_up": bench_warm_up(args.repeats),
+    }
+    main_import = results["import"]["src.main"]
+    results["budget_ms"] = args.budget_ms
+    results["within_budget"] = main_import["median_ms"] <= args.budget_ms and not main_import["deferred_loaded"]
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    if not results["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Write and read cost of IncidentMemory with thousands of evidence items.
+
+Sections:
+
+  add          add_evidence/add_finding throughput from one thread and from
+               --threads threads writing concurrently; checks that every item
+               lands and that evidence IDs are unique
+  baseline     the same writes as pydantic models with uuid-prefix IDs (the
+               previous representation), for comparison
+  size         traced bytes per evidence entry vs per pydantic Evidence
+  read         snapshot() and get_context() on an unchanged memory, and
+               get_context() right after a write
+Usage: python -m benchmarks.bench_incident_memory [--items 5000] [--threads 8]
+"""
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Callable
+
+from src.memory import Evidence, Finding, IncidentMemory
+
+
+def _payload(i: int) -> dict:
+    return {"service": f"svc-{i % 7}", "p99_latency_ms": 100 + i % 900, "error_rate": (i % 13) / 100}
+
+
+def _timed(fn: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _write(memory: IncidentMemory, start: int, count: int) -> None:
+    for i in range(start, start + count):
+        memory.add_evidence("metrics", _payload(i))
+        if i % 10 == 0:
+            memory.add_finding("metrics", f"p99 latency high on svc-{i % 7}", 0.7)
+
+
+def bench_add(items: int, threads: int) -> dict:
+    single = IncidentMemory()
+    single_s = _timed(lambda: _write(single, 0, items))
+
+    shared = IncidentMemory()
+    per_thread = items // threads
+    workers = [threading.Thread(target=_write, args=(shared, n * per_thread, per_thread)) for n in range(threads)]
+
+    def run() -> None:
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+    threaded_s = _timed(run)
+    ids = [e.id for e in shared.evidence]
+    return {
+        "single_thread_ops_per_s": round(items / single_s),
+        "threads": threads,
+        "threaded_ops_per_s": round(per_thread * threads / threaded_s),
+        "all_items_recorded": len(ids) == per_thread * threads,
+        "unique_ids": len(set(ids)) == len(ids),
+    }
+
+
+def bench_baseline(items: int) -> dict:
+    evidence: list[Evidence] = []
+    findings: list[Finding] = []
+
+    def run() -> None:
+        for i in range(items):
+            evidence.append(Evidence(id=str(uuid.uuid4())[:8], source="metrics", data=_payload(i)))
+            if i % 10 == 0:
+                findings.append(Finding(agent="metrics", content=f"p99 latency high on svc-{i % 7}", confidence=0.7))
+
+    return {"pydantic_ops_per_s": round(items / _timed(run))}
+
+
+def bench_size(items: int) -> dict:
+    data = [_payload(i) for i in range(items)]  # shared, so only the records are traced
+
+    def traced(build: Callable[[], object]) -> float:
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return round(size / items, 1)
+
+    def entries() -> IncidentMemory:
+        memory = IncidentMemory()
+        for d in data:
+            memory.add_evidence("metrics", d)
+        return memory
+
+    def models() -> list[Evidence]:
+        return [Evidence(id=f"ev-{i}", source="metrics", data=d) for i, d in enumerate(data)]
+
+    return {"entry_bytes": traced(entries), "pydantic_bytes": traced(models)}
+
+
+def bench_read(items: int, repeat: int) -> dict:
+    memory = IncidentMemory()
+    _write(memory, 0, items)
+
+    def per_call_us(fn: Callable[[], object]) -> float:
+        return round(_timed(lambda: [fn() for _ in range(repeat)]) * 1e6 / repeat, 1)
+
+    memory.get_context()
+    n = iter(range(items, items + repeat))
+    return {
+        "snapshot_us": per_call_us(memory.snapshot),
+        "get_context_unchanged_us": per_call_us(memory.get_context),
+        "get_context_after_write_us": per_call_us(
+            lambda: (memory.add_finding("logs", f"finding {next(n)}"), memory.get_context())
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {
+        "items": args.items,
+        "add": bench_add(args.items, args.threads),
+        "baseline": bench_baseline(args.items),
+        "size": bench_size(args.items),
+        "read": bench_read(args.items, args.repeat),
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput and memory of LogTemplateMiner on a synthetic log stream.
+
+Lines are generated lazily from ~20 message shapes with random IDs, IPs,
+latencies and trace IDs, so the stream itself holds no memory. Peak traced
+memory therefore reflects the miner alone.
+Usage: python -m benchmarks.bench_log_templates [--lines 1000000]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from src.analysis import LogTemplateMiner
+
+SHAPES = [
+    ("INFO", "GET /api/users/{id} 200 in {ms}ms"),
+    ("INFO", "POST /api/orders/{id} 201 in {ms}ms"),
+    ("INFO", "Cache hit for key user:{id}"),
+    ("INFO", "Cache miss for key user:{id}"),
+    ("DEBUG", "Acquired connection {id} from pool in {ms}ms"),
+    ("DEBUG", "Released connection {id} to pool"),
+    ("INFO", "User {id} logged in from {ip}"),
+    ("WARN", "Slow query on table orders took {ms}ms"),
+    ("WARN", "High latency detected in /api/users: {ms}ms"),
+    ("WARN", "Retrying request to payment-service attempt {n}"),
+    ("ERROR", "Connection timeout to database pool after {ms}ms"),
+    ("ERROR", "Too many connections (max {n})"),
+    ("ERROR", "Upstream {ip} returned 503"),
+    ("ERROR", "Failed to deserialize payload for order {id}"),
+    ("INFO", "Scheduled job cleanup finished, removed {n} rows"),
+    ("INFO", "Health check OK from {ip}"),
+    ("WARN", "Circuit breaker half-open for inventory-service"),
+    ("ERROR", "NullPointerException in OrderController.create"),
+    ("INFO", "Published event order.created id={id}"),
+    ("DEBUG", "Span {hex} finished"),
+]
+STACK = "java.sql.SQLException: Connection timeout\n  at com.app.DatabasePool.getConnection(DatabasePool.java:42)"
+
+
+def synthetic_logs(lines: int, seed: int = 7) -> Iterator[dict]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, 10, 0, 0)
+    for i in range(lines):
+        level, shape = SHAPES[rng.randrange(len(SHAPES))]
+        record = {
+            "timestamp": (start + timedelta(milliseconds=i)).isoformat(),
+            "level": level,
+            "message": shape.format(
+                id=rng.randrange(10**6),
+                ms=rng.randrange(5000),
+                ip=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+                n=rng.randrange(100),
+                hex=f"{rng.getrandbits(64):016x}",
+            ),
+            "trace_id": f"{rng.getrandbits(32):08x}",
+        }
+        if level == "ERROR" and "timeout" in shape:
+            record["stack_trace"] = STACK
+        yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--memory-sample", type=int, default=100_000, help="lines to mine under tracemalloc")
+    args = parser.parse_args()
+
+    # Time the generator alone so mining cost can be reported separately
+    start = time.perf_counter()
+    for _ in synthetic_logs(args.lines):
+        pass
+    generation = time.perf_counter() - start
+
+    miner = LogTemplateMiner()
+    start = time.perf_counter()
+    miner.consume(synthetic_logs(args.lines))
+    elapsed = time.perf_counter() - start
+    mining = elapsed - generation
+
+    # tracemalloc slows mining considerably, so measure memory on a smaller sample
+    tracemalloc.start()
+    LogTemplateMiner().consume(synthetic_logs(args.memory_sample))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        "lines": args.lines,
+        "total_seconds": elapsed,
+        "mining_seconds": mining,
+        "mining_lines_per_sec": args.lines / mining,
+        "templates": len(miner),
+        "top_templates": [t.template for t in miner.templates(5)],
+        "memory_sample_lines": args.memory_sample,
+        "peak_traced_bytes": peak,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+End-to-end throughput, latency and memory of the investigation pipeline.
+
+The LLM is `benchmarks.fake_llm.FakeChatModel` with a configurable latency, so
+the numbers reflect orchestration, backends (mock) and CPU stages plus a known,
+fixed LLM cost. Sections:
+
+  commander   CommanderAgent.run from N threads at each concurrency level
+  webhook     POST /webhook/alert through the FastAPI app (in-process ASGI),
+              polled every 10ms to completion, at each concurrency level
+  memory      traced allocation per incident (peak and retained)
+  micro       parse_alerts, context building and graph compilation
+
+The mock deploy history has a risky deploy, so the deploy correlation LLM call
+is skipped; --no-risky-deploy benchmarks the path that makes it.
+
+Results are printed as JSON (and written to --output) so runs can be diffed.
+Usage: python -m benchmarks.bench_pipeline [--incidents 40] [--concurrency 1,4,16]
+       [--llm-latency 0.05] [--llm-concurrency 64] [--sections commander,webhook,memory,micro]
+       [--no-risky-deploy] [--output out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+from benchmarks.fake_llm import FakeChatModel, use_fake_llm
+
+ALERTMANAGER_PAYLOAD = {
+    "receiver": "incident-commander",
+    "status": "firing",
+    "commonLabels": {"job": "api-gateway", "severity": "critical"},
+    "alerts": [
+        {
+            "status": "firing",
+            "labels": {"alertname": "HighLatency", "service": "api-gateway", "instance": f"10.0.0.{i}:8080"},
+            "annotations": {"summary": "p99 above 1s", "value": "2500", "threshold": "1000"},
+        }
+        for i in range(5)
+    ],
+}
+
+
+def _alert_payload(i: int) -> dict[str, Any]:
+    """Distinct alerts, so deduplication does not collapse the load."""
+    return {
+        "trigger_type": "latency_spike" if i % 2 else "error_rate",
+        "service": f"service-{i % 8}",
+        "threshold": 1000,
+        "value": 2500,
+        "labels": {"request": str(i)},
+    }
+
+
+def _latency_stats(latencies: list[float], wall: float) -> dict[str, float]:
+    ms = np.asarray(latencies) * 1000
+    return {
+        "incidents": len(latencies),
+        "incidents_per_sec": round(len(latencies) / wall, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def bench_commander(incidents: int, levels: list[int]) -> list[dict[str, Any]]:
+    from src.agents import CommanderAgent
+    from src.alert_layer import parse_alert
+
+    commander = CommanderAgent()
+    alerts = [parse_alert(_alert_payload(i)) for i in range(incidents)]
+    commander.run(alerts[0])  # warm up
+    results = []
+    for level in levels:
+
+        def timed(alert) -> float:
+            start = time.perf_counter()
+            commander.run(alert)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            latencies = list(pool.map(timed, alerts))
+        results.append({"concurrency": level, **_latency_stats(latencies, time.perf_counter() - start)})
+    return results
+
+
+async def _webhook_level(app, incidents: int, level: int, offset: int) -> dict[str, Any]:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        limit = asyncio.Semaphore(level)
+
+        async def one(i: int) -> float:
+            async with limit:
+                start = time.perf_counter()
+                response = await client.post("/webhook/alert", json=_alert_payload(offset + i))
+                incident_id = response.json()["incident_id"]
+                while True:
+                    job = (await client.get(f"/incidents/{incident_id}")).json()
+                    if job["status"] not in ("queued", "running"):
+                        return time.perf_counter() - start
+                    await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(incidents)))
+        return {"concurrency": level, **_latency_stats(latencies, time.perf_counter() - start)}
+
+
+def bench_webhook(incidents: int, levels: list[int]) -> list[dict[str, Any]]:
+    async def run() -> list[dict[str, Any]]:
+        from src.main import app, lifespan
+
+        results = []
+        async with lifespan(app):
+            for n, level in enumerate(levels):
+                results.append(await _webhook_level(app, incidents, level, offset=n * incidents))
+        return results
+
+    return asyncio.run(run())
+
+
+def bench_memory(incidents: int) -> dict[str, float]:
+    """Traced allocations per incident: transient peak, and what stays allocated afterwards."""
+    from src.agents import CommanderAgent
+    from src.alert_layer import parse_alert
+
+    commander = CommanderAgent()
+    alerts = [parse_alert(_alert_payload(i)) for i in range(incidents)]
+    commander.run(alerts[0])
+    results = []
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for alert in alerts:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        results.append(commander.run(alert))
+        _, peak = tracemalloc.get_traced_memory()
+        results[-1]["peak_kb"] = (peak - before) / 1024
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "incidents": incidents,
+        "peak_kb_per_incident": round(float(np.median([r["peak_kb"] for r in results])), 1),
+        "retained_kb_per_incident": round((retained - baseline) / 1024 / incidents, 1),
+    }
+
+
+def _per_call_us(fn: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) * 1e6 / repeat, 1)
+
+
+def bench_micro(repeat: int) -> dict[str, float]:
+    from src.agents.graph import build_graph
+    from src.alert_layer import parse_alerts
+    from src.alert_layer.trigger import parse_alert
+    from src.integrations.deploy_client import fetch_deploy_history
+    from src.integrations.logs_client import fetch_logs
+    from src.integrations.metrics_client import fetch_metrics
+    from src.memory import IncidentMemory
+    from src.memory.context import ContextBuilder
+
+    memory = IncidentMemory(alert=parse_alert(_alert_payload(1)))
+    memory.add_evidence("logs", {"logs": fetch_logs("api-gateway")})
+    memory.add_evidence("metrics", fetch_metrics("api-gateway"))
+    memory.add_evidence("deploy_history", {"deployments": fetch_deploy_history("api-gateway")})
+    for agent in ("logs", "metrics", "deploy_intel"):
+        memory.add_finding(agent, "Connection pool exhausted after deploy v2.3.1", 0.8)
+
+    return {
+        "parse_alerts_us": _per_call_us(lambda: parse_alerts(ALERTMANAGER_PAYLOAD), repeat),
+        "context_build_cold_us": _per_call_us(lambda: ContextBuilder().build(memory.snapshot(), memory.alert), repeat),
+        "context_build_warm_us": _per_call_us(lambda: memory.get_context(), repeat),
+        "graph_compile_us": _per_call_us(build_graph, max(1, repeat // 100)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=40, help="incidents per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--llm-concurrency", type=int, default=64, help="scheduler slots for the fake provider")
+    parser.add_argument("--sections", default="commander,webhook,memory,micro")
+    parser.add_argument("--micro-repeat", type=int, default=1000)
+    parser.add_argument("--no-risky-deploy", action="store_true", help="correlate deploys with the LLM")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.concurrency.split(",")]
+    sections = set(args.sections.split(","))
+
+    # Keep benchmark side effects out of the working directory, and don't let
+    # similar-incident reuse short-circuit the load.
+    workdir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    os.environ["INCIDENT_STORE_PATH"] = os.path.join(workdir, "incidents.db")
+    os.environ["SIMILAR_INCIDENTS_REUSE_THRESHOLD"] = "2"
+    os.environ["MAX_CONCURRENT_INVESTIGATIONS"] = str(max(levels))
+    if args.no_risky_deploy:
+        os.environ["DEPLOY_RISKY_CONFIG_KEYS"] = "[]"
+    os.environ["LLM_MAX_CONCURRENCY"] = json.dumps(dict.fromkeys(("openai", "anthropic", "ollama"), args.llm_concurrency))
+    from src.config import get_settings
+
+    get_settings.cache_clear()
+
+    results: dict[str, Any] = {
+        "python": platform.python_version(),
+        "llm_latency_s": args.llm_latency,
+        "incidents_per_level": args.incidents,
+        "risky_deploy": not args.no_risky_deploy,
+    }
+    with use_fake_llm(FakeChatModel(latency=args.llm_latency, jitter=args.llm_jitter)):
+        if "commander" in sections:
+            results["commander"] = bench_commander(args.incidents, levels)
+        if "webhook" in sections:
+            results["webhook"] = bench_webhook(args.incidents, levels)
+        if "memory" in sections:
+            results["memory"] = bench_memory(args.incidents)
+        if "micro" in sections:
+            results["micro"] = bench_micro(args.micro_repeat)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Deterministic fake chat model for benchmarks.
+
+Answers RCA prompts with canned RCA JSON and every other prompt with a canned
+finding, after a configurable latency (slept on a thread for `invoke`, awaited
+for `ainvoke`). Token usage is estimated from text length so token metrics move.
+Plug it in with `use_fake_llm(...)`, which routes `get_llm()` to it.
+"""
+import asyncio
+import json
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+RCA_JSON = json.dumps(
+    {
+        "summary": "Database pool exhausted",
+        "root_cause": "pool_size raised in v2.3.1",
+        "evidence_summary": ["Too many connections", "p99 latency 4200ms"],
+        "recommended_actions": ["Rollback to v2.3.0"],
+    }
+)
+FINDING = (
+    "Observed: connection pool exhaustion errors rising with p99 latency. "
+    "Suggests: database saturation after the latest deploy. Confidence: 0.8"
+)
+
+
+class FakeChatModel(BaseChatModel):
+    """Canned outputs with `latency` seconds (+/- `jitter`) per call."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    rca_response: str = RCA_JSON
+    finding_response: str = FINDING
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _result(self, messages: list[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        text = self.rca_response if "RCA report as JSON" in prompt else self.finding_response
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(text) // 4,
+                "total_tokens": (len(prompt) + len(text)) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        return self._result(messages)
+
+    async def _agenerate(
+        self, messages: list[BaseMessage], stop: Optional[list[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return self._result(messages)
+
+
+@contextmanager
+def use_fake_llm(model: BaseChatModel, llm_cache: bool = False) -> Iterator[BaseChatModel]:
+    """
+    Route `get_llm()` to `model` for the duration of the block. The shared LLM
+    response cache is off by default, since repeated benchmark prompts would
+    otherwise be served from it and measure nothing.
+    """
+    from src.agents import llm
+    from src.agents.llm_cache import get_llm_cache
+
+    model.cache = get_llm_cache() if llm_cache else None
+    real_build = llm._build_llm
+    llm._build_llm = lambda *args: model
+    try:
+        yield model
+    finally:
+        llm._build_llm = real_build
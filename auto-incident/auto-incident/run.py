@@ -1,11 +1,50 @@
 #!/usr/bin/env python3
-"""Run the Autonomous Incident Commander server."""
+"""
+Run the Autonomous Incident Commander server.
+
+    python run.py                 # development: one process, auto-reload
+    python run.py --workers 4     # production: 4 worker processes, no reload
+
+With more than one worker, shared state (job queue, event streams, alert dedup,
+LLM cache) goes through the SQLite state backend (STATE_SQLITE_PATH), so any
+worker can accept an alert or serve `GET /incidents/{id}`.
+"""
+import argparse
+import os
+import sys
+
 import uvicorn
 
-if __name__ == "__main__":
+from src.config import get_settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)))
+    parser.add_argument("--reload", action=argparse.BooleanOptionalAction, default=None,
+                        help="auto-reload on code changes (default: on for a single worker)")
+    args = parser.parse_args()
+
+    reload = args.workers == 1 if args.reload is None else args.reload
+    if reload and args.workers > 1:
+        sys.exit("--reload runs a single process; drop it or use --workers 1")
+    if args.workers > 1:
+        settings = get_settings()
+        if "state_backend" not in settings.model_fields_set:
+            os.environ["STATE_BACKEND"] = "sqlite"  # inherited by the worker processes
+        elif settings.state_backend == "memory":
+            sys.exit("STATE_BACKEND=memory keeps state per process; use sqlite with --workers > 1")
+
     uvicorn.run(
         "src.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=reload,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,32 @@
-"""Investigator agents and Commander orchestrator."""
-from .commander import CommanderAgent
-from .logs_agent import LogsAgent
-from .metrics_agent import MetricsAgent
-from .deploy_intel_agent import DeployIntelAgent
+"""
+Investigator agents and Commander orchestrator.
+
+The agents are imported on first access, so light submodules (the LLM cache and
+scheduler) can be imported without LangGraph and every agent coming with them.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .commander import CommanderAgent
+    from .deploy_intel_agent import DeployIntelAgent
+    from .logs_agent import LogsAgent
+    from .metrics_agent import MetricsAgent
+
+_EXPORTS = {
+    "CommanderAgent": "commander",
+    "LogsAgent": "logs_agent",
+    "MetricsAgent": "metrics_agent",
+    "DeployIntelAgent": "deploy_intel_agent",
+}
 
 __all__ = ["CommanderAgent", "LogsAgent", "MetricsAgent", "DeployIntelAgent"]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -1,9 +1,20 @@
 """Commander Agent - orchestrates triage, planning, and task delegation."""
-from typing import Any
-
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
 
 from src.alert_layer.schemas import AlertEvent
-from src.agents.graph import run_graph
+from src.memory import IncidentStore, SimilarIncidentIndex
+from src.replay.cassette import arecording, recording
+
+if TYPE_CHECKING:
+    from src.agents.deploy_intel_agent import DeployIntelAgent
+    from src.agents.logs_agent import LogsAgent
+    from src.agents.metrics_agent import MetricsAgent
+    from src.decision_engine import DecisionEngine
+
+# Built by `warm_up` on first access
+_COMPONENTS = ("logs_agent", "metrics_agent", "deploy_agent", "engine", "graph")
 
 
 class CommanderAgent:
@@ -13,11 +24,97 @@ class CommanderAgent:
     - Planning
     - Task delegation via graph (Logs + Metrics parallel, then Deploy Intel)
     - Decision making via Decision Engine
+
+    Long-lived: the agents, their shared LLM client and the compiled graph are
+    created once and reused for every incident. With a `store`, every finished
+    investigation is persisted to it; with an `index`, repeat incidents are
+    recognized and their prior RCA reused or added as context.
+
+    Construction is cheap: the agents, LLM clients (and their provider SDKs) and the
+    graph are built on first use, or ahead of it by `warm_up`.
     """
 
-    def run(self, alert: AlertEvent, memory: None = None) -> dict[str, Any]:
+    logs_agent: "LogsAgent"
+    metrics_agent: "MetricsAgent"
+    deploy_agent: "DeployIntelAgent"
+    engine: "DecisionEngine"
+
+    def __init__(self, store: Optional[IncidentStore] = None, index: Optional[SimilarIncidentIndex] = None):
+        self.store = store
+        self.index = index
+        self._build_lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not set yet, i.e. components before `warm_up`
+        if name not in _COMPONENTS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        self.warm_up()
+        return self.__dict__[name]
+
+    def warm_up(self) -> None:
+        """Build the agents and LLM clients and compile the graph, if not done yet. Thread-safe."""
+        with self._build_lock:
+            if "graph" in self.__dict__:
+                return
+            from src.agents.deploy_intel_agent import DeployIntelAgent
+            from src.agents.graph import build_graph
+            from src.agents.logs_agent import LogsAgent
+            from src.agents.metrics_agent import MetricsAgent
+            from src.decision_engine import DecisionEngine
+
+            self.logs_agent = LogsAgent()
+            self.metrics_agent = MetricsAgent()
+            self.deploy_agent = DeployIntelAgent()
+            self.engine = DecisionEngine()
+            self.graph = build_graph(
+                logs_agent=self.logs_agent,
+                metrics_agent=self.metrics_agent,
+                deploy_agent=self.deploy_agent,
+                engine=self.engine,
+                store=self.store,
+                index=self.index,
+            )
+
+    def run(
+        self,
+        alert: AlertEvent,
+        memory: None = None,
+        incident_id: Optional[str] = None,
+        related_alerts: Sequence[AlertEvent] = (),
+    ) -> dict[str, Any]:
         """
         Execute full investigation pipeline via LangGraph.
         Memory is created internally by the graph; the `memory` param is ignored for API compatibility.
+        Pass `incident_id` to reuse an ID that was already handed out (e.g. by the job queue).
+        `related_alerts` are correlated alerts investigated together with `alert` in one run.
+        With CASSETTE_DIR set, the run is recorded into a cassette for offline replay.
         """
-        return run_graph(alert)
+        from src.agents.graph import run_graph
+
+        with recording(alert, incident_id, related_alerts) as recorded:
+            result = run_graph(alert, incident_id=incident_id, graph=self.graph, related_alerts=related_alerts)
+            recorded(result)
+        return result
+
+    async def arun(
+        self,
+        alert: AlertEvent,
+        incident_id: Optional[str] = None,
+        on_event: Optional[Callable[[dict[str, Any]], None]] = None,
+        related_alerts: Sequence[AlertEvent] = (),
+    ) -> dict[str, Any]:
+        """
+        Async variant of `run`: the whole pipeline runs on the event loop without worker threads.
+        `on_event` receives progress events (node transitions, findings, RCA tokens) as they happen.
+        """
+        if "graph" not in self.__dict__:
+            # The first build imports provider SDKs; keep that off the event loop
+            await asyncio.to_thread(self.warm_up)
+        from src.agents.graph import arun_graph
+
+        async with arecording(alert, incident_id, related_alerts) as recorded:
+            result = await arun_graph(
+                alert, incident_id=incident_id, graph=self.graph, on_event=on_event, related_alerts=related_alerts
+            )
+            recorded(result)
+        return result
@@ -1,12 +1,16 @@
 """Deploy Intel Agent - historian for CI/CD and config changes."""
 from datetime import datetime, timedelta
+from typing import Any, Iterator, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
 
-from src.agents.llm import get_llm
-from src.integrations.deploy_client import fetch_deploy_history
+from src.agents.llm import get_llm, get_model_name
+from src.config import get_settings
+from src.integrations import afan_out, fan_out
+from src.integrations.deploy_client import afetch_deploy_history, fetch_deploy_history
 from src.memory import IncidentMemory
+from src.memory.context import render_alert_header, render_config_diff, render_deploys
 from src.alert_layer.schemas import AlertEvent
 
 
@@ -17,12 +21,23 @@ SYSTEM_PROMPT = """You are a Deploy Intel Agent (Historian). Correlate incidents
 
 Use findings from Logs and Metrics agents if available. Be concise. Output a finding and a hypothesis about root cause."""
 
+# A correlation made before the telemetry findings are in, until `confirm` checks it against them
+SPECULATIVE_CONFIDENCE = 0.6
+
 
 class DeployIntelAgent:
-    """Tracks CI/CD history and config diffs, correlates with incidents."""
+    """
+    Tracks CI/CD history and config diffs, correlates with incidents.
+    Neither step waits for the other agents: the graph runs `fetch` and then a
+    speculative `correlate` alongside telemetry, and `confirm`s the correlation against
+    the telemetry findings once they are in. A deploy shortly before the alert that
+    changed risky config keys is reported directly, without the LLM, as soon as it is
+    fetched (`report_suspect`); the graph then skips `correlate`.
+    """
 
     def __init__(self):
-        self.llm = get_llm()
+        self.llm = get_llm("deploy_intel")
+        self.model = get_model_name("deploy_intel")
         self.parser = StrOutputParser()
 
     def investigate(
@@ -31,27 +46,173 @@ class DeployIntelAgent:
         memory: IncidentMemory,
     ) -> None:
         """Fetch deploy history, analyze with LLM, write findings and hypotheses."""
+        self.correlate(alert, memory, self.fetch(alert, memory))
+
+    async def ainvestigate(self, alert: AlertEvent, memory: IncidentMemory) -> None:
+        """Async variant of `investigate` using `ainvoke`."""
+        await self.acorrelate(alert, memory, await self.afetch(alert, memory))
+
+    def fetch(self, alert: AlertEvent, memory: IncidentMemory) -> list[dict[str, Any]]:
+        """Deploy history of the last 24h for every service under investigation, recorded as evidence."""
         since = datetime.utcnow() - timedelta(hours=24)
-        deploys = fetch_deploy_history(alert.service, since=since)
+        services = memory.services(alert)
+        histories = fan_out(lambda service: fetch_deploy_history(service, since=since), services)
+        return self._record_history(memory, services, histories)
 
+    async def afetch(self, alert: AlertEvent, memory: IncidentMemory) -> list[dict[str, Any]]:
+        since = datetime.utcnow() - timedelta(hours=24)
+
+        async def fetch(service: str) -> list[dict[str, Any]]:
+            return await afetch_deploy_history(service, since=since)
+
+        services = memory.services(alert)
+        return self._record_history(memory, services, await afan_out(fetch, services))
+
+    def _record_history(
+        self, memory: IncidentMemory, services: list[str], histories: list[list[dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        if len(histories) == 1:
+            deploys = histories[0]
+        else:
+            # One timeline across services, newest first, each deploy tagged with its service
+            deploys = [
+                {**deploy, "service": service}
+                for service, history in zip(services, histories)
+                for deploy in history
+            ]
+            deploys.sort(key=lambda d: d.get("timestamp", ""), reverse=True)
         memory.add_evidence("deploy_history", {"deployments": deploys})
+        return deploys
+
+    def report_suspect(self, alert: AlertEvent, memory: IncidentMemory, deploys: list[dict[str, Any]]) -> bool:
+        """Record a risky deploy (see `risky_deploy`) as a finding and hypothesis; False if there is none."""
+        suspect = risky_deploy(alert, deploys)
+        if suspect is not None:
+            self._record_suspect(alert, memory, suspect)
+        return suspect is not None
+
+    def correlate(
+        self, alert: AlertEvent, memory: IncidentMemory, deploys: list[dict[str, Any]], speculative: bool = False
+    ) -> None:
+        """
+        Correlate deploys with the findings so far and write a finding and hypothesis.
+        A `speculative` correlation may run before the telemetry findings exist, and is
+        recorded with lower confidence.
+        """
+        if self.report_suspect(alert, memory, deploys):
+            return
+
+        chain = self.llm | self.parser
+        response = chain.invoke(self._messages(alert, memory, deploys))
+
+        self._record(memory, response, SPECULATIVE_CONFIDENCE if speculative else 0.9)
 
-        context = memory.get_context()
+    async def acorrelate(
+        self, alert: AlertEvent, memory: IncidentMemory, deploys: list[dict[str, Any]], speculative: bool = False
+    ) -> None:
+        """Async variant of `correlate` using `ainvoke`."""
+        if self.report_suspect(alert, memory, deploys):
+            return
+
+        chain = self.llm | self.parser
+        response = await chain.ainvoke(self._messages(alert, memory, deploys))
+
+        self._record(memory, response, SPECULATIVE_CONFIDENCE if speculative else 0.9)
+
+    def confirm(self, alert: AlertEvent, memory: IncidentMemory, deploys: list[dict[str, Any]]) -> Optional[bool]:
+        """
+        Check a speculative correlation against the telemetry findings, without the LLM:
+        whether they mention a deploy from the risk window (its version, ID or commit) or
+        a config key it changed. Recorded as a finding; None when no deploy is in the window.
+        """
+        recent = [deploy for deploy, _ in _recent_deploys(alert, deploys)]
+        if not recent:
+            return None
+        text = " ".join(f.content for f in memory.findings if f.agent != "deploy_intel").lower()
+        for deploy in recent:
+            keys = deploy.get("config_diff") or {}
+            refs = [deploy.get("version"), deploy.get("deploy_id"), deploy.get("commit")]
+            refs += [k for key in keys for k in (key, key.replace("_", " "))]
+            mentioned = list(dict.fromkeys(str(r) for r in refs if r and str(r).lower() in text))
+            if mentioned:
+                memory.add_finding(
+                    agent="deploy_intel",
+                    content=(
+                        f"Telemetry findings mention deploy {deploy.get('version', '?')} "
+                        f"({', '.join(mentioned)}), supporting the deploy correlation"
+                    ),
+                    confidence=0.85,
+                )
+                return True
+        memory.add_finding(
+            agent="deploy_intel",
+            content="No telemetry finding mentions a recent deploy or the config it changed; "
+            "the deploy correlation is unconfirmed",
+            confidence=0.3,
+        )
+        return False
+
+    def _messages(self, alert: AlertEvent, memory: IncidentMemory, deploys: list) -> list:
+        context = memory.get_context(exclude=("deploy_history",), model=self.model)
 
-        prompt = f"""Alert: {alert.trigger_type} on service {alert.service}
+        prompt = f"""{render_alert_header(alert, memory.related_alerts)}
 
 Existing findings from other agents:
 {context}
 
 Deployment history:
-{deploys}
+{render_deploys(deploys)}
 
 Correlate the incident with recent deployments and config changes. What hypothesis do you have for the root cause?"""
+        return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
 
-        chain = self.llm | self.parser
-        response = chain.invoke(
-            [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
+    def _record(self, memory: IncidentMemory, response: str, confidence: float) -> None:
+        memory.add_finding(agent="deploy_intel", content=response, confidence=confidence)
+        memory.add_hypothesis(description=response)
+
+    def _record_suspect(self, alert: AlertEvent, memory: IncidentMemory, deploy: dict[str, Any]) -> None:
+        keys = ", ".join(deploy["risky_keys"])
+        changes = render_config_diff({k: deploy["config_diff"][k] for k in deploy["risky_keys"]})
+        # Set when the incident spans several services
+        of_service = f"of {deploy['service']} " if deploy.get("service") else ""
+        memory.add_finding(
+            agent="deploy_intel",
+            content=(
+                f"Deploy {deploy.get('version', '?')} ({deploy.get('deploy_id', '?')}) {of_service}went out "
+                f"{deploy['minutes_before_alert']:.0f} min before the alert and changed risky config: {changes}"
+            ),
+            confidence=0.9,
+        )
+        memory.add_hypothesis(
+            description=(
+                f"The config change in {deploy.get('version', '?')} ({keys}) {of_service}caused the "
+                f"{alert.trigger_type} on {alert.service}"
+            )
         )
 
-        memory.add_finding(agent="deploy_intel", content=response, confidence=0.9)
-        memory.add_hypothesis(description=response)
+
+def _recent_deploys(alert: AlertEvent, deploys: list[dict[str, Any]]) -> Iterator[tuple[dict[str, Any], float]]:
+    """Successful deploys within DEPLOY_RISK_WINDOW_MINUTES before the alert, with their minutes before it."""
+    window = get_settings().deploy_risk_window_minutes
+    for deploy in deploys:
+        try:
+            deployed_at = datetime.fromisoformat(deploy.get("timestamp", ""))
+        except ValueError:
+            continue
+        minutes = (alert.timestamp - deployed_at).total_seconds() / 60
+        if 0 <= minutes <= window and deploy.get("status", "success") == "success":
+            yield deploy, minutes
+
+
+def risky_deploy(alert: AlertEvent, deploys: list[dict[str, Any]]) -> Optional[dict[str, Any]]:
+    """
+    The most recent successful deploy within DEPLOY_RISK_WINDOW_MINUTES before the alert whose
+    config diff touches a DEPLOY_RISKY_CONFIG_KEYS pattern, annotated with `risky_keys` and
+    `minutes_before_alert`; None when there is no such deploy.
+    """
+    patterns = [p.lower() for p in get_settings().deploy_risky_config_keys]
+    for deploy, minutes in _recent_deploys(alert, deploys):
+        keys = [k for k in deploy.get("config_diff") or {} if any(p in k.lower() for p in patterns)]
+        if keys:
+            return {**deploy, "risky_keys": keys, "minutes_before_alert": minutes}
+    return None
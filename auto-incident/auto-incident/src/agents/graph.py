@@ -1,42 +1,111 @@
 """LangGraph orchestration for the incident investigation pipeline."""
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Optional
+import asyncio
+from concurrent.futures import as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence
 
 from typing_extensions import TypedDict
 
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langgraph.graph import END, START, StateGraph
 
+from src.alert_layer import alert_priority
 from src.alert_layer.schemas import AlertEvent
 from src.agents.logs_agent import LogsAgent
 from src.agents.metrics_agent import MetricsAgent
 from src.agents.deploy_intel_agent import DeployIntelAgent
-from src.decision_engine import DecisionEngine
+from src.agents.llm_scheduler import llm_priority
+from src.decision_engine import DecisionEngine, IncrementalJSONParser, message_text
 from src.decision_engine.schemas import RCAReport
-from src.memory import IncidentMemory
+from src.config import get_settings
+from src.instrumentation import IncidentTimings, InstrumentationHandler, timed_node
+from src.memory import IncidentMemory, IncidentStore, SimilarIncidentIndex
+from src.memory.similar_incidents import render_similar_incidents
 
 
 class IncidentState(TypedDict):
     """State passed through the investigation graph."""
 
     alert: AlertEvent
+    related_alerts: list[AlertEvent]
+    incident_id: Optional[str]
     memory: IncidentMemory
     rca: Optional[RCAReport]
+    similar: list[dict[str, Any]]
+    reuse_candidate: Optional[dict[str, Any]]
+    reused_from: Optional[str]
+    deploys: list[dict[str, Any]]
+    deploy_suspected: bool
 
 
 def commander_plan(state: IncidentState) -> dict[str, Any]:
     """Trigger and plan: initialize memory, prepare for investigation."""
-    memory = IncidentMemory()
+    memory = IncidentMemory(
+        incident_id=state.get("incident_id"), alert=state["alert"], related_alerts=state.get("related_alerts", [])
+    )
     return {"memory": memory}
 
 
-def investigate_telemetry(state: IncidentState) -> dict[str, Any]:
+async def acommander_plan(state: IncidentState) -> dict[str, Any]:
+    return commander_plan(state)
+
+
+def recall_similar(
+    state: IncidentState,
+    *,
+    index: Optional[SimilarIncidentIndex],
+    top_k: int,
+    context_threshold: float,
+    reuse_threshold: float,
+    reuse_max_age_seconds: float,
+) -> dict[str, Any]:
+    """
+    Look up similar past incidents by alert signature. Matches above
+    `context_threshold` are added to memory as compact context; a fresh match
+    above `reuse_threshold` becomes a reuse candidate, confirmed against the
+    findings once the agents have run (`confirm_similar`).
+    """
+    if index is None:
+        return {}
+    alert = state["alert"]
+    similar = [inc for inc in index.search(alert, k=top_k) if inc["score"] >= context_threshold]
+    if not similar:
+        return {}
+
+    summaries = [
+        {"incident_id": inc["incident_id"], "score": inc["score"], "root_cause": inc["rca"].get("root_cause")}
+        for inc in similar
+    ]
+    state["memory"].add_evidence(
+        "similar_incidents", {"incidents": summaries, "summary": render_similar_incidents(similar)}
+    )
+    best = similar[0]
+    age = (alert.timestamp - best["created_at"]).total_seconds()
+    if best["score"] >= reuse_threshold and age <= reuse_max_age_seconds:
+        return {"similar": summaries, "reuse_candidate": best}
+    return {"similar": summaries}
+
+
+async def arecall_similar(state: IncidentState, **bound) -> dict[str, Any]:
+    # The NumPy index search runs off the event loop
+    return await asyncio.to_thread(recall_similar, state, **bound)
+
+
+def investigate_telemetry(
+    state: IncidentState,
+    *,
+    logs_agent: LogsAgent,
+    metrics_agent: MetricsAgent,
+) -> dict[str, Any]:
     """Run Logs + Metrics agents in parallel."""
     alert = state["alert"]
     memory = state["memory"]
-    logs_agent = LogsAgent()
-    metrics_agent = MetricsAgent()
 
-    with ThreadPoolExecutor(max_workers=2) as executor:
+    # Copies the context into the workers, so callbacks and timings follow the agents
+    with ContextThreadPoolExecutor(max_workers=2) as executor:
         futures = [
             executor.submit(logs_agent.investigate, alert, memory),
             executor.submit(metrics_agent.investigate, alert, memory),
@@ -46,55 +115,354 @@ def investigate_telemetry(state: IncidentState) -> dict[str, Any]:
     return {}
 
 
-def deploy_intel(state: IncidentState) -> dict[str, Any]:
-    """Run Deploy Intel Agent - correlates with CI/CD and config changes."""
+async def _report_findings(memory: IncidentMemory, agent: str, start: int = 0) -> None:
+    """
+    Publish an agent's findings (those after the first `start` findings) as custom events
+    so streaming clients see them as they land.
+    """
+    for f in memory.findings[start:]:
+        if f.agent == agent:
+            await adispatch_custom_event(
+                "finding",
+                {"agent": f.agent, "content": f.content, "confidence": f.confidence},
+            )
+
+
+async def ainvestigate_telemetry(
+    state: IncidentState,
+    *,
+    logs_agent: LogsAgent,
+    metrics_agent: MetricsAgent,
+) -> dict[str, Any]:
+    """Run Logs + Metrics agents concurrently on the event loop."""
     alert = state["alert"]
     memory = state["memory"]
-    agent = DeployIntelAgent()
-    agent.investigate(alert, memory)
+
+    async def run(agent, name: str) -> None:
+        await agent.ainvestigate(alert, memory)
+        await _report_findings(memory, name)
+
+    await asyncio.gather(run(logs_agent, "logs"), run(metrics_agent, "metrics"))
+    return {}
+
+
+def deploy_intel(state: IncidentState, *, agent: DeployIntelAgent) -> dict[str, Any]:
+    """
+    Run Deploy Intel Agent alongside telemetry: fetch CI/CD history and config diffs and
+    report a risky deploy right away; otherwise correlate speculatively, with only the
+    findings already in (`confirm_deploys` checks the correlation once telemetry is done).
+    """
+    alert, memory = state["alert"], state["memory"]
+    deploys = agent.fetch(alert, memory)
+    suspected = agent.report_suspect(alert, memory, deploys)
+    if not suspected:
+        agent.correlate(alert, memory, deploys, speculative=True)
+    return {"deploys": deploys, "deploy_suspected": suspected}
+
+
+async def adeploy_intel(state: IncidentState, *, agent: DeployIntelAgent) -> dict[str, Any]:
+    alert, memory = state["alert"], state["memory"]
+    deploys = await agent.afetch(alert, memory)
+    suspected = agent.report_suspect(alert, memory, deploys)
+    if not suspected:
+        await agent.acorrelate(alert, memory, deploys, speculative=True)
+    await _report_findings(memory, "deploy_intel")
+    return {"deploys": deploys, "deploy_suspected": suspected}
+
+
+def confirm_deploys(state: IncidentState, *, agent: DeployIntelAgent) -> dict[str, Any]:
+    """Check the speculative deploy correlation against the telemetry findings, without the LLM."""
+    if not state.get("deploy_suspected"):
+        agent.confirm(state["alert"], state["memory"], state.get("deploys", []))
     return {}
 
 
-def decision_engine(state: IncidentState) -> dict[str, Any]:
+async def aconfirm_deploys(state: IncidentState, **bound) -> dict[str, Any]:
+    # Only the new finding; the correlation itself was published by deploy_intel
+    start = len(state["memory"].findings)
+    update = confirm_deploys(state, **bound)
+    await _report_findings(state["memory"], "deploy_intel", start)
+    return update
+
+
+def confirm_similar(
+    state: IncidentState,
+    *,
+    index: Optional[SimilarIncidentIndex],
+    reuse_threshold: float,
+) -> dict[str, Any]:
+    """
+    Reuse the candidate's RCA only if this incident's findings match it too
+    (signature plus finding text above `reuse_threshold`); the Decision Engine is then skipped.
+    """
+    candidate = state.get("reuse_candidate")
+    if index is None or candidate is None:
+        return {}
+    memory = state["memory"]
+    findings = " ".join(f.content for f in memory.findings)
+    score = index.score(candidate["incident_id"], state["alert"], findings)
+    if score < reuse_threshold:
+        return {}
+    memory.add_finding(
+        "commander",
+        f"Repeat of incident {candidate['incident_id']} (similarity {score:.2f} with findings); reusing its RCA",
+        confidence=score,
+    )
+    return {"rca": RCAReport(**candidate["rca"]), "reused_from": candidate["incident_id"]}
+
+
+async def aconfirm_similar(state: IncidentState, **bound) -> dict[str, Any]:
+    update = confirm_similar(state, **bound)
+    await _report_findings(state["memory"], "commander")
+    return update
+
+
+def _after_confirm(state: IncidentState) -> str:
+    return "record_incident" if state.get("reused_from") else "decision_engine"
+
+
+def decision_engine(state: IncidentState, *, engine: DecisionEngine) -> dict[str, Any]:
     """Generate RCA and rollback recommendation."""
     memory = state["memory"]
-    engine = DecisionEngine()
     rca = engine.generate_rca(memory)
     return {"rca": rca}
 
 
-def build_graph() -> StateGraph:
-    """Build and compile the incident investigation graph."""
+async def adecision_engine(state: IncidentState, *, engine: DecisionEngine) -> dict[str, Any]:
+    rca = await engine.agenerate_rca(state["memory"])
+    return {"rca": rca}
+
+
+def record_incident(
+    state: IncidentState,
+    *,
+    store: Optional[IncidentStore],
+    index: Optional[SimilarIncidentIndex],
+) -> dict[str, Any]:
+    """Persist the finished incident and make it retrievable for future ones."""
+    if store is None and index is None:
+        return {}
+    rca = state["rca"].model_dump() if state["rca"] else None
+    record = state["memory"].to_record(rca)
+    if store is not None:
+        store.save(record)
+    # Reused RCAs are already indexed under the incident they came from
+    if index is not None and not state.get("reused_from"):
+        index.add(record, state["alert"])
+    return {}
+
+
+async def arecord_incident(state: IncidentState, **bound) -> dict[str, Any]:
+    # Index and store writes run off the event loop
+    return await asyncio.to_thread(record_incident, state, **bound)
+
+
+def _node(func, afunc, **bound) -> RunnableLambda:
+    """
+    Graph node with sync (`graph.invoke`) and async (`graph.ainvoke`) implementations.
+    Both are timed into the node latency histogram and the incident's timing breakdown.
+    """
+    name = func.__name__
+
+    def run(state: IncidentState) -> dict[str, Any]:
+        with timed_node(name):
+            return func(state, **bound)
+
+    async def arun(state: IncidentState) -> dict[str, Any]:
+        with timed_node(name):
+            return await afunc(state, **bound)
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+
+def build_graph(
+    logs_agent: Optional[LogsAgent] = None,
+    metrics_agent: Optional[MetricsAgent] = None,
+    deploy_agent: Optional[DeployIntelAgent] = None,
+    engine: Optional[DecisionEngine] = None,
+    store: Optional[IncidentStore] = None,
+    index: Optional[SimilarIncidentIndex] = None,
+) -> StateGraph:
+    """
+    Build and compile the incident investigation graph.
+    The agents are bound into the nodes, so a compiled graph can be reused across incidents.
+    Every node has an async variant, so the same graph serves `invoke` and `ainvoke`.
+    With a `store`, finished incidents are persisted; with an `index`, similar past
+    incidents are looked up before investigating, a repeat whose findings also match
+    reuses the prior RCA instead of calling the Decision Engine, and new ones are added to it.
+    Deploy history is fetched and correlated in parallel with logs and metrics, and the
+    correlation is checked against their findings once both are done; a risky deploy
+    found by the fetch skips the correlation.
+    """
+    settings = get_settings()
     builder = StateGraph(IncidentState)
 
-    builder.add_node("commander_plan", commander_plan)
-    builder.add_node("investigate_telemetry", investigate_telemetry)
-    builder.add_node("deploy_intel", deploy_intel)
-    builder.add_node("decision_engine", decision_engine)
+    builder.add_node("commander_plan", _node(commander_plan, acommander_plan))
+    builder.add_node(
+        "recall_similar",
+        _node(
+            recall_similar,
+            arecall_similar,
+            index=index,
+            top_k=settings.similar_incidents_top_k,
+            context_threshold=settings.similar_incidents_context_threshold,
+            reuse_threshold=settings.similar_incidents_reuse_threshold,
+            reuse_max_age_seconds=settings.similar_incidents_reuse_max_age_seconds,
+        ),
+    )
+    builder.add_node(
+        "investigate_telemetry",
+        _node(
+            investigate_telemetry,
+            ainvestigate_telemetry,
+            logs_agent=logs_agent or LogsAgent(),
+            metrics_agent=metrics_agent or MetricsAgent(),
+        ),
+    )
+    deploy_agent = deploy_agent or DeployIntelAgent()
+    builder.add_node("deploy_intel", _node(deploy_intel, adeploy_intel, agent=deploy_agent))
+    builder.add_node("confirm_deploys", _node(confirm_deploys, aconfirm_deploys, agent=deploy_agent))
+    builder.add_node(
+        "confirm_similar",
+        _node(
+            confirm_similar,
+            aconfirm_similar,
+            index=index,
+            reuse_threshold=settings.similar_incidents_reuse_threshold,
+        ),
+    )
+    builder.add_node("decision_engine", _node(decision_engine, adecision_engine, engine=engine or DecisionEngine()))
+    builder.add_node("record_incident", _node(record_incident, arecord_incident, store=store, index=index))
 
     builder.add_edge(START, "commander_plan")
-    builder.add_edge("commander_plan", "investigate_telemetry")
-    builder.add_edge("investigate_telemetry", "deploy_intel")
-    builder.add_edge("deploy_intel", "decision_engine")
-    builder.add_edge("decision_engine", END)
+    builder.add_edge("commander_plan", "recall_similar")
+    # Deploy history and its correlation don't depend on telemetry, so they run alongside it
+    builder.add_edge("recall_similar", "investigate_telemetry")
+    builder.add_edge("recall_similar", "deploy_intel")
+    builder.add_edge(["investigate_telemetry", "deploy_intel"], "confirm_deploys")
+    builder.add_edge("confirm_deploys", "confirm_similar")
+    builder.add_conditional_edges("confirm_similar", _after_confirm, ["decision_engine", "record_incident"])
+    builder.add_edge("decision_engine", "record_incident")
+    builder.add_edge("record_incident", END)
 
     return builder.compile()
 
 
-def run_graph(alert: AlertEvent) -> dict[str, Any]:
-    """Execute the investigation graph and return the result."""
-    graph = build_graph()
-    initial: IncidentState = {
+@lru_cache(maxsize=1)
+def get_default_graph():
+    """Compiled graph shared by callers that don't own one."""
+    return build_graph()
+
+
+def _initial_state(
+    alert: AlertEvent, incident_id: Optional[str], related_alerts: Sequence[AlertEvent] = ()
+) -> IncidentState:
+    return {
         "alert": alert,
+        "related_alerts": list(related_alerts),
+        "incident_id": incident_id,
         "memory": IncidentMemory(),  # placeholder, commander_plan overwrites
         "rca": None,
+        "similar": [],
+        "reuse_candidate": None,
+        "reused_from": None,
+        "deploys": [],
+        "deploy_suspected": False,
     }
-    result = graph.invoke(initial)
+
+
+def _format_result(result: IncidentState) -> dict[str, Any]:
+    alert = {"trigger_type": result["alert"].trigger_type, "service": result["alert"].service}
+    if result.get("related_alerts"):
+        alert["related"] = [{"trigger_type": a.trigger_type, "service": a.service} for a in result["related_alerts"]]
     return {
         "incident_id": result["memory"].incident_id,
-        "alert": {
-            "trigger_type": result["alert"].trigger_type,
-            "service": result["alert"].service,
-        },
+        "alert": alert,
         "rca": result["rca"].model_dump() if result["rca"] else None,
+        "similar_incidents": result.get("similar", []),
+        "reused_from": result.get("reused_from"),
     }
+
+
+@contextmanager
+def _instrumented(alerts: Sequence[AlertEvent]):
+    """
+    Timing breakdown for one run, plus the run config that reports LLM calls into it.
+    LLM calls made during the run are scheduled in the most urgent alert's priority lane.
+    """
+    timings = IncidentTimings()
+    with timings.activate(), llm_priority(min(alert_priority(a) for a in alerts)):
+        yield timings, {"callbacks": [InstrumentationHandler(timings)]}
+
+
+def run_graph(
+    alert: AlertEvent,
+    incident_id: Optional[str] = None,
+    graph=None,
+    related_alerts: Sequence[AlertEvent] = (),
+) -> dict[str, Any]:
+    """
+    Execute the investigation graph and return the result, with a per-stage timing breakdown.
+    `related_alerts` (a correlated cluster) are investigated in the same run, sharing one memory.
+    """
+    graph = graph or get_default_graph()
+    with _instrumented([alert, *related_alerts]) as (timings, config):
+        result = graph.invoke(_initial_state(alert, incident_id, related_alerts), config=config)
+    return {**_format_result(result), "timings": timings.breakdown()}
+
+
+async def arun_graph(
+    alert: AlertEvent,
+    incident_id: Optional[str] = None,
+    graph=None,
+    on_event: Optional[Callable[[dict[str, Any]], None]] = None,
+    related_alerts: Sequence[AlertEvent] = (),
+) -> dict[str, Any]:
+    """
+    Execute the investigation graph on the event loop via `ainvoke`.
+    With `on_event`, runs via `astream_events` instead and reports node
+    transitions, agent findings, RCA tokens and RCA fields as they complete.
+    The result carries the same timing breakdown as `run_graph`.
+    """
+    graph = graph or get_default_graph()
+    initial = _initial_state(alert, incident_id, related_alerts)
+    with _instrumented([alert, *related_alerts]) as (timings, config):
+        if on_event is None:
+            result = await graph.ainvoke(initial, config=config)
+        else:
+            result = await _stream(graph, initial, config, on_event)
+    return {**_format_result(result), "timings": timings.breakdown()}
+
+
+async def _stream(
+    graph,
+    initial: IncidentState,
+    config: dict[str, Any],
+    on_event: Callable[[dict[str, Any]], None],
+) -> IncidentState:
+    result = None
+    rca_parser, rca_fields = IncrementalJSONParser(), {}
+    async for event in graph.astream_events(initial, config=config, version="v2"):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+        is_node = any(tag.startswith("graph:step:") for tag in event.get("tags", []))
+
+        if kind == "on_chain_start" and is_node:
+            on_event({"type": "node_start", "node": node})
+        elif kind == "on_chain_end" and is_node:
+            on_event({"type": "node_end", "node": node})
+        elif kind == "on_custom_event" and event["name"] == "finding":
+            on_event({"type": "finding", **event["data"]})
+        elif kind == "on_chat_model_start" and node == "decision_engine":
+            # A repair attempt streams a fresh reply
+            rca_parser, rca_fields = IncrementalJSONParser(), {}
+        elif kind == "on_chat_model_stream" and node == "decision_engine":
+            text = message_text(event["data"]["chunk"])
+            on_event({"type": "rca_token", "text": text})
+            fields = rca_parser.feed(text).fields()
+            if fields != rca_fields:
+                rca_fields = fields
+                on_event({"type": "rca_partial", "rca": fields})
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            result = event["data"]["output"]
+    return result
@@ -1,27 +1,159 @@
 """LLM factory for agents."""
+import importlib
+from functools import lru_cache
+from typing import Optional
+
 from langchain_core.language_models import BaseChatModel
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_ollama import ChatOllama
+from langchain_core.runnables import Runnable
+
+from src.agents.llm_cache import get_llm_cache
+from src.agents.llm_scheduler import ScheduledChatModel, get_llm_scheduler
+from src.config import Settings, get_settings
+
+PROVIDERS = ("openai", "anthropic", "ollama")
+# Model used for a provider when neither LLM_MODEL nor a role spec names one
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "anthropic": "claude-3-haiku-20240307", "ollama": "mistral:latest"}
+# Callers that can be routed to their own model
+LLM_ROLES = ("logs", "metrics", "deploy_intel", "decision")
+# Chat model class per provider. Provider SDKs take seconds to import, so only the
+# providers a role or fallback actually resolves to are imported, on first use.
+PROVIDER_CLASSES = {
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "anthropic": ("langchain_anthropic", "ChatAnthropic"),
+    "ollama": ("langchain_ollama", "ChatOllama"),
+}
+
+# Scheduled wrappers, one per built client
+_scheduled_llms: dict[tuple[str, str, str, int], ScheduledChatModel] = {}
 
-from src.config import get_settings
 
+def get_llm(role: Optional[str] = None) -> Runnable:
+    """
+    Return the LLM for `role` (one of LLM_ROLES), or the default model when no role is given.
 
-def get_llm() -> BaseChatModel:
-    """Return configured LLM (OpenAI, Anthropic, or Ollama)."""
+    Roles are mapped to "provider:model" specs by LLM_ROLE_MODELS; unmapped roles use
+    LLM_PROVIDER / LLM_MODEL. When LLM_FALLBACK_MODELS lists fallbacks for the role (or
+    under "default"), a call that errors or times out is retried on the next model.
+    Clients are shared per provider/model so every agent reuses one HTTP connection pool,
+    and responses go through the shared LLMResponseCache when it is enabled.
+    Calls are admitted by the shared LLMScheduler (per-provider limits, priority lanes, retries).
+    With CASSETTE_DIR set, requests and responses are also recorded into the active cassette.
+    """
+    if role is not None and role not in LLM_ROLES:
+        raise ValueError(f"Unknown LLM role {role!r}; expected one of {', '.join(LLM_ROLES)}")
     settings = get_settings()
-    if settings.llm_provider == "ollama":
-        return ChatOllama(
-            model=settings.llm_model,
-            base_url=settings.ollama_base_url,
+    specs = [_role_spec(role, settings)]
+    for spec in settings.llm_fallback_models.get(role or "default", settings.llm_fallback_models.get("default", [])):
+        candidate = parse_model_spec(spec)
+        if candidate not in specs:
+            specs.append(candidate)
+
+    # With fallbacks configured, failures move on to the next model instead of being retried
+    # on the same one; only the last model in the chain keeps the scheduler's retries.
+    models = [
+        _scheduled(provider, model, retries=0 if i < len(specs) - 1 else settings.llm_max_retries)
+        for i, (provider, model) in enumerate(specs)
+    ]
+    if len(models) == 1:
+        return models[0]
+    return models[0].with_fallbacks(models[1:])
+
+
+def get_model_name(role: Optional[str] = None) -> str:
+    """Model the role's primary LLM resolves to, for per-model settings such as CONTEXT_TOKEN_BUDGETS."""
+    return _role_spec(role, get_settings())[1]
+
+
+def parse_model_spec(spec: str) -> tuple[str, str]:
+    """
+    "provider:model" -> (provider, model). Ollama tags keep their colon
+    ("ollama:llama3.2:3b"); a bare provider ("anthropic") means its default model.
+    """
+    provider, _, model = spec.partition(":")
+    provider = provider.strip().lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider in {spec!r}; expected one of {', '.join(PROVIDERS)}")
+    return provider, model.strip() or DEFAULT_MODELS[provider]
+
+
+def _role_spec(role: Optional[str], settings: Settings) -> tuple[str, str]:
+    spec = settings.llm_role_models.get(role) if role else None
+    if spec:
+        return parse_model_spec(spec)
+    return settings.llm_provider, settings.llm_model or DEFAULT_MODELS[settings.llm_provider]
+
+
+def _endpoint_or_key(provider: str, settings: Settings) -> str:
+    if provider == "ollama":
+        return settings.ollama_base_url
+    if provider == "anthropic":
+        return settings.anthropic_api_key
+    return settings.openai_api_key
+
+
+def _scheduled(provider: str, model: str, retries: int) -> BaseChatModel:
+    endpoint_or_key = _endpoint_or_key(provider, get_settings())
+    llm = _build_llm(provider, model, endpoint_or_key)
+    key = (provider, model, endpoint_or_key, retries)
+    scheduled = _scheduled_llms.get(key)
+    if scheduled is None or scheduled.inner is not llm:
+        scheduled = _scheduled_llms[key] = _schedule(provider, llm, retries)
+    return scheduled
+
+
+def _schedule(provider: str, llm: BaseChatModel, retries: int) -> ScheduledChatModel:
+    settings = get_settings()
+    return ScheduledChatModel(
+        inner=llm,
+        provider=provider,
+        scheduler=get_llm_scheduler(),
+        cache=llm.cache,
+        max_retries=retries,
+        retry_backoff=settings.llm_retry_backoff_seconds,
+        retry_max_backoff=settings.llm_retry_max_backoff_seconds,
+    )
+
+
+def provider_class(provider: str) -> type[BaseChatModel]:
+    """The provider's chat model class, importing its SDK if this is the first use."""
+    module, name = PROVIDER_CLASSES[provider]
+    return getattr(importlib.import_module(module), name)
+
+
+@lru_cache(maxsize=None)
+def _build_llm(provider: str, model: str, endpoint_or_key: str) -> BaseChatModel:
+    settings = get_settings()
+    timeout = settings.llm_timeout_seconds
+    # Recording needs every response from the provider, so it bypasses the response cache
+    recording = bool(settings.cassette_dir)
+    cache = None if recording else get_llm_cache()
+    chat_model = provider_class(provider)
+    if provider == "ollama":
+        llm = chat_model(
+            model=model,
+            base_url=endpoint_or_key,
             temperature=0,
+            client_kwargs={"timeout": timeout},
+            cache=cache,
         )
-    if settings.llm_provider == "anthropic":
-        return ChatAnthropic(
-            model="claude-3-haiku-20240307",
-            api_key=settings.anthropic_api_key,
+    elif provider == "anthropic":
+        llm = chat_model(
+            model=model,
+            api_key=endpoint_or_key,
+            default_request_timeout=timeout,
+            max_retries=0,  # retried by the scheduler
+            cache=cache,
         )
-    return ChatOpenAI(
-        model=settings.llm_model,
-        api_key=settings.openai_api_key,
-    )
+    else:
+        llm = chat_model(
+            model=model,
+            api_key=endpoint_or_key,
+            request_timeout=timeout,
+            max_retries=0,
+            cache=cache,
+        )
+    if recording:
+        from src.replay.llm import CassetteChatModel
+
+        return CassetteChatModel(inner=llm)
+    return llm
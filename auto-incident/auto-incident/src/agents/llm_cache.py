@@ -0,0 +1,247 @@
+"""Content-addressed LLM response cache with TTL, LRU and size-based eviction."""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.config import get_settings
+from src.instrumentation import CACHE_HIT_INFO, record_llm_cache
+from src.state import SQLiteStateBackend, StateBackend, get_state_backend
+
+
+# Field names whose value is a time: ts, time, timestamp, date, epoch (with _prefix or _suffix),
+# *_at, or camelCase *Time, *Timestamp, *Ts, *At
+_TIME_KEY = r"(?:(?i:\b(?:\w+_)?(?:ts|time|timestamp|date|epoch)(?:_\w+)?)|\b\w+_at|\b[a-z]+(?:Time|Timestamp|Ts|At))"
+
+# Tokens that differ between otherwise identical incidents; replaced before hashing
+_VOLATILE_PATTERNS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"((?:trace|span|request|correlation)_?id\W{1,6})[\w-]+", re.IGNORECASE), r"\1<id>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b"), "<hex>"),
+    # Unix seconds or milliseconds, only as the value of a time field: byte counts and IDs stay
+    (re.compile(rf"""({_TIME_KEY}["']?\s*[:=]\s*["']?)\d{{10}}(?:\d{{3}})?(?:\.\d+)?\b"""), r"\1<epoch>"),
+]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Strip timestamps, UUIDs, trace IDs and similar volatile tokens from a prompt."""
+    for pattern, replacement in _VOLATILE_PATTERNS:
+        prompt = pattern.sub(replacement, prompt)
+    return prompt
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Key = hash of the model configuration (provider, model, params) + normalized prompt."""
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode())
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode())
+    return digest.hexdigest()
+
+
+def _serialize(generations: RETURN_VAL_TYPE) -> str:
+    return json.dumps(
+        [
+            {"message": message_to_dict(g.message), "info": g.generation_info}
+            if isinstance(g, ChatGeneration)
+            else {"text": g.text, "info": g.generation_info}
+            for g in generations
+        ]
+    )
+
+
+def _deserialize(value: str) -> RETURN_VAL_TYPE:
+    generations = []
+    for item in json.loads(value):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item["info"]))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item["info"]))
+    return generations
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache for chat model responses.
+
+    Entries live in an in-memory LRU bounded by `max_entries` and `max_bytes`
+    and expire after `ttl_seconds`. With a shared `backend` (or `sqlite_path`, a
+    SQLite backend of its own), entries are also written there so they are shared
+    by every worker and survive restarts; memory misses fall through to it. Every
+    `trim_interval` seconds a write also purges expired entries from the shared tier
+    and trims it to `shared_max_entries` and `shared_max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        sqlite_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        backend: Optional[StateBackend] = None,
+        shared_max_entries: Optional[int] = None,
+        shared_max_bytes: Optional[int] = None,
+        trim_interval: float = 300.0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (generations, serialized size, created_at)
+        self._entries: OrderedDict[str, tuple[RETURN_VAL_TYPE, int, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._shared = backend or (SQLiteStateBackend(sqlite_path) if sqlite_path else None)
+        self.shared_max_entries = shared_max_entries
+        self.shared_max_bytes = shared_max_bytes
+        self.trim_interval = trim_interval
+        self._trimmed_at = float("-inf")
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            value = self._get(key)
+        if value is None and self._shared is not None:
+            value = self._load(key, self._shared.get(f"llm:{key}"))
+        return self._count(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key, row = self._store(prompt, llm_string, return_val)
+        if self._shared is not None:
+            self._shared.set(f"llm:{key}", row, ttl=self.ttl_seconds)
+            if self._trim_due():
+                self._shared.trim_prefix("llm:", self.shared_max_entries, self.shared_max_bytes)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        # Memory hits stay on the loop; only the shared-backend read is offloaded
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            value = self._get(key)
+        if value is None and self._shared is not None:
+            value = self._load(key, await self._shared.aget(f"llm:{key}"))
+        return self._count(value)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key, row = self._store(prompt, llm_string, return_val)
+        if self._shared is not None:
+            await self._shared.aset(f"llm:{key}", row, ttl=self.ttl_seconds)
+            if self._trim_due():
+                await self._shared.atrim_prefix("llm:", self.shared_max_entries, self.shared_max_bytes)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._shared is not None:
+            self._shared.delete_prefix("llm:")
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _trim_due(self) -> bool:
+        """True for one caller per `trim_interval`."""
+        now = self.clock()
+        with self._lock:
+            if now - self._trimmed_at < self.trim_interval:
+                return False
+            self._trimmed_at = now
+            return True
+
+    def _get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, created_at = entry
+        if self.clock() - created_at < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            return value
+        self._drop(key)
+        return None
+
+    def _load(self, key: str, row: Optional[str]) -> Optional[RETURN_VAL_TYPE]:
+        """Promote a shared-backend row into memory, unless it is missing or expired."""
+        if row is None:
+            return None
+        created_at, value = json.loads(row)
+        if self.clock() - created_at >= self.ttl_seconds:
+            return None
+        generations = _deserialize(value)
+        with self._lock:
+            self._put(key, generations, len(value), created_at)
+        return generations
+
+    def _store(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> tuple[str, str]:
+        key = cache_key(prompt, llm_string)
+        value = _serialize(return_val)
+        now = self.clock()
+        with self._lock:
+            self._put(key, list(return_val), len(value), now)
+        return key, json.dumps([now, value])
+
+    def _count(self, value: Optional[RETURN_VAL_TYPE]) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_llm_cache(hit=value is not None)
+        if value is None:
+            return None
+        # Marked copies, so the instrumentation handler doesn't count the hit as an LLM call
+        return [
+            g.model_copy(update={"generation_info": {**(g.generation_info or {}), CACHE_HIT_INFO: True}}) for g in value
+        ]
+
+    def _put(self, key: str, generations: RETURN_VAL_TYPE, size: int, created_at: float) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (generations, size, created_at)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+@lru_cache
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide response cache shared by every LLM client, or None when disabled."""
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+    return LLMResponseCache(
+        max_entries=settings.llm_cache_max_entries,
+        max_bytes=settings.llm_cache_max_bytes,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        sqlite_path=settings.llm_cache_sqlite_path or None,
+        shared_max_entries=settings.llm_cache_shared_max_entries,
+        shared_max_bytes=settings.llm_cache_shared_max_bytes,
+        trim_interval=settings.llm_cache_trim_interval_seconds,
+        # Shared with the other workers when they share state
+        backend=get_state_backend() if settings.state_backend != "memory" and not settings.llm_cache_sqlite_path else None,
+    )
@@ -0,0 +1,520 @@
+"""
+Rate-limit-aware scheduler that every LLM call goes through.
+
+Each provider gets a `ProviderLimiter` enforcing a concurrent-request limit and,
+optionally, a tokens-per-minute budget (a token bucket charged with an estimate
+up front and corrected with the reported usage afterwards). Waiting requests are
+granted strictly by priority lane, then arrival order; the lane comes from the
+incident being investigated (see `llm_priority`). Rate-limited and transient
+failures are retried with jittered exponential backoff, honouring Retry-After,
+and a 429 pauses the whole provider so queued requests don't pile onto it.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+
+from src.alert_layer.priority import DEFAULT_PRIORITY, PRIORITY_LANES
+from src.config import get_settings
+from src.instrumentation import record_llm_queue_wait
+from src.instrumentation.metrics import LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_RETRIES
+
+# Completion tokens assumed when charging a request against the TPM budget
+OUTPUT_TOKEN_ESTIMATE = 256
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+# Waiters re-check at least this often, so pauses and refills are noticed without a release
+_MAX_WAIT = 1.0
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=DEFAULT_PRIORITY)
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """LLM calls made inside the block (including from threads that copy the context) use this lane."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    return sum(len(str(m.content)) for m in messages) // 4 + OUTPUT_TOKEN_ESTIMATE
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "enqueued", "granted", "cancelled", "_event", "_future", "_loop")
+
+    def __init__(self, priority: int, tokens: int, enqueued: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = enqueued
+        self.granted = False
+        self.cancelled = False
+        self._loop = loop
+        self._event = threading.Event() if loop is None else None
+        self._future = loop.create_future() if loop is not None else None
+
+    def wake(self) -> None:
+        if self._event is not None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(_resolve, self._future)
+
+    def wait(self, timeout: Optional[float]) -> None:
+        self._event.wait(timeout)
+
+    async def await_(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Lease:
+    """A granted provider slot; release it exactly once, with the actual token usage if known."""
+
+    def __init__(self, limiter: "ProviderLimiter", tokens: int, waited: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.waited = waited
+        self._released = False
+
+    def release(self, used_tokens: Optional[int] = None) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter._release(self.tokens, used_tokens)
+
+
+class ProviderLimiter:
+    """Concurrency and tokens-per-minute limits for one provider, with a priority queue of waiters."""
+
+    def __init__(
+        self,
+        provider: str,
+        max_concurrency: int,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._depth = [0] * len(PRIORITY_LANES)
+        self._active = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled = clock()
+        self._paused_until = 0.0
+
+    # --- acquire / release ---
+
+    def acquire(self, priority: int = DEFAULT_PRIORITY, tokens: int = 0) -> Lease:
+        """Block the calling thread until a slot (and token budget) is granted."""
+        waiter = _Waiter(self._lane(priority), self._charge(tokens), self._clock())
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                waiter.wait(_bounded(delay))
+                with self._lock:
+                    delay = self._dispatch()
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return self._lease(waiter)
+
+    async def aacquire(self, priority: int = DEFAULT_PRIORITY, tokens: int = 0) -> Lease:
+        """Async `acquire`; waiting does not block the event loop, and cancellation leaves the queue."""
+        waiter = _Waiter(self._lane(priority), self._charge(tokens), self._clock(), loop=asyncio.get_running_loop())
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                await waiter.await_(_bounded(delay))
+                with self._lock:
+                    delay = self._dispatch()
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return self._lease(waiter)
+
+    def pause(self, seconds: float) -> None:
+        """Grant nothing for `seconds` (e.g. the provider answered 429 with Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            self._refill(self._clock())
+            return {
+                "max_concurrency": self.max_concurrency,
+                "tokens_per_minute": self.tokens_per_minute,
+                "in_flight": self._active,
+                "queued": dict(zip(PRIORITY_LANES, self._depth)),
+                "available_tokens": round(self._tokens) if self.tokens_per_minute else None,
+                "paused_for_seconds": round(max(0.0, self._paused_until - self._clock()), 3),
+            }
+
+    def _enqueue(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            heapq.heappush(self._waiters, (waiter.priority, next(self._seq), waiter))
+            self._set_depth(waiter.priority, +1)
+            return self._dispatch()
+
+    def _lease(self, waiter: _Waiter) -> Lease:
+        waited = self._clock() - waiter.enqueued
+        record_llm_queue_wait(self.provider, PRIORITY_LANES[waiter.priority], waited)
+        return Lease(self, waiter.tokens, waited)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                self._release_locked(waiter.tokens, None)
+            elif not waiter.cancelled:
+                waiter.cancelled = True
+                self._set_depth(waiter.priority, -1)
+            self._dispatch()
+
+    def _release(self, tokens: int, used_tokens: Optional[int]) -> None:
+        with self._lock:
+            self._release_locked(tokens, used_tokens)
+            self._dispatch()
+
+    def _release_locked(self, tokens: int, used_tokens: Optional[int]) -> None:
+        self._active -= 1
+        LLM_IN_FLIGHT.dec(provider=self.provider)
+        if self.tokens_per_minute and used_tokens is not None:
+            # Settle the estimate against what the call actually used
+            self._tokens = max(-self.tokens_per_minute, self._tokens - (used_tokens - tokens))
+
+    # --- scheduling (lock held) ---
+
+    def _dispatch(self) -> Optional[float]:
+        """Grant head-of-queue waiters while limits allow; return seconds until the next grant is possible."""
+        now = self._clock()
+        self._refill(now)
+        while self._waiters:
+            waiter = self._waiters[0][2]
+            if waiter.cancelled:
+                heapq.heappop(self._waiters)
+                continue
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._active >= self.max_concurrency:
+                return None
+            if self.tokens_per_minute and self._tokens < waiter.tokens:
+                return (waiter.tokens - self._tokens) * 60.0 / self.tokens_per_minute
+            heapq.heappop(self._waiters)
+            self._active += 1
+            self._tokens -= waiter.tokens
+            waiter.granted = True
+            self._set_depth(waiter.priority, -1)
+            LLM_IN_FLIGHT.inc(provider=self.provider)
+            waiter.wake()
+        return None
+
+    def _refill(self, now: float) -> None:
+        if self.tokens_per_minute:
+            elapsed = now - self._refilled
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + elapsed * self.tokens_per_minute / 60.0)
+        self._refilled = now
+
+    def _set_depth(self, priority: int, delta: int) -> None:
+        self._depth[priority] += delta
+        LLM_QUEUE_DEPTH.set(self._depth[priority], provider=self.provider, lane=PRIORITY_LANES[priority])
+
+    def _charge(self, tokens: int) -> int:
+        # A request larger than the whole budget is charged the budget, so it can still run
+        return min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+
+    @staticmethod
+    def _lane(priority: int) -> int:
+        return min(max(priority, 0), len(PRIORITY_LANES) - 1)
+
+
+def _bounded(delay: Optional[float]) -> float:
+    return _MAX_WAIT if delay is None else min(max(delay, 0.0), _MAX_WAIT)
+
+
+class LLMScheduler:
+    """One `ProviderLimiter` per provider, created on first use from the configured limits."""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[dict[str, int]] = None,
+        tokens_per_minute: Optional[dict[str, int]] = None,
+        default_concurrency: int = 8,
+    ):
+        self.max_concurrency = max_concurrency or {}
+        self.tokens_per_minute = tokens_per_minute or {}
+        self.default_concurrency = default_concurrency
+        self._limiters: dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                limiter = self._limiters[provider] = ProviderLimiter(
+                    provider,
+                    self.max_concurrency.get(provider, self.default_concurrency),
+                    self.tokens_per_minute.get(provider, 0),
+                )
+            return limiter
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {provider: limiter.stats() for provider, limiter in limiters.items()}
+
+
+@lru_cache(maxsize=1)
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler built from settings."""
+    settings = get_settings()
+    return LLMScheduler(
+        max_concurrency=settings.llm_max_concurrency,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        default_concurrency=settings.llm_default_concurrency,
+    )
+
+
+# --- retries ---
+
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, overload and transient transport failures, across the provider SDKs."""
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError)) or type(error).__name__ in (
+        "APIConnectionError",
+        "APITimeoutError",
+    )
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from the error's Retry-After (or retry-after-ms) header, if the provider sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ScheduledChatModel(BaseChatModel):
+    """
+    Wraps a provider chat model so every call waits for a scheduler slot and is
+    retried on rate limits. Callbacks, caching and tracing metadata behave as if
+    the wrapped model were called directly.
+    """
+
+    inner: BaseChatModel
+    provider: str
+    scheduler: LLMScheduler
+    max_retries: int = 4
+    retry_backoff: float = 1.0
+    retry_max_backoff: float = 60.0
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _get_ls_params(self, stop: Optional[list[str]] = None, **kwargs: Any):
+        return self.inner._get_ls_params(stop=stop, **kwargs)
+
+    def _get_llm_string(self, stop: Optional[list[str]] = None, **kwargs: Any) -> str:
+        # Same cache keys as the unwrapped model
+        return self.inner._get_llm_string(stop=stop, **kwargs)
+
+    def bind_tools(self, tools, **kwargs: Any) -> Runnable:
+        """Tools are formatted by the wrapped model; the resulting call kwargs are passed through to it."""
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    # --- calls ---
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        limiter = self.scheduler.limiter(self.provider)
+        for attempt in itertools.count():
+            lease = limiter.acquire(current_priority(), estimate_tokens(messages))
+            try:
+                result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                lease.release()
+                delay = self._backoff(e, attempt, limiter)
+            except BaseException:
+                lease.release()
+                raise
+            else:
+                lease.release(_result_tokens(result))
+                return result
+            time.sleep(delay)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        limiter = self.scheduler.limiter(self.provider)
+        for attempt in itertools.count():
+            lease = await limiter.aacquire(current_priority(), estimate_tokens(messages))
+            try:
+                result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                lease.release()
+                delay = self._backoff(e, attempt, limiter)
+            except BaseException:
+                lease.release()
+                raise
+            else:
+                lease.release(_result_tokens(result))
+                return result
+            await asyncio.sleep(delay)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        """Streams hold their slot until the last chunk; only failures before the first chunk are retried."""
+        if type(self.inner)._stream is BaseChatModel._stream:
+            yield _as_chunk(self._generate(messages, stop=stop, run_manager=run_manager, **kwargs))
+            return
+        limiter = self.scheduler.limiter(self.provider)
+        for attempt in itertools.count():
+            lease = limiter.acquire(current_priority(), estimate_tokens(messages))
+            chunks = self.inner._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            try:
+                first = next(chunks, None)
+                break
+            except Exception as e:
+                lease.release()
+                delay = self._backoff(e, attempt, limiter)
+            except BaseException:
+                lease.release()
+                raise
+            time.sleep(delay)
+        used = 0
+        try:
+            if first is not None:
+                used += _chunk_tokens(first)
+                yield first
+            for chunk in chunks:
+                used += _chunk_tokens(chunk)
+                yield chunk
+        finally:
+            lease.release(used or None)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if type(self.inner)._stream is BaseChatModel._stream and type(self.inner)._astream is BaseChatModel._astream:
+            yield _as_chunk(await self._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs))
+            return
+        limiter = self.scheduler.limiter(self.provider)
+        for attempt in itertools.count():
+            lease = await limiter.aacquire(current_priority(), estimate_tokens(messages))
+            chunks = self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs).__aiter__()
+            try:
+                first = await anext(chunks, None)
+                break
+            except Exception as e:
+                lease.release()
+                delay = self._backoff(e, attempt, limiter)
+            except BaseException:
+                lease.release()
+                raise
+            await asyncio.sleep(delay)
+        used = 0
+        try:
+            if first is not None:
+                used += _chunk_tokens(first)
+                yield first
+            async for chunk in chunks:
+                used += _chunk_tokens(chunk)
+                yield chunk
+        finally:
+            lease.release(used or None)
+
+    def _backoff(self, error: Exception, attempt: int, limiter: ProviderLimiter) -> float:
+        """Seconds to wait before retrying `error`; re-raises it when it is not retryable or retries ran out."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+        delay = random.uniform(0, min(self.retry_max_backoff, self.retry_backoff * 2**attempt))
+        wait = retry_after(error)
+        rate_limited = _status(error) == 429
+        if wait is not None:
+            delay = min(self.retry_max_backoff, wait) + random.uniform(0, self.retry_backoff)
+        if rate_limited:
+            limiter.pause(delay)
+        LLM_RETRIES.inc(provider=self.provider, reason="rate_limited" if rate_limited else "error")
+        return delay
+
+
+def _result_tokens(result: ChatResult) -> Optional[int]:
+    total = sum(_message_tokens(g.message) for g in result.generations)
+    if not total and result.llm_output:
+        usage = result.llm_output.get("token_usage") or result.llm_output.get("usage") or {}
+        total = usage.get("total_tokens") or (usage.get("input_tokens", 0) + usage.get("output_tokens", 0))
+    return total or None
+
+
+def _chunk_tokens(chunk: ChatGenerationChunk) -> int:
+    return _message_tokens(chunk.message)
+
+
+def _message_tokens(message: BaseMessage) -> int:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens") or usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+
+def _as_chunk(result: ChatResult) -> ChatGenerationChunk:
+    message = result.generations[0].message
+    return ChatGenerationChunk(
+        message=AIMessageChunk(
+            content=message.content,
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call.get("id"), "index": i}
+                for i, call in enumerate(getattr(message, "tool_calls", None) or [])
+            ],
+            usage_metadata=getattr(message, "usage_metadata", None),
+            response_metadata=message.response_metadata,
+        )
+    )
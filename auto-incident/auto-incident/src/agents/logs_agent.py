@@ -1,13 +1,18 @@
 """Logs Agent - forensic analyst for stack traces and error patterns."""
 from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
 
 from src.agents.llm import get_llm
-from src.integrations.logs_client import fetch_logs
+from src.integrations import afan_out, fan_out
+from src.integrations.logs_client import LokiClient, aiter_logs, get_logs_client, iter_logs
 from src.memory import IncidentMemory
+from src.memory.context import MAX_LOG_TEMPLATES, render_alert_header, render_log_templates
+from src.analysis import LogTemplateMiner, afilter_levels, filter_levels
 from src.alert_layer.schemas import AlertEvent
+from src.replay.cassette import active_cassette
 
 
 SYSTEM_PROMPT = """You are a Logs Agent (Forensic Analyst). Analyze application logs to identify:
@@ -19,35 +24,130 @@ Be concise. Output a structured finding: what you observed, what it suggests, an
 
 
 class LogsAgent:
-    """Parses logs, identifies errors and stack traces, extracts temporal correlations."""
+    """
+    Parses logs, identifies errors and stack traces, extracts temporal correlations.
+    Raw lines are mined into templates first, so the LLM sees tens of templates, not thousands of lines.
+    Lines are streamed from the backend and mined as they arrive; only the templates are kept,
+    and are cached per service and time bucket like the backend's other responses.
+    For a multi-service incident every service's logs are fetched concurrently and analyzed in one call.
+    """
 
     def __init__(self):
-        self.llm = get_llm()
+        self.llm = get_llm("logs")
         self.parser = StrOutputParser()
 
     def investigate(self, alert: AlertEvent, memory: IncidentMemory) -> None:
         """Fetch logs, analyze with LLM, write findings to memory."""
         end = datetime.utcnow()
         start = end - timedelta(minutes=15)
-        logs = fetch_logs(alert.service, start_time=start, end_time=end)
 
-        memory.add_evidence("logs", {"logs": logs})
+        def mine(service: str) -> LogTemplateMiner:
+            return _cached(
+                service,
+                start,
+                end,
+                lambda: LogTemplateMiner().consume(filter_levels(iter_logs(service, start_time=start, end_time=end))),
+            )
 
-        prompt = f"""Alert: {alert.trigger_type} on service {alert.service}
+        services = memory.services(alert)
+        summaries = self._summarize(memory, start, end, services, fan_out(mine, services))
+
+        chain = self.llm | self.parser
+        response = chain.invoke(self._messages(alert, memory, summaries))
+
+        self._record(memory, response)
+
+    async def ainvestigate(self, alert: AlertEvent, memory: IncidentMemory) -> None:
+        """Async variant of `investigate` using `ainvoke`."""
+        end = datetime.utcnow()
+        start = end - timedelta(minutes=15)
+
+        async def mine(service: str) -> LogTemplateMiner:
+            async def stream() -> LogTemplateMiner:
+                return await LogTemplateMiner().aconsume(
+                    afilter_levels(aiter_logs(service, start_time=start, end_time=end))
+                )
+
+            return await _acached(service, start, end, stream)
+
+        services = memory.services(alert)
+        summaries = self._summarize(memory, start, end, services, await afan_out(mine, services))
+
+        chain = self.llm | self.parser
+        response = await chain.ainvoke(self._messages(alert, memory, summaries))
+
+        self._record(memory, response)
+
+    def _summarize(
+        self, memory: IncidentMemory, start: datetime, end: datetime, services: list[str], miners: list[LogTemplateMiner]
+    ) -> list[tuple[str, list, int]]:
+        """(service, templates, total lines) per service, each recorded as evidence."""
+        summaries = []
+        multi_service = len(miners) > 1
+        for service, miner in zip(services, miners):
+            templates = miner.summary(MAX_LOG_TEMPLATES)
+            evidence = self._evidence(service, start, end, templates, miner.total)
+            memory.add_evidence("logs", {**evidence, "service": service} if multi_service else evidence)
+            summaries.append((service, templates, miner.total))
+        return summaries
+
+    def _evidence(self, service: str, start: datetime, end: datetime, templates: list, total: int) -> dict:
+        """Template summary plus a reference to the queried window; raw lines are never kept."""
+        return {
+            "templates": templates,
+            "total_lines": total,
+            "source": {
+                "backend": "loki" if get_logs_client() is not None else "mock",
+                "service": service,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+            },
+        }
+
+    def _messages(self, alert: AlertEvent, memory: IncidentMemory, summaries: list[tuple[str, list, int]]) -> list:
+        if len(summaries) == 1:
+            _, templates, total = summaries[0]
+            logs = render_log_templates(templates, total)
+        else:
+            logs = "\n\n".join(
+                f"### {service}\n{render_log_templates(templates, total)}" for service, templates, total in summaries
+            )
+        prompt = f"""{render_alert_header(alert, memory.related_alerts)}
 Time range: last 15 minutes
 
-Logs data:
+Log templates (mined from raw lines, most frequent first):
 {logs}
 
 Analyze these logs. Identify error patterns, stack traces, and temporal correlations. What does this suggest about the root cause?"""
+        return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
 
-        chain = self.llm | self.parser
-        response = chain.invoke(
-            [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
-        )
-
+    def _record(self, memory: IncidentMemory, response: str) -> None:
         memory.add_finding(
             agent="logs",
             content=response,
             confidence=0.85,
         )
+
+
+def _cache_client() -> Optional[LokiClient]:
+    """Client whose cache holds mined templates; none for mock data or while a cassette needs the raw stream."""
+    return None if active_cassette() is not None else get_logs_client()
+
+
+def _cached(
+    service: str, start: datetime, end: datetime, mine: Callable[[], LogTemplateMiner]
+) -> LogTemplateMiner:
+    """Mined templates for the window, shared by concurrent and repeated investigations."""
+    client = _cache_client()
+    if client is None:
+        return mine()
+    return client.cached(("log_templates", service, client.bucket(start), client.bucket(end)), mine)
+
+
+async def _acached(
+    service: str, start: datetime, end: datetime, mine: Callable[[], Awaitable[LogTemplateMiner]]
+) -> LogTemplateMiner:
+    client = _cache_client()
+    if client is None:
+        return await mine()
+    return await client.acached(("log_templates", service, client.bucket(start), client.bucket(end)), mine)
@@ -1,12 +1,18 @@
 """Metrics Agent - telemetry analyst for CPU, p99, error rates."""
 from datetime import datetime, timedelta
+from typing import Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
 
 from src.agents.llm import get_llm
-from src.integrations.metrics_client import fetch_metrics
+from src.analysis.anomaly import detect_anomalies
+from src.analysis.schemas import AnomalyReport
+from src.config import get_settings
+from src.integrations import afan_out, fan_out
+from src.integrations.metrics_client import afetch_metrics, fetch_metrics
 from src.memory import IncidentMemory
+from src.memory.context import render_alert_header, render_metric_values
 from src.alert_layer.schemas import AlertEvent
 
 
@@ -18,36 +24,142 @@ SYSTEM_PROMPT = """You are a Metrics Agent (Telemetry Analyst). Analyze system m
 Be concise. Output a structured finding: what you observed, what it suggests, and your confidence (0-1)."""
 
 
+# Series that directly measure each trigger type
+PRIMARY_SERIES = {
+    "latency_spike": ("p99", "latency"),
+    "error_rate": ("error",),
+    "saturation": ("cpu", "memory", "pool", "saturation"),
+    "availability": ("error", "availability"),
+    "crashloop": ("restart", "memory"),
+    "traffic_anomaly": ("request_rate", "throughput"),
+}
+# Robust z / shift score above which an anomaly in the primary series is unambiguous
+CLEAR_CUT_SCORE = 6.0
+
+
 class MetricsAgent:
-    """Analyzes metrics, detects anomalies in CPU/p99/error rate."""
+    """
+    Analyzes metrics, detects anomalies in CPU/p99/error rate.
+    Anomalies are detected statistically first; the LLM only sees the detected anomalies,
+    and is skipped entirely when the primary series shows an unambiguous, corroborated anomaly.
+    For a multi-service incident every service's metrics are fetched concurrently and
+    interpreted together in one call; the LLM is not skipped, since the cross-service
+    picture is what the call is for.
+    """
 
     def __init__(self):
-        self.llm = get_llm()
+        self.llm = get_llm("metrics")
         self.parser = StrOutputParser()
 
     def investigate(self, alert: AlertEvent, memory: IncidentMemory) -> None:
         """Fetch metrics, analyze with LLM, write findings to memory."""
         end = datetime.utcnow()
         start = end - timedelta(minutes=15)
-        metrics = fetch_metrics(alert.service, start_time=start, end_time=end)
+        services = memory.services(alert)
+        fetched = fan_out(lambda service: fetch_metrics(service, start_time=start, end_time=end), services)
 
-        memory.add_evidence("metrics", metrics)
+        analyzed = self._analyze_all(memory, services, fetched)
+        if self._is_clear_cut(alert, analyzed):
+            self._record(memory, self._describe(alert, analyzed[0][2]), confidence=0.9)
+            return
 
-        prompt = f"""Alert: {alert.trigger_type} on service {alert.service}
-Time range: last 15 minutes
+        chain = self.llm | self.parser
+        response = chain.invoke(self._messages(alert, memory, analyzed))
+
+        self._record(memory, response)
 
-Metrics data:
-{metrics}
+    async def ainvestigate(self, alert: AlertEvent, memory: IncidentMemory) -> None:
+        """Async variant of `investigate` using `ainvoke`."""
+        end = datetime.utcnow()
+        start = end - timedelta(minutes=15)
+
+        async def fetch(service: str) -> dict:
+            return await afetch_metrics(service, start_time=start, end_time=end)
 
-Analyze these metrics. Identify anomalies in CPU, p99 latency, error rate. What does this suggest about the root cause?"""
+        services = memory.services(alert)
+        analyzed = self._analyze_all(memory, services, await afan_out(fetch, services))
+        if self._is_clear_cut(alert, analyzed):
+            self._record(memory, self._describe(alert, analyzed[0][2]), confidence=0.9)
+            return
 
         chain = self.llm | self.parser
-        response = chain.invoke(
-            [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
+        response = await chain.ainvoke(self._messages(alert, memory, analyzed))
+
+        self._record(memory, response)
+
+    def _analyze_all(
+        self, memory: IncidentMemory, services: list[str], fetched: list[dict]
+    ) -> list[tuple[str, dict, AnomalyReport]]:
+        """(service, metrics, anomaly report) per service, the primary alert's service first."""
+        multi_service = len(fetched) > 1
+        return [
+            (service, metrics, self._analyze(memory, metrics, service if multi_service else None))
+            for service, metrics in zip(services, fetched)
+        ]
+
+    def _analyze(self, memory: IncidentMemory, metrics: dict, service: Optional[str] = None) -> AnomalyReport:
+        tag = {"service": service} if service else {}
+        memory.add_evidence("metrics", {**metrics, **tag})
+        report = detect_anomalies(metrics.get("time_series", {}))
+        memory.add_evidence(
+            "metric_anomalies",
+            {"anomalies": [a.model_dump() for a in report.anomalies], "summary": report.render(), **tag},
+        )
+        return report
+
+    def _is_clear_cut(self, alert: AlertEvent, analyzed: list[tuple[str, dict, AnomalyReport]]) -> bool:
+        """
+        A strong spike/shift in the series the alert is about, corroborated by an anomaly
+        in another series or by a correlation that involves the primary series.
+        """
+        if not get_settings().metrics_skip_llm_when_clear or len(analyzed) != 1:
+            return False
+        report = analyzed[0][2]
+        keys = PRIMARY_SERIES.get(alert.trigger_type, ())
+        primary = [
+            a for a in report.anomalies
+            if a.kind != "correlation" and any(k in a.series for k in keys)
+        ]
+        if not primary:
+            return False
+        strongest = max(primary, key=lambda a: a.score)
+        if strongest.score < CLEAR_CUT_SCORE:
+            return False
+        return any(
+            strongest.series in (a.series, a.related_series) if a.kind == "correlation" else a.series != strongest.series
+            for a in report.anomalies
+        )
+
+    def _describe(self, alert: AlertEvent, report: AnomalyReport) -> str:
+        return (
+            f"Statistical analysis of {report.series_count} metric series for {alert.service} "
+            f"found an unambiguous anomaly consistent with the {alert.trigger_type} alert:\n{report.render()}"
         )
 
+    def _messages(
+        self, alert: AlertEvent, memory: IncidentMemory, analyzed: list[tuple[str, dict, AnomalyReport]]
+    ) -> list:
+        if len(analyzed) == 1:
+            _, metrics, report = analyzed[0]
+            values, anomalies = render_metric_values(metrics), report.render()
+        else:
+            values = "\n".join(f"{service}: {render_metric_values(metrics)}" for service, metrics, _ in analyzed)
+            anomalies = "\n\n".join(f"### {service}\n{report.render()}" for service, _, report in analyzed)
+        prompt = f"""{render_alert_header(alert, memory.related_alerts)}
+Time range: last 15 minutes
+
+Current values:
+{values}
+
+Detected anomalies (robust z-score, change-point and lagged correlation analysis):
+{anomalies}
+
+Interpret these anomalies in CPU, p99 latency, error rate. What does this suggest about the root cause?"""
+        return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
+
+    def _record(self, memory: IncidentMemory, response: str, confidence: float = 0.8) -> None:
         memory.add_finding(
             agent="metrics",
             content=response,
-            confidence=0.8,
+            confidence=confidence,
         )
@@ -1,5 +1,25 @@
 """Alert / Trigger layer - parses and normalizes incoming alerts."""
-from .trigger import parse_alert
+from .correlation import AlertCluster, cluster_alerts
+from .dedup import AlertDeduplicator, fingerprint
+from .priority import DEFAULT_PRIORITY, PRIORITY_LANES, alert_priority
+from .sources import ALERT_SOURCES, AlertSource, AlertSourceRegistry, classify
+from .trigger import parse_alert, parse_alerts
 from .schemas import AlertEvent, TriggerType
 
-__all__ = ["parse_alert", "AlertEvent", "TriggerType"]
+__all__ = [
+    "parse_alert",
+    "parse_alerts",
+    "ALERT_SOURCES",
+    "AlertSource",
+    "AlertSourceRegistry",
+    "classify",
+    "AlertCluster",
+    "cluster_alerts",
+    "AlertDeduplicator",
+    "fingerprint",
+    "alert_priority",
+    "PRIORITY_LANES",
+    "DEFAULT_PRIORITY",
+    "AlertEvent",
+    "TriggerType",
+]
@@ -0,0 +1,73 @@
+"""Alert correlation - groups the alerts of one cascading failure into clusters."""
+from collections import deque
+from typing import Iterable, Mapping
+
+from pydantic import BaseModel, Field
+
+from .schemas import AlertEvent
+
+
+class AlertCluster(BaseModel):
+    """Alerts investigated together. `primary` drives the investigation; `related` add services."""
+
+    primary: AlertEvent
+    related: list[AlertEvent] = Field(default_factory=list)
+
+    @property
+    def alerts(self) -> list[AlertEvent]:
+        return [self.primary, *self.related]
+
+    @property
+    def services(self) -> list[str]:
+        return list(dict.fromkeys(a.service for a in self.alerts))
+
+
+def cluster_alerts(
+    alerts: Iterable[AlertEvent],
+    window_seconds: float = 120.0,
+    dependencies: Mapping[str, Iterable[str]] = {},
+) -> list[AlertCluster]:
+    """
+    Group alerts that fired within `window_seconds` of each other on the same service or
+    on services linked by `dependencies` (service -> services it calls, either direction
+    links). Links are transitive, so a chain gateway -> users -> db forms one cluster.
+
+    The primary alert is on the cluster's most downstream service (one that calls no
+    other service in the cluster), as the likeliest origin of the cascade; ties and
+    cycles go to the earliest alert. Clusters are returned in order of their first alert.
+    """
+    ordered = sorted(alerts, key=lambda a: a.timestamp)
+    links = {(caller, callee) for caller, callees in dependencies.items() for callee in callees}
+    parent = list(range(len(ordered)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Alerts are sorted, so only those still inside the window need comparing
+    recent: deque[int] = deque()
+    for i, alert in enumerate(ordered):
+        while recent and (alert.timestamp - ordered[recent[0]].timestamp).total_seconds() > window_seconds:
+            recent.popleft()
+        for j in recent:
+            other = ordered[j].service
+            if other == alert.service or (other, alert.service) in links or (alert.service, other) in links:
+                parent[find(i)] = find(j)
+        recent.append(i)
+
+    groups: dict[int, list[AlertEvent]] = {}
+    for i, alert in enumerate(ordered):
+        groups.setdefault(find(i), []).append(alert)
+    return [_cluster(group, links) for group in groups.values()]
+
+
+def _cluster(alerts: list[AlertEvent], links: set[tuple[str, str]]) -> AlertCluster:
+    services = {a.service for a in alerts}
+    downstream = [
+        a for a in alerts
+        if not any((a.service, other) in links for other in services if other != a.service)
+    ]
+    primary = (downstream or alerts)[0]
+    return AlertCluster(primary=primary, related=[a for a in alerts if a is not primary])
@@ -0,0 +1,120 @@
+"""Alert-storm deduplication - coalesces repeated alerts onto one incident."""
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Union
+
+from src.state import StateBackend
+from .schemas import AlertEvent
+
+
+def fingerprint(alert: AlertEvent) -> str:
+    """Stable fingerprint of the firing condition: service + trigger type + labels."""
+    labels = ",".join(f"{k}={v}" for k, v in sorted(alert.labels.items()))
+    key = f"{alert.service}|{alert.trigger_type}|{labels}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class AlertDeduplicator:
+    """
+    Maps alert fingerprints to the incident investigating them.
+
+    An alert is a duplicate if its fingerprint was first seen less than
+    `window_seconds` ago, or if the incident it maps to is still in flight
+    (as reported by `is_active`). Entries are pruned once both expire.
+
+    With a shared `backend`, fingerprints are kept there so every worker process
+    dedups against the same alerts; entries then expire after `max_age_seconds`
+    even if their incident is still in flight, and `clock` must be wall-clock time.
+    On the event loop use `acheck`/`arecord`, which also accept an async `is_active`.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        is_active: Optional[Callable[[str], Union[bool, Awaitable[bool]]]] = None,
+        clock: Optional[Callable[[], float]] = None,
+        backend: Optional[StateBackend] = None,
+        max_age_seconds: float = 86400.0,
+    ):
+        self.window_seconds = window_seconds
+        self.is_active = is_active or (lambda incident_id: False)
+        self.clock = clock or (time.time if backend is not None else time.monotonic)
+        self.backend = backend
+        self.max_age_seconds = max(max_age_seconds, window_seconds)
+        self._seen: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def check(self, alert: AlertEvent) -> Optional[str]:
+        """Return the incident ID this alert should be attached to, if any."""
+        if self.backend is not None:
+            value = self.backend.get(f"dedup:{fingerprint(alert)}")
+            entry = tuple(json.loads(value)) if value is not None else None
+        else:
+            self._prune()
+            entry = self._seen.get(fingerprint(alert))
+        if entry is None:
+            return None
+        incident_id, first_seen = entry
+        if self._live(incident_id, first_seen):
+            return incident_id
+        return None
+
+    def record(self, alert: AlertEvent, incident_id: str) -> None:
+        """Remember that `incident_id` is investigating this alert's fingerprint."""
+        key = fingerprint(alert)
+        if self.backend is not None:
+            self.backend.set(f"dedup:{key}", json.dumps([incident_id, self.clock()]), ttl=self.max_age_seconds)
+            return
+        self._seen.pop(key, None)
+        self._seen[key] = (incident_id, self.clock())
+
+    async def acheck(self, alert: AlertEvent) -> Optional[str]:
+        """Async `check`: backend reads run off the loop and `is_active` may be a coroutine."""
+        if self.backend is not None:
+            value = await self.backend.aget(f"dedup:{fingerprint(alert)}")
+            entry = tuple(json.loads(value)) if value is not None else None
+        else:
+            await self._aprune()
+            entry = self._seen.get(fingerprint(alert))
+        if entry is None:
+            return None
+        incident_id, first_seen = entry
+        if await self._alive(incident_id, first_seen):
+            return incident_id
+        return None
+
+    async def arecord(self, alert: AlertEvent, incident_id: str) -> None:
+        if self.backend is not None:
+            key = f"dedup:{fingerprint(alert)}"
+            await self.backend.aset(key, json.dumps([incident_id, self.clock()]), ttl=self.max_age_seconds)
+            return
+        self.record(alert, incident_id)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _live(self, incident_id: str, first_seen: float) -> bool:
+        return self.clock() - first_seen < self.window_seconds or self.is_active(incident_id)
+
+    async def _alive(self, incident_id: str, first_seen: float) -> bool:
+        if self.clock() - first_seen < self.window_seconds:
+            return True
+        active = self.is_active(incident_id)
+        return await active if inspect.isawaitable(active) else active
+
+    async def _aprune(self) -> None:
+        while self._seen:
+            key, (incident_id, first_seen) = next(iter(self._seen.items()))
+            if await self._alive(incident_id, first_seen):
+                break
+            del self._seen[key]
+
+    def _prune(self) -> None:
+        # Entries are ordered by first_seen, so stop at the first live one
+        while self._seen:
+            key, (incident_id, first_seen) = next(iter(self._seen.items()))
+            if self._live(incident_id, first_seen):
+                break
+            del self._seen[key]
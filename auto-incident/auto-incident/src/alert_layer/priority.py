@@ -0,0 +1,27 @@
+"""Incident priority derived from alert severity and environment labels."""
+from .schemas import AlertEvent
+
+# Lane names, most urgent first; a priority is an index into this tuple
+PRIORITY_LANES = ("critical", "high", "normal", "low")
+DEFAULT_PRIORITY = PRIORITY_LANES.index("normal")
+
+_SEVERITY_PRIORITY = {
+    **dict.fromkeys(("critical", "crit", "emergency", "page", "p0", "p1", "sev0", "sev1"), 0),
+    **dict.fromkeys(("high", "error", "major", "p2", "sev2"), 1),
+    **dict.fromkeys(("warning", "warn", "medium", "moderate", "p3", "sev3"), 2),
+    **dict.fromkeys(("low", "info", "minor", "none", "p4", "p5", "sev4", "sev5"), 3),
+}
+_NON_PRODUCTION = frozenset({"dev", "development", "test", "testing", "qa", "staging", "stage", "sandbox"})
+
+
+def alert_priority(alert: AlertEvent) -> int:
+    """
+    0 (critical) .. 3 (low), from the `severity` (or `priority`) label.
+    Alerts from a non-production `env`/`environment` drop one lane.
+    """
+    labels = {k.lower(): str(v).lower() for k, v in alert.labels.items()}
+    severity = labels.get("severity") or labels.get("priority") or ""
+    priority = _SEVERITY_PRIORITY.get(severity, DEFAULT_PRIORITY)
+    if (labels.get("env") or labels.get("environment")) in _NON_PRODUCTION:
+        priority = min(priority + 1, len(PRIORITY_LANES) - 1)
+    return priority
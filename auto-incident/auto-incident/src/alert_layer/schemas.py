@@ -5,7 +5,14 @@ from typing import Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
-TriggerType = Literal["latency_spike", "error_rate"]
+TriggerType = Literal[
+    "latency_spike",
+    "error_rate",
+    "saturation",
+    "availability",
+    "crashloop",
+    "traffic_anomaly",
+]
 
 
 class AlertEvent(BaseModel):
@@ -16,4 +23,5 @@ class AlertEvent(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     threshold: float
     value: Optional[float] = None
+    labels: dict[str, str] = Field(default_factory=dict)
     raw_payload: dict[str, Any] = Field(default_factory=dict)
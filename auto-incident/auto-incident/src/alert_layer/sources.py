@@ -0,0 +1,462 @@
+"""
+Alert source adapters - one pydantic payload model and mapping per monitoring tool.
+
+`ALERT_SOURCES` picks the adapter for a webhook from its headers or payload keys
+with dict lookups, and the adapter validates the payload once against its model.
+"""
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Annotated, Any, ClassVar, Iterable, Literal, Mapping, Optional, get_args
+
+from pydantic import BaseModel, BeforeValidator, Field
+
+from .schemas import AlertEvent, TriggerType
+
+TRIGGER_TYPES = frozenset(get_args(TriggerType))
+
+# Words of alert/metric names and the trigger type they point to
+_TRIGGER_WORDS: dict[str, TriggerType] = {
+    **dict.fromkeys(
+        ("crash", "crashing", "crashloop", "crashlooping", "crashloopbackoff", "restart", "restarts",
+         "restarting", "oom", "oomkilled", "backoff"),
+        "crashloop",
+    ),
+    **dict.fromkeys(
+        ("down", "unavailable", "unreachable", "availability", "uptime", "unhealthy", "healthy", "health",
+         "absent", "probe", "outage"),
+        "availability",
+    ),
+    **dict.fromkeys(("latency", "slow", "p95", "p99", "duration", "response", "timeout", "timeouts"), "latency_spike"),
+    **dict.fromkeys(
+        ("error", "errors", "5xx", "4xx", "failure", "failures", "failed", "exception", "exceptions", "fault"),
+        "error_rate",
+    ),
+    **dict.fromkeys(
+        ("cpu", "memory", "mem", "disk", "saturation", "saturated", "utilization", "throttling", "throttled",
+         "pool", "connections", "queue", "backlog", "exhausted", "exhaustion"),
+        "saturation",
+    ),
+    **dict.fromkeys(("traffic", "throughput", "qps", "rps"), "traffic_anomaly"),
+}
+# When a name has words of several types, the most specific one wins
+_TRIGGER_RANK = {
+    t: i for i, t in enumerate(
+        ("crashloop", "availability", "latency_spike", "error_rate", "saturation", "traffic_anomaly")
+    )
+}
+# CamelCase, snake_case, dotted and numeric words: HTTPCode_Target_5XX_Count -> HTTP Code Target 5XX Count
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+\d*|\d+[A-Za-z]*")
+
+
+def classify(*names: Optional[str], default: TriggerType = "error_rate") -> TriggerType:
+    """Trigger type named by the words of alert or metric names; `default` when none matches."""
+    best: Optional[TriggerType] = None
+    for name in names:
+        for word in _WORD.findall(name or ""):
+            found = _TRIGGER_WORDS.get(word.lower())
+            if found is not None and (best is None or _TRIGGER_RANK[found] < _TRIGGER_RANK[best]):
+                best = found
+    return best or default
+
+
+def _timestamp(value: Any) -> datetime:
+    """An ISO-8601 or epoch (seconds or milliseconds) timestamp as naive UTC; now when absent."""
+    if value in (None, ""):
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        ts = value
+    elif isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 1e11 else value
+        return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+    else:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _tag_list(value: Any) -> list[str]:
+    if isinstance(value, str):
+        return [t.strip() for t in value.split(",") if t.strip()]
+    return [str(t) for t in value or ()]
+
+
+Timestamp = Annotated[datetime, BeforeValidator(_timestamp)]
+Labels = dict[str, Annotated[str, BeforeValidator(str)]]
+# Numbers that arrive as strings in annotations/templates; unparseable ones become None
+LenientFloat = Annotated[Optional[float], BeforeValidator(_float_or_none)]
+
+
+class AlertSource(ABC):
+    """
+    Maps one tool's webhook payload to AlertEvents. Subclasses set `name`, the payload
+    `model`, and what identifies the tool: `user_agents` (product tokens of the User-Agent
+    header), `headers` only it sends, and top-level payload `keys` only it sends.
+    """
+
+    name: ClassVar[str]
+    model: ClassVar[type[BaseModel]]
+    user_agents: ClassVar[tuple[str, ...]] = ()
+    headers: ClassVar[tuple[str, ...]] = ()
+    keys: ClassVar[tuple[str, ...]] = ()
+
+    def parse(self, payload: dict) -> list[AlertEvent]:
+        return self.to_alerts(self.model.model_validate(payload), payload)
+
+    @abstractmethod
+    def to_alerts(self, parsed: Any, payload: dict) -> list[AlertEvent]:
+        """AlertEvents for a payload already validated against `model`."""
+
+
+# --- Generic JSON -----------------------------------------------------------
+
+class GenericPayload(BaseModel):
+    trigger_type: str = "error_rate"
+    service: str = "unknown"
+    timestamp: Timestamp = Field(default_factory=datetime.utcnow)
+    threshold: float = 0.0
+    value: Optional[float] = None
+    labels: Labels = Field(default_factory=dict)
+
+
+class GenericSource(AlertSource):
+    """`{"trigger_type", "service", "threshold", "value", "labels", "timestamp"}`; unknown trigger types are classified by name."""
+
+    name = "generic"
+    model = GenericPayload
+
+    def to_alerts(self, parsed: GenericPayload, payload: dict) -> list[AlertEvent]:
+        trigger = parsed.trigger_type if parsed.trigger_type in TRIGGER_TYPES else classify(parsed.trigger_type)
+        return [
+            AlertEvent(
+                trigger_type=trigger,
+                service=parsed.service,
+                timestamp=parsed.timestamp,
+                threshold=parsed.threshold,
+                value=parsed.value,
+                labels=parsed.labels,
+                raw_payload=payload,
+            )
+        ]
+
+
+# --- Prometheus Alertmanager / Grafana --------------------------------------
+
+class _Annotations(BaseModel):
+    threshold: LenientFloat = None
+    value: LenientFloat = None
+
+
+class AlertmanagerAlert(BaseModel):
+    status: str = "firing"
+    labels: Labels = Field(default_factory=dict)
+    annotations: _Annotations = Field(default_factory=_Annotations)
+    startsAt: Optional[Timestamp] = None
+
+
+class AlertmanagerPayload(BaseModel):
+    alerts: list[AlertmanagerAlert] = Field(min_length=1)
+    commonLabels: Labels = Field(default_factory=dict)
+    groupKey: str = ""
+
+
+class AlertmanagerSource(AlertSource):
+    """
+    Alertmanager webhook (version 4); a grouped notification yields one event per firing
+    alert. Resolved alerts yield none.
+    """
+
+    name = "alertmanager"
+    model = AlertmanagerPayload
+    user_agents = ("alertmanager",)
+    keys = ("groupKey", "alerts")
+
+    def to_alerts(self, parsed: AlertmanagerPayload, payload: dict) -> list[AlertEvent]:
+        # Each event keeps the group metadata and its own alert, not the whole group
+        group = {k: v for k, v in payload.items() if k != "alerts"}
+        return [
+            self._event(alert, parsed.commonLabels, {**group, "alerts": [raw]})
+            for alert, raw in zip(parsed.alerts, payload["alerts"])
+            if alert.status != "resolved"
+        ]
+
+    def _event(self, alert: AlertmanagerAlert, common_labels: dict[str, str], payload: dict) -> AlertEvent:
+        labels = {**common_labels, **alert.labels}
+        return AlertEvent(
+            trigger_type=classify(labels.get("alertname")),
+            service=labels.get("service", labels.get("job", "unknown")),
+            timestamp=alert.startsAt or datetime.utcnow(),
+            threshold=alert.annotations.threshold or 0.0,
+            value=self._value(alert),
+            labels=labels,
+            raw_payload=payload,
+        )
+
+    def _value(self, alert: AlertmanagerAlert) -> Optional[float]:
+        return alert.annotations.value
+
+
+class GrafanaAlert(AlertmanagerAlert):
+    values: dict[str, LenientFloat] = Field(default_factory=dict)
+
+
+class GrafanaPayload(AlertmanagerPayload):
+    alerts: list[GrafanaAlert] = Field(min_length=1)
+    orgId: int = 0
+
+
+class GrafanaSource(AlertmanagerSource):
+    """Grafana unified alerting webhook: Alertmanager's shape plus the evaluated query `values`."""
+
+    name = "grafana"
+    model = GrafanaPayload
+    user_agents = ("grafana",)
+    keys = ("orgId",)
+
+    def _value(self, alert: GrafanaAlert) -> Optional[float]:
+        if alert.annotations.value is not None:
+            return alert.annotations.value
+        return next((v for v in alert.values.values() if v is not None), None)
+
+
+# --- Datadog ----------------------------------------------------------------
+
+class DatadogPayload(BaseModel):
+    title: str = ""
+    alert_metric: str = ""
+    alert_type: str = ""
+    alert_transition: str = ""
+    priority: str = ""
+    hostname: str = ""
+    tags: Annotated[list[str], BeforeValidator(_tag_list)] = Field(default_factory=list)
+    date: Timestamp = Field(default_factory=datetime.utcnow)
+    threshold: LenientFloat = None
+    value: LenientFloat = None
+
+
+class DatadogSource(AlertSource):
+    """Datadog monitor webhook using the default template variables; `service:` comes from the tags."""
+
+    name = "datadog"
+    model = DatadogPayload
+    user_agents = ("datadog",)
+    keys = ("alert_transition", "alert_metric", "aggreg_key")
+
+    def to_alerts(self, parsed: DatadogPayload, payload: dict) -> list[AlertEvent]:
+        labels = dict(tag.split(":", 1) if ":" in tag else (tag, "") for tag in parsed.tags)
+        labels["alertname"] = parsed.title
+        if parsed.priority or parsed.alert_type:
+            labels["severity"] = parsed.priority or parsed.alert_type
+        return [
+            AlertEvent(
+                trigger_type=classify(parsed.alert_metric, parsed.title),
+                service=labels.get("service") or parsed.hostname or "unknown",
+                timestamp=parsed.date,
+                threshold=parsed.threshold or 0.0,
+                value=parsed.value,
+                labels=labels,
+                raw_payload=payload,
+            )
+        ]
+
+
+# --- PagerDuty --------------------------------------------------------------
+
+class _PagerDutyReference(BaseModel):
+    id: str = ""
+    summary: str = ""
+
+
+class PagerDutyIncident(BaseModel):
+    id: str = ""
+    title: str = ""
+    urgency: str = ""
+    service: Optional[_PagerDutyReference] = None
+    priority: Optional[_PagerDutyReference] = None
+
+
+class PagerDutyEvent(BaseModel):
+    event_type: str
+    occurred_at: Timestamp = Field(default_factory=datetime.utcnow)
+    data: PagerDutyIncident
+
+
+class PagerDutyPayload(BaseModel):
+    event: PagerDutyEvent
+
+
+class PagerDutySource(AlertSource):
+    """PagerDuty V3 incident webhook; the severity label is the incident priority, else its urgency."""
+
+    name = "pagerduty"
+    model = PagerDutyPayload
+    user_agents = ("pagerduty-webhook",)
+    headers = ("x-pagerduty-signature",)
+    keys = ("event",)
+
+    def to_alerts(self, parsed: PagerDutyPayload, payload: dict) -> list[AlertEvent]:
+        incident = parsed.event.data
+        severity = incident.priority.summary if incident.priority else incident.urgency
+        labels = {"alertname": incident.title, "pagerduty_incident": incident.id}
+        if severity:
+            labels["severity"] = severity
+        return [
+            AlertEvent(
+                trigger_type=classify(incident.title),
+                service=incident.service.summary if incident.service else "unknown",
+                timestamp=parsed.event.occurred_at,
+                threshold=0.0,
+                labels=labels,
+                raw_payload=payload,
+            )
+        ]
+
+
+# --- AWS CloudWatch via SNS -------------------------------------------------
+
+class _Dimension(BaseModel):
+    name: str
+    value: str
+
+
+class _CloudWatchTrigger(BaseModel):
+    MetricName: str = ""
+    Namespace: str = ""
+    Threshold: LenientFloat = None
+    Dimensions: list[_Dimension] = Field(default_factory=list)
+
+
+class CloudWatchAlarm(BaseModel):
+    AlarmName: str
+    NewStateValue: str = "ALARM"
+    NewStateReason: str = ""
+    StateChangeTime: Timestamp = Field(default_factory=datetime.utcnow)
+    Region: str = ""
+    Trigger: _CloudWatchTrigger = Field(default_factory=_CloudWatchTrigger)
+
+
+class SNSNotification(BaseModel):
+    Type: Literal["Notification"]
+    TopicArn: str = ""
+    Message: str
+
+
+# Dimensions naming the service an alarm is about, most specific first
+_SERVICE_DIMENSIONS = (
+    "ServiceName", "FunctionName", "DBInstanceIdentifier", "TargetGroup", "LoadBalancer",
+    "QueueName", "AutoScalingGroupName", "ClusterName",
+)
+# The first datapoint in NewStateReason: "... 1 datapoint [2.5 (18/10/26 12:00:00)] was greater ..."
+_DATAPOINT = re.compile(r"\[(-?[\d.]+(?:[eE][-+]?\d+)?) \(")
+
+
+class CloudWatchSource(AlertSource):
+    """CloudWatch alarm delivered by SNS (the alarm JSON is in `Message`), or the bare alarm JSON."""
+
+    name = "cloudwatch"
+    model = CloudWatchAlarm
+    headers = ("x-amz-sns-message-type",)
+    keys = ("TopicArn", "AlarmName")
+
+    def parse(self, payload: dict) -> list[AlertEvent]:
+        if "Message" in payload:
+            alarm = CloudWatchAlarm.model_validate_json(SNSNotification.model_validate(payload).Message)
+        else:
+            alarm = CloudWatchAlarm.model_validate(payload)
+        return self.to_alerts(alarm, payload)
+
+    def to_alerts(self, alarm: CloudWatchAlarm, payload: dict) -> list[AlertEvent]:
+        trigger = alarm.Trigger
+        dimensions = {d.name: d.value for d in trigger.Dimensions}
+        service = next((dimensions[d] for d in _SERVICE_DIMENSIONS if d in dimensions), alarm.AlarmName)
+        datapoint = _DATAPOINT.search(alarm.NewStateReason)
+        labels = {"alertname": alarm.AlarmName, "namespace": trigger.Namespace, "region": alarm.Region, **dimensions}
+        return [
+            AlertEvent(
+                trigger_type=classify(trigger.MetricName, alarm.AlarmName),
+                service=service,
+                timestamp=alarm.StateChangeTime,
+                threshold=trigger.Threshold or 0.0,
+                value=float(datapoint.group(1)) if datapoint else None,
+                labels={k: v for k, v in labels.items() if v},
+                raw_payload=payload,
+            )
+        ]
+
+
+# --- Registry ---------------------------------------------------------------
+
+class AlertSourceRegistry:
+    """
+    Selects the adapter for a webhook with dict lookups, in this order: an explicit
+    `X-Alert-Source: <name>` header, a header or User-Agent product only one tool sends,
+    then a top-level payload key only one tool sends (on a tie, the source registered
+    first wins). Anything else is parsed by `fallback`.
+    """
+
+    def __init__(self, sources: Iterable[AlertSource] = (), fallback: Optional[AlertSource] = None):
+        self.fallback = fallback or GenericSource()
+        self._by_name: dict[str, AlertSource] = {self.fallback.name: self.fallback}
+        self._by_header: dict[str, AlertSource] = {}
+        self._by_user_agent: dict[str, AlertSource] = {}
+        self._by_key: dict[str, tuple[int, AlertSource]] = {}
+        for source in sources:
+            self.register(source)
+
+    def register(self, source: AlertSource) -> AlertSource:
+        rank = len(self._by_name)
+        self._by_name[source.name] = source
+        for header in source.headers:
+            self._by_header.setdefault(header.lower(), source)
+        for agent in source.user_agents:
+            self._by_user_agent.setdefault(agent.lower(), source)
+        for key in source.keys:
+            self._by_key.setdefault(key, (rank, source))
+        return source
+
+    def get(self, name: str) -> AlertSource:
+        return self._by_name[name]
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._by_name)
+
+    def select(self, payload: Mapping[str, Any], headers: Optional[Mapping[str, str]] = None) -> AlertSource:
+        if headers:
+            source = self._from_headers({k.lower(): v for k, v in headers.items()})
+            if source is not None:
+                return source
+        best: Optional[tuple[int, AlertSource]] = None
+        for key in payload:
+            hit = self._by_key.get(key)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        return best[1] if best else self.fallback
+
+    def _from_headers(self, headers: dict[str, str]) -> Optional[AlertSource]:
+        explicit = headers.get("x-alert-source")
+        if explicit:
+            try:
+                return self._by_name[explicit.strip().lower()]
+            except KeyError:
+                raise ValueError(f"Unknown alert source {explicit!r}; expected one of {self.names}") from None
+        for header, source in self._by_header.items():
+            if header in headers:
+                return source
+        product = headers.get("user-agent", "").split("/", 1)[0].strip().lower()
+        return self._by_user_agent.get(product)
+
+    def parse(self, payload: dict, headers: Optional[Mapping[str, str]] = None) -> list[AlertEvent]:
+        return self.select(payload, headers).parse(payload)
+
+
+# Grafana before Alertmanager: its payloads carry Alertmanager's keys too
+ALERT_SOURCES = AlertSourceRegistry(
+    [GrafanaSource(), AlertmanagerSource(), DatadogSource(), PagerDutySource(), CloudWatchSource()]
+)
@@ -1,53 +1,29 @@
 """Parse and normalize alert payloads from various sources."""
-from datetime import datetime
+from typing import Mapping, Optional
 
-from .schemas import AlertEvent, TriggerType
+from .schemas import AlertEvent
+from .sources import ALERT_SOURCES
 
 
-def parse_alert(payload: dict) -> AlertEvent:
+def parse_alerts(payload: dict, headers: Optional[Mapping[str, str]] = None) -> list[AlertEvent]:
     """
-    Parse alert payload into normalized AlertEvent.
-    Supports Prometheus Alertmanager and generic JSON webhook formats.
+    Parse alert payload into one normalized AlertEvent per alert.
+    The source (Alertmanager, Grafana, Datadog, PagerDuty, CloudWatch via SNS, or the
+    generic JSON format) is picked from the request `headers` or the payload's keys;
+    see `ALERT_SOURCES`. Grouped notifications expand into all their alerts.
+    Raises pydantic.ValidationError when the payload doesn't match its source's schema.
     """
-    # Prometheus Alertmanager format
-    if "alerts" in payload and payload["alerts"]:
-        alert = payload["alerts"][0]
-        labels = alert.get("labels", {})
-        annotations = alert.get("annotations", {})
-
-        trigger_type: TriggerType = "error_rate"
-        if "latency" in str(labels.get("alertname", "")).lower():
-            trigger_type = "latency_spike"
-        elif "error" in str(labels.get("alertname", "")).lower():
-            trigger_type = "error_rate"
-
-        service = labels.get("service", labels.get("job", "unknown"))
-        value = None
-        if "value" in annotations:
-            try:
-                value = float(annotations["value"])
-            except (ValueError, TypeError):
-                pass
-
-        return AlertEvent(
-            trigger_type=trigger_type,
-            service=service,
-            timestamp=datetime.utcnow(),
-            threshold=float(annotations.get("threshold", 0)),
-            value=value,
-            raw_payload=payload,
-        )
+    return ALERT_SOURCES.parse(payload, headers)
 
-    # Generic webhook format
-    trigger_type = payload.get("trigger_type", "error_rate")
-    if trigger_type not in ("latency_spike", "error_rate"):
-        trigger_type = "error_rate"
 
-    return AlertEvent(
-        trigger_type=trigger_type,
-        service=payload.get("service", "unknown"),
-        timestamp=datetime.utcnow(),
-        threshold=float(payload.get("threshold", 0)),
-        value=payload.get("value"),
-        raw_payload=payload,
-    )
+def parse_alert(payload: dict, headers: Optional[Mapping[str, str]] = None) -> AlertEvent:
+    """
+    Parse alert payload into normalized AlertEvent.
+    For grouped notifications only the first alert is returned;
+    use `parse_alerts` to get all of them. Raises ValueError when no alert in the
+    payload is firing.
+    """
+    alerts = parse_alerts(payload, headers)
+    if not alerts:
+        raise ValueError("No firing alerts in the payload")
+    return alerts[0]
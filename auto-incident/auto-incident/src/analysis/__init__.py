@@ -0,0 +1,5 @@
+"""Deterministic pre-analysis of telemetry before it reaches the LLM."""
+from .log_stream import afilter_levels, filter_levels
+from .log_templates import LogTemplate, LogTemplateMiner
+
+__all__ = ["LogTemplate", "LogTemplateMiner", "filter_levels", "afilter_levels"]
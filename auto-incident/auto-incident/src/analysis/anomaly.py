@@ -0,0 +1,162 @@
+"""
+Vectorized statistical anomaly detection over metric time series.
+
+All series of the same length are stacked into one 2-D array and analysed in a
+handful of NumPy operations:
+- spikes: robust z-score of each point against the median/MAD of the trailing window
+- level shifts: the split point that maximises the between-segment mean difference
+  (a single change-point, scored like a two-sample t statistic, computed from cumsums)
+- correlations: lagged Pearson correlation between every pair of series
+"""
+from collections import defaultdict
+from typing import Mapping, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .schemas import AnomalyReport, MetricAnomaly
+
+MAD_TO_STD = 1.4826
+_EPS = 1e-9
+
+
+def _robust_scale(mad: np.ndarray, median: np.ndarray) -> np.ndarray:
+    # A flat baseline has MAD 0; fall back to a small fraction of its level
+    return np.maximum(mad * MAD_TO_STD, np.maximum(np.abs(median) * 0.05, _EPS))
+
+
+def detect_spikes(names: list[str], x: np.ndarray, z_threshold: float, window: int) -> list[MetricAnomaly]:
+    """Points whose robust z-score vs the preceding `window` points exceeds the threshold."""
+    n, t = x.shape
+    w = max(2, min(window, t // 2))
+    if t <= w:
+        return []
+    windows = sliding_window_view(x, w, axis=1)[:, :-1]  # (n, t - w, w): window ending before each point
+    median = np.median(windows, axis=2)
+    mad = np.median(np.abs(windows - median[..., None]), axis=2)
+    current = x[:, w:]
+    z = (current - median) / _robust_scale(mad, median)
+
+    anomalies = []
+    for i, j in zip(*np.nonzero(np.abs(z) >= z_threshold)):
+        # Report only the first point of each run above threshold; the rest is the same event
+        if j > 0 and abs(z[i, j - 1]) >= z_threshold and np.sign(z[i, j - 1]) == np.sign(z[i, j]):
+            continue
+        anomalies.append(
+            MetricAnomaly(
+                series=names[i],
+                kind="spike",
+                index=int(j + w),
+                score=float(abs(z[i, j])),
+                direction="up" if z[i, j] > 0 else "down",
+                value=float(current[i, j]),
+                baseline=float(median[i, j]),
+            )
+        )
+    return anomalies
+
+
+def detect_level_shifts(names: list[str], x: np.ndarray, shift_threshold: float) -> list[MetricAnomaly]:
+    """Single most likely change-point per series, kept if its score exceeds the threshold."""
+    n, t = x.shape
+    if t < 4:
+        return []
+    k = np.arange(1, t)  # left segment sizes
+    csum = np.cumsum(x, axis=1)[:, :-1]
+    total = x.sum(axis=1, keepdims=True)
+    left_mean = csum / k
+    right_mean = (total - csum) / (t - k)
+    diff = right_mean - left_mean
+    # Normalize by overall robust spread so the score is comparable across series
+    median = np.median(x, axis=1, keepdims=True)
+    spread = _robust_scale(np.median(np.abs(x - median), axis=1, keepdims=True), median)
+    scores = np.abs(diff) / spread * np.sqrt(k * (t - k) / t)
+    best = scores.argmax(axis=1)
+
+    anomalies = []
+    for i in np.nonzero(scores[np.arange(n), best] >= shift_threshold)[0]:
+        b = best[i]
+        # Means are pulled by a single outlier; require the segment medians to move as well
+        left, right = x[i, : b + 1], x[i, b + 1 :]
+        if abs(np.median(right) - np.median(left)) < 2 * spread[i, 0]:
+            continue
+        anomalies.append(
+            MetricAnomaly(
+                series=names[i],
+                kind="level_shift",
+                index=int(b + 1),
+                score=float(scores[i, b]),
+                direction="up" if diff[i, b] > 0 else "down",
+                value=float(right_mean[i, b]),
+                baseline=float(left_mean[i, b]),
+            )
+        )
+    return anomalies
+
+
+def detect_correlations(
+    names: list[str], x: np.ndarray, corr_threshold: float, max_lag: int
+) -> list[MetricAnomaly]:
+    """Strongly correlated pairs, with the lag (in samples) at which the first series leads."""
+    n, t = x.shape
+    if n < 2 or t < 4:
+        return []
+    best_r = np.zeros((n, n))
+    best_lag = np.zeros((n, n), dtype=int)
+    for lag in range(0, min(max_lag, t - 3) + 1):
+        a = x[:, : t - lag]
+        b = x[:, lag:]
+        a = (a - a.mean(axis=1, keepdims=True)) / (a.std(axis=1, keepdims=True) + _EPS)
+        b = (b - b.mean(axis=1, keepdims=True)) / (b.std(axis=1, keepdims=True) + _EPS)
+        r = a @ b.T / (t - lag)  # r[i, j]: series i at time s vs series j at time s + lag
+        better = np.abs(r) > np.abs(best_r) + 1e-6
+        best_r = np.where(better, r, best_r)
+        best_lag = np.where(better, lag, best_lag)
+
+    anomalies = []
+    for i in range(n):
+        for j in range(n):
+            if i == j or abs(best_r[i, j]) < corr_threshold:
+                continue
+            # Keep each unordered pair once: the lagged direction, or i < j when simultaneous
+            if best_lag[i, j] == 0 and i > j:
+                continue
+            if best_lag[i, j] < best_lag[j, i] or (best_lag[i, j] == best_lag[j, i] and best_lag[i, j] > 0 and i > j):
+                continue
+            anomalies.append(
+                MetricAnomaly(
+                    series=names[i],
+                    kind="correlation",
+                    index=0,
+                    score=float(best_r[i, j]),
+                    direction="up" if best_r[i, j] > 0 else "down",
+                    related_series=names[j],
+                    lag=int(best_lag[i, j]),
+                )
+            )
+    return anomalies
+
+
+def detect_anomalies(
+    time_series: Mapping[str, Sequence[float]],
+    z_threshold: float = 4.0,
+    shift_threshold: float = 3.0,
+    corr_threshold: float = 0.85,
+    window: int = 10,
+    max_lag: int = 3,
+) -> AnomalyReport:
+    """Run spike, level-shift and correlation detection over every series at once."""
+    by_length: dict[int, list[str]] = defaultdict(list)
+    for name, values in time_series.items():
+        if len(values) >= 3:
+            by_length[len(values)].append(name)
+
+    anomalies: list[MetricAnomaly] = []
+    for names in by_length.values():
+        x = np.asarray([time_series[name] for name in names], dtype=float)
+        anomalies += detect_spikes(names, x, z_threshold, window)
+        anomalies += detect_level_shifts(names, x, shift_threshold)
+        anomalies += detect_correlations(names, x, corr_threshold, max_lag)
+
+    anomalies.sort(key=lambda a: (a.kind == "correlation", -abs(a.score)))
+    return AnomalyReport(anomalies=anomalies, series_count=len(time_series))
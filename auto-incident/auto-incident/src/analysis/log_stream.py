@@ -0,0 +1,21 @@
+"""Lazy stages for streamed log records; each pulls one record at a time from its source."""
+from typing import Any, AsyncIterable, AsyncIterator, Collection, Iterable, Iterator
+
+# Levels that add volume but rarely signal; dropped before template mining
+NOISE_LEVELS = frozenset({"DEBUG", "TRACE"})
+
+
+def filter_levels(
+    records: Iterable[dict[str, Any]], exclude: Collection[str] = NOISE_LEVELS
+) -> Iterator[dict[str, Any]]:
+    for record in records:
+        if str(record.get("level", "")).upper() not in exclude:
+            yield record
+
+
+async def afilter_levels(
+    records: AsyncIterable[dict[str, Any]], exclude: Collection[str] = NOISE_LEVELS
+) -> AsyncIterator[dict[str, Any]]:
+    async for record in records:
+        if str(record.get("level", "")).upper() not in exclude:
+            yield record
@@ -0,0 +1,223 @@
+"""
+Drain-style streaming log template mining.
+
+Log messages are masked (numbers, IDs, IPs, paths with digits), tokenized and
+routed through a fixed-depth prefix tree keyed by token count and leading
+tokens. Within a leaf, a message joins the most similar template above
+`sim_threshold`, and positions that differ become `<*>`. One pass, O(1) work
+per line, and memory bounded by `max_clusters` (least recently seen templates
+are evicted first). Masked messages seen before skip the tree via a bounded
+exact-match cache.
+"""
+import asyncio
+import re
+from collections import Counter, OrderedDict
+from typing import Any, AsyncIterable, Iterable, Optional
+
+WILDCARD = "<*>"
+
+# Numbers, UUIDs, IPs and hex IDs; the lookahead cheaply rejects positions that cannot start one
+_MASK = re.compile(
+    r"(?<![A-Za-z_])(?=[0-9a-fA-F+-])(?:"
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?"
+    r"|0x[0-9a-fA-F]+"
+    r"|[0-9a-fA-F]{12,}"
+    r"|[-+]?\d+(?:\.\d+)?(?:ms|s|%)?"
+    r")\b"
+)
+_DIGIT = re.compile(r"\d")
+
+
+def mask(message: str) -> str:
+    return _MASK.sub(WILDCARD, message)
+
+
+def stack_signature(stack_trace: str, frames: int = 2, skip: int = 0) -> str:
+    """Exception line plus the top frame(s) of a stack trace, joined on one line."""
+    lines = [line.strip() for line in stack_trace.splitlines()[skip: frames + 1] if line.strip()]
+    return " <- ".join(lines)
+
+
+class LogTemplate:
+    """A mined log template with occurrence statistics."""
+
+    __slots__ = ("id", "tokens", "count", "first_seen", "last_seen", "levels", "trace_ids", "stack")
+
+    def __init__(self, template_id: int, tokens: list[str]):
+        self.id = template_id
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen: Optional[str] = None
+        self.last_seen: Optional[str] = None
+        self.levels: Counter[str] = Counter()
+        self.trace_ids: list[str] = []
+        self.stack: Optional[str] = None
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "template": self.template,
+            "count": self.count,
+            "levels": dict(self.levels),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "trace_ids": list(self.trace_ids),
+            "stack": self.stack,
+        }
+
+
+class LogTemplateMiner:
+    """Groups a stream of log records into templates in a single bounded-memory pass."""
+
+    def __init__(
+        self,
+        depth: int = 4,
+        sim_threshold: float = 0.5,
+        max_children: int = 100,
+        max_clusters: int = 1000,
+        max_exemplars: int = 3,
+        exact_cache_size: int = 4096,
+    ):
+        self.prefix_depth = max(depth - 2, 1)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_exemplars = max_exemplars
+        self.total = 0
+        self.evicted = 0
+        # token count -> prefix tokens... -> list of templates in the leaf
+        self._tree: dict[int, dict] = {}
+        self._clusters: OrderedDict[int, LogTemplate] = OrderedDict()
+        self._leaf_of: dict[int, list[LogTemplate]] = {}
+        self._next_id = 0
+        self._exact: OrderedDict[str, LogTemplate] = OrderedDict()
+        self._exact_cache_size = exact_cache_size
+
+    def add(self, record: dict[str, Any]) -> LogTemplate:
+        """Mine one log record (`message`, optional `level`, `timestamp`, `trace_id`, `stack_trace`)."""
+        message = str(record.get("message", ""))
+        stack_trace = record.get("stack_trace")
+        if stack_trace:
+            # The exception line distinguishes otherwise identical messages; frames go in `stack`
+            message = f"{message} | {stack_signature(str(stack_trace), frames=0)}"
+        masked = mask(message)
+        cluster = self._exact.get(masked)
+        if cluster is not None and cluster.id in self._clusters:
+            self._clusters.move_to_end(cluster.id)
+        else:
+            cluster = self._match(masked.split())
+            self._exact[masked] = cluster
+            if len(self._exact) > self._exact_cache_size:
+                self._exact.popitem(last=False)
+
+        self.total += 1
+        cluster.count += 1
+        ts = record.get("timestamp")
+        if ts is not None:
+            ts = str(ts)
+            if cluster.first_seen is None or ts < cluster.first_seen:
+                cluster.first_seen = ts
+            if cluster.last_seen is None or ts > cluster.last_seen:
+                cluster.last_seen = ts
+        cluster.levels[str(record.get("level", "INFO"))] += 1
+        trace_id = record.get("trace_id")
+        if trace_id and len(cluster.trace_ids) < self.max_exemplars and str(trace_id) not in cluster.trace_ids:
+            cluster.trace_ids.append(str(trace_id))
+        if stack_trace and cluster.stack is None:
+            cluster.stack = stack_signature(str(stack_trace), skip=1)
+        return cluster
+
+    def consume(self, records: Iterable[dict[str, Any]]) -> "LogTemplateMiner":
+        for record in records:
+            self.add(record)
+        return self
+
+    async def aconsume(self, records: AsyncIterable[dict[str, Any]], batch_size: int = 1000) -> "LogTemplateMiner":
+        """
+        Mine an async stream off the event loop: records are read on the loop in
+        batches, and each batch is mined on a worker thread while the next is read.
+        """
+        mining: Optional[asyncio.Future] = None
+        batch: list[dict[str, Any]] = []
+        try:
+            async for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    if mining is not None:
+                        await mining
+                    mining = asyncio.ensure_future(asyncio.to_thread(self.consume, batch))
+                    batch = []
+        finally:
+            if mining is not None:
+                await mining
+        if batch:
+            await asyncio.to_thread(self.consume, batch)
+        return self
+
+    def templates(self, top: Optional[int] = None) -> list[LogTemplate]:
+        """Templates by descending count."""
+        ranked = sorted(self._clusters.values(), key=lambda c: c.count, reverse=True)
+        return ranked[:top] if top is not None else ranked
+
+    def summary(self, top: Optional[int] = None) -> list[dict[str, Any]]:
+        return [t.to_dict() for t in self.templates(top)]
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def _leaf(self, tokens: list[str]) -> list[LogTemplate]:
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[: self.prefix_depth]:
+            if WILDCARD in token or _DIGIT.search(token):
+                token = WILDCARD
+            child = node.get(token)
+            if child is None:
+                if len(node) >= self.max_children:
+                    token = WILDCARD
+                    child = node.get(token)
+                if child is None:
+                    child = node[token] = {}
+            node = child
+        return node.setdefault(None, [])
+
+    def _match(self, tokens: list[str]) -> LogTemplate:
+        leaf = self._leaf(tokens)
+        best, best_sim = None, -1.0
+        for cluster in leaf:
+            sim = self._similarity(cluster.tokens, tokens)
+            if sim > best_sim:
+                best, best_sim = cluster, sim
+
+        if best is not None and best_sim >= self.sim_threshold:
+            if best.tokens != tokens:
+                best.tokens = [t if t == n else WILDCARD for t, n in zip(best.tokens, tokens)]
+            self._clusters.move_to_end(best.id)
+            return best
+
+        cluster = LogTemplate(self._next_id, tokens)
+        self._next_id += 1
+        leaf.append(cluster)
+        self._clusters[cluster.id] = cluster
+        self._leaf_of[cluster.id] = leaf
+        if len(self._clusters) > self.max_clusters:
+            self._evict()
+        return cluster
+
+    @staticmethod
+    def _similarity(template: list[str], tokens: list[str]) -> float:
+        if not tokens:
+            return 1.0
+        same = 0
+        for t, n in zip(template, tokens):
+            if t == n or t == WILDCARD:
+                same += 1
+        return same / len(tokens)
+
+    def _evict(self) -> None:
+        cluster_id, cluster = self._clusters.popitem(last=False)
+        self._leaf_of.pop(cluster_id).remove(cluster)
+        self.evicted += 1
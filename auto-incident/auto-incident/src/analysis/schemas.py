@@ -0,0 +1,50 @@
+"""Pre-analysis result schemas."""
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+AnomalyKind = Literal["spike", "level_shift", "correlation"]
+
+
+class MetricAnomaly(BaseModel):
+    """A statistically detected anomaly in one metric series (or a pair, for correlations)."""
+
+    series: str
+    kind: AnomalyKind
+    index: int
+    score: float
+    direction: Literal["up", "down"] = "up"
+    value: Optional[float] = None
+    baseline: Optional[float] = None
+    related_series: Optional[str] = None
+    lag: int = 0
+
+
+class AnomalyReport(BaseModel):
+    """All anomalies found across a set of metric series."""
+
+    anomalies: list[MetricAnomaly] = Field(default_factory=list)
+    series_count: int = 0
+
+    def for_series(self, name: str) -> list[MetricAnomaly]:
+        return [a for a in self.anomalies if a.series == name]
+
+    def render(self) -> str:
+        """Compact one-line-per-anomaly rendering for prompts and findings."""
+        lines = []
+        for a in self.anomalies:
+            if a.kind == "correlation":
+                lead = f", {a.series} leads by {a.lag}" if a.lag else ""
+                lines.append(f"{a.series} ~ {a.related_series}: correlation r={a.score:.2f}{lead}")
+            elif a.kind == "level_shift":
+                lines.append(
+                    f"{a.series}: level shift {a.direction} at t={a.index} "
+                    f"({a.baseline:g} -> {a.value:g}, score={a.score:.1f})"
+                )
+            else:
+                lines.append(
+                    f"{a.series}: {a.direction} spike at t={a.index} "
+                    f"(value={a.value:g}, baseline={a.baseline:g}, z={a.score:.1f})"
+                )
+        return "\n".join(lines) if lines else "(no anomalies detected)"
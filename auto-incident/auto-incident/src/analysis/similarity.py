@@ -0,0 +1,109 @@
+"""
+Hashed TF-IDF vectors with brute-force cosine search in NumPy.
+
+Tokens are hashed (crc32, stable across processes) into `dims` buckets, so
+there is no vocabulary to maintain and no model to download. Rows hold
+log-scaled term frequencies; IDF weights come from the document frequencies
+of everything indexed and are applied lazily, so adding a document is O(dims)
+and a search is one matrix-vector product over at most `capacity` rows.
+"""
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+def _hash_counts(tokens: Iterable[str], dims: int) -> np.ndarray:
+    row = np.zeros(dims, dtype=np.float32)
+    for token in tokens:
+        row[zlib.crc32(token.encode()) % dims] += 1.0
+    return np.log1p(row, out=row)
+
+
+class TfidfIndex:
+    """Fixed-capacity cosine index; the oldest documents are evicted first."""
+
+    def __init__(self, dims: int = 1024, capacity: int = 5000):
+        self.dims = dims
+        self.capacity = capacity
+        self._tf = np.zeros((min(capacity, 64), dims), dtype=np.float32)
+        self._df = np.zeros(dims, dtype=np.float32)
+        self._slots: OrderedDict[str, int] = OrderedDict()  # insertion order = eviction order
+        self._keys: list[Optional[str]] = [None] * len(self._tf)
+        self._free: list[int] = list(range(len(self._tf) - 1, -1, -1))
+        self._weighted: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def add(self, key: str, tokens: Iterable[str]) -> None:
+        row = _hash_counts(tokens, self.dims)
+        self.remove(key)
+        if len(self._slots) >= self.capacity:
+            self.remove(next(iter(self._slots)))
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self._tf[slot] = row
+        self._df += row > 0
+        self._slots[key] = slot
+        self._keys[slot] = key
+        self._weighted = None
+
+    def remove(self, key: str) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self._df -= self._tf[slot] > 0
+        self._tf[slot] = 0.0
+        self._keys[slot] = None
+        self._free.append(slot)
+        self._weighted = None
+
+    def search(self, tokens: Iterable[str], k: int = 5) -> list[tuple[str, float]]:
+        """Top-k (key, cosine similarity) pairs with a positive score, best first."""
+        if not self._slots:
+            return []
+        idf = self._idf()
+        query = _hash_counts(tokens, self.dims) * idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self._matrix(idf) @ (query / norm)
+        k = min(k, len(self._slots))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._keys[i], float(scores[i])) for i in top if self._keys[i] is not None and scores[i] > 0]
+
+    def score(self, key: str, tokens: Iterable[str]) -> float:
+        """Cosine similarity of `tokens` to one indexed document (0.0 if it isn't indexed)."""
+        slot = self._slots.get(key)
+        if slot is None:
+            return 0.0
+        idf = self._idf()
+        query = _hash_counts(tokens, self.dims) * idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return 0.0
+        return float(self._matrix(idf)[slot] @ (query / norm))
+
+    def _grow(self) -> None:
+        old = len(self._tf)
+        new = min(self.capacity, old * 2)
+        self._tf = np.vstack([self._tf, np.zeros((new - old, self.dims), dtype=np.float32)])
+        self._keys.extend([None] * (new - old))
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def _idf(self) -> np.ndarray:
+        return np.log((1.0 + len(self._slots)) / (1.0 + self._df)) + 1.0
+
+    def _matrix(self, idf: np.ndarray) -> np.ndarray:
+        if self._weighted is None:
+            weighted = self._tf * idf
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._weighted = weighted / np.maximum(norms, 1e-12)
+        return self._weighted
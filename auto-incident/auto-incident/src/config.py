@@ -13,8 +13,63 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     alert_webhook_secret: str = ""
     llm_provider: Literal["openai", "anthropic", "ollama"] = "ollama"
-    llm_model: str = "mistral:latest"
+    llm_model: str = ""  # empty: the provider's default model
+    llm_role_models: dict[str, str] = {}
+    llm_fallback_models: dict[str, list[str]] = {}
+    llm_timeout_seconds: float = 60.0
     ollama_base_url: str = "http://localhost:11434"
+    max_concurrent_investigations: int = 4
+    investigation_queue_size: int = 100
+    queue_overflow_policy: Literal["reject", "shed_oldest"] = "reject"
+    alert_dedup_window_seconds: float = 300.0
+    alert_correlation_window_seconds: float = 120.0
+    service_dependencies: dict[str, list[str]] = {}  # service -> services it calls
+    llm_max_concurrency: dict[str, int] = {"openai": 8, "anthropic": 8, "ollama": 2}
+    llm_default_concurrency: int = 8
+    llm_tokens_per_minute: dict[str, int] = {}
+    llm_max_retries: int = 4
+    llm_retry_backoff_seconds: float = 1.0
+    llm_retry_max_backoff_seconds: float = 60.0
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: float = 3600.0
+    llm_cache_max_entries: int = 1024
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_sqlite_path: str = ""
+    # Limits of the SQLite/shared tier, enforced (with the TTL) every LLM_CACHE_TRIM_INTERVAL_SECONDS
+    llm_cache_shared_max_entries: int = 100_000
+    llm_cache_shared_max_bytes: int = 512 * 1024 * 1024
+    llm_cache_trim_interval_seconds: float = 300.0
+    context_token_budget: int = 2000
+    context_token_budgets: dict[str, int] = {}
+    metrics_skip_llm_when_clear: bool = True
+    decision_structured_output: bool = True
+    decision_repair_attempts: int = 1
+    deploy_risk_window_minutes: float = 60.0
+    deploy_risky_config_keys: list[str] = ["pool", "connection", "timeout", "retry", "replica", "limit", "cache"]
+    state_backend: Literal["memory", "sqlite"] = "memory"
+    state_sqlite_path: str = "state.db"
+    job_retention_seconds: float = 86400.0
+    incident_store_path: str = "incidents.db"
+    incident_store_batch_size: int = 50
+    incident_store_flush_seconds: float = 0.5
+    loki_url: str = ""
+    prometheus_url: str = ""
+    argocd_url: str = ""
+    argocd_token: str = ""
+    integration_timeout_seconds: float = 10.0
+    integration_max_concurrency: int = 8
+    integration_retries: int = 2
+    integration_hedge_after_seconds: float = 1.0
+    integration_cache_ttl_seconds: float = 30.0
+    integration_cache_bucket_seconds: int = 60
+    logs_page_size: int = 1000
+    logs_max_lines: int = 1_000_000
+    similar_incidents_top_k: int = 3
+    similar_incidents_context_threshold: float = 0.5
+    similar_incidents_reuse_threshold: float = 0.95
+    similar_incidents_reuse_max_age_seconds: float = 3600.0
+    cassette_dir: str = ""  # record every investigation into a cassette here; empty: off
+    cassette_max_stream_items: int = 100_000
 
     class Config:
         env_file = ".env"
@@ -1,5 +1,15 @@
 """Decision & Action Engine - RCA generation and rollback recommendations."""
-from .engine import DecisionEngine
-from .schemas import RCAReport
+from .engine import DecisionEngine, RCAParseError, message_text, structured_llm
+from .json_stream import IncrementalJSONParser, parse_json_object
+from .schemas import RCAOutput, RCAReport
 
-__all__ = ["DecisionEngine", "RCAReport"]
+__all__ = [
+    "DecisionEngine",
+    "IncrementalJSONParser",
+    "RCAOutput",
+    "RCAParseError",
+    "RCAReport",
+    "message_text",
+    "parse_json_object",
+    "structured_llm",
+]
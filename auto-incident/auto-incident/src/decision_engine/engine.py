@@ -1,13 +1,19 @@
 """Decision & Action Engine - synthesizes RCA and rollback recommendation."""
 import json
-import re
+from typing import Any
 
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableWithFallbacks
+from pydantic import ValidationError
 
-from src.agents.llm import get_llm
+from src.agents.llm import get_llm, get_model_name
+from src.config import get_settings
+from src.instrumentation import timed_stage
+from src.instrumentation.metrics import RCA_PARSE
 from src.memory import IncidentMemory
-from .schemas import RCAReport
+from src.memory.context import render_alert_header
+from .json_stream import parse_json_object
+from .schemas import RCAOutput, RCAReport
 
 
 SYSTEM_PROMPT = """You are a Decision & Action Engine. Synthesize all findings, hypotheses, and evidence into:
@@ -24,62 +30,191 @@ Output MUST be valid JSON in this exact format:
   "recommended_actions": ["...", "..."]
 }"""
 
+REPAIR_PROMPT = """Your previous reply could not be used as the RCA report: {error}.
+Reply again with only the JSON object, in exactly the format requested, with non-empty "summary" and "root_cause"."""
+
+RCA_SCHEMA = RCAOutput.model_json_schema()
+UNDETERMINED = "Undetermined: the RCA reply could not be parsed"
+
+
+class RCAParseError(ValueError):
+    """The LLM reply could not be turned into an RCA report."""
+
 
 class DecisionEngine:
-    """Generates RCA and rollback recommendations from Shared Incident Memory."""
+    """
+    Generates RCA and rollback recommendations from Shared Incident Memory.
+
+    With DECISION_STRUCTURED_OUTPUT the model is constrained to the RCA schema where the
+    provider supports it. A reply that still doesn't parse is sent back once per
+    DECISION_REPAIR_ATTEMPTS with the parse error (only this step is repeated); after
+    that a degraded report is built from whatever fields were readable.
+    """
 
     def __init__(self):
-        self.llm = get_llm()
-        self.parser = StrOutputParser()
+        settings = get_settings()
+        self.llm = get_llm("decision")
+        self.model = get_model_name("decision")
+        if settings.decision_structured_output:
+            self.llm = structured_llm(self.llm)
+        self.repair_attempts = settings.decision_repair_attempts
 
     def generate_rca(self, memory: IncidentMemory) -> RCAReport:
         """Produce RCA report from incident memory."""
-
-        # 1. Collect shared incident context
-        context = memory.get_context()
+        messages = self._messages(memory)
+        raw = message_text(self.llm.invoke(messages))
+        for attempt in range(self.repair_attempts + 1):
+            try:
+                return self._parse(raw, repaired=attempt > 0)
+            except RCAParseError as e:
+                if attempt == self.repair_attempts:
+                    break
+                messages = _repair_messages(messages, raw, e)
+                raw = message_text(self.llm.invoke(messages))
+        return self._degraded(raw)
+
+    async def agenerate_rca(self, memory: IncidentMemory) -> RCAReport:
+        """Async variant of `generate_rca` using `ainvoke`."""
+        messages = self._messages(memory)
+        raw = message_text(await self.llm.ainvoke(messages))
+        for attempt in range(self.repair_attempts + 1):
+            try:
+                return self._parse(raw, repaired=attempt > 0)
+            except RCAParseError as e:
+                if attempt == self.repair_attempts:
+                    break
+                messages = _repair_messages(messages, raw, e)
+                raw = message_text(await self.llm.ainvoke(messages))
+        return self._degraded(raw)
+
+    def _messages(self, memory: IncidentMemory) -> list:
+        context = memory.get_context(model=self.model)
+        alerts = ""
+        if memory.related_alerts:
+            alerts = "\n    " + render_alert_header(memory.alert, memory.related_alerts).replace("\n", "\n    ")
 
         prompt = f"""
-    Incident ID: {memory.incident_id}
+    Incident ID: {memory.incident_id}{alerts}
 
     All findings, hypotheses, and evidence:
     {context}
 
     Generate the RCA report as JSON.
     """
-
-        # 2. Invoke LLM
-        chain = self.llm | self.parser
-        raw = chain.invoke(
-            [
-                SystemMessage(content=SYSTEM_PROMPT),
-                HumanMessage(content=prompt),
-            ]
-        )
-
-        # 3. Extract JSON from LLM output (handles ```json blocks)
-        json_str = raw
-        match = re.search(r"```(?:json)?\s*([\s\S]*?)```", raw)
-        if match:
-            json_str = match.group(1).strip()
-
-        # 4. Parse JSON safely
-        data = json.loads(json_str)
-
-        # 5. Normalize evidence_summary → List[Dict]
-        normalized_evidence = []
-        for item in data.get("evidence_summary", []):
-            normalized_evidence.append(
+        return [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=prompt),
+        ]
+
+    def _parse(self, raw: str, repaired: bool = False) -> RCAReport:
+        with timed_stage("rca_parse"):
+            report = self._parse_rca(raw)
+        RCA_PARSE.inc(outcome="repaired" if repaired else "ok")
+        return report
+
+    def _parse_rca(self, raw: str) -> RCAReport:
+        # Tolerates prose and ```json fences around the object, trailing commas and truncation
+        data = parse_json_object(raw)
+        if data is None:
+            raise RCAParseError("no JSON object found")
+        missing = [key for key in ("summary", "root_cause") if not str(data.get(key) or "").strip()]
+        if missing:
+            raise RCAParseError(f"missing {', '.join(missing)}")
+        try:
+            return _report(data)
+        except ValidationError as e:
+            raise RCAParseError(str(e)) from e
+
+    def _degraded(self, raw: str) -> RCAReport:
+        """Best-effort report so the incident still completes when no reply parsed."""
+        with timed_stage("rca_parse"):
+            data = parse_json_object(raw) or {}
+            report = _report(
                 {
-                    "description": item,
-                    "source": "decision_engine",
-                    "confidence": 0.8,
-                }
+                    **data,
+                    "summary": str(data.get("summary") or "").strip() or raw.strip()[:500],
+                    "root_cause": str(data.get("root_cause") or "").strip() or UNDETERMINED,
+                },
+                lenient=True,
             )
+        RCA_PARSE.inc(outcome="degraded")
+        return report
+
 
-        # 6. Build and return validated RCAReport
-        return RCAReport(
-            summary=data.get("summary", ""),
-            root_cause=data.get("root_cause", ""),
-            evidence_summary=normalized_evidence,
-            recommended_actions=data.get("recommended_actions", []),
+def structured_llm(llm: Runnable) -> Runnable:
+    """
+    Bind the RCA schema using the provider's structured-output mode: a JSON schema for
+    OpenAI and Ollama, a forced tool call for Anthropic. Fallback chains are bound per model.
+    """
+    if isinstance(llm, RunnableWithFallbacks):
+        return structured_llm(llm.runnable).with_fallbacks(
+            [structured_llm(fallback) for fallback in llm.fallbacks],
+            exceptions_to_handle=llm.exceptions_to_handle,
+        )
+    provider = getattr(llm, "provider", None)
+    if provider == "openai":
+        return llm.bind(
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "rca_report", "schema": RCA_SCHEMA, "strict": True},
+            }
+        )
+    if provider == "ollama":
+        return llm.bind(format=RCA_SCHEMA)
+    if provider == "anthropic":
+        return llm.bind_tools([RCAOutput], tool_choice="RCAOutput")
+    return llm
+
+
+def message_text(message: Any) -> str:
+    """Text of a reply or stream chunk: its text content, or the arguments of a tool call."""
+    if isinstance(message, str):
+        return message
+    content = message.content
+    if isinstance(content, str):
+        text = content
+    else:
+        text = "".join(
+            block if isinstance(block, str) else block.get("text", "")
+            for block in content
+            if isinstance(block, str) or block.get("type") == "text"
         )
+    if text:
+        return text
+    chunks = getattr(message, "tool_call_chunks", None)
+    if chunks:
+        return "".join(chunk.get("args") or "" for chunk in chunks)
+    calls = getattr(message, "tool_calls", None)
+    if calls:
+        return json.dumps(calls[0]["args"])
+    return ""
+
+
+def _repair_messages(messages: list[BaseMessage], raw: str, error: RCAParseError) -> list[BaseMessage]:
+    # Original prompt + the bad reply + what was wrong; earlier repair turns are dropped
+    return [*messages[:2], AIMessage(content=raw or "(empty reply)"), HumanMessage(content=REPAIR_PROMPT.format(error=error))]
+
+
+def _report(data: dict[str, Any], lenient: bool = False) -> RCAReport:
+    evidence = data.get("evidence_summary") or []
+    actions = data.get("recommended_actions") or []
+    # A lone evidence item is unambiguous; iterating it would split a string into characters
+    if not isinstance(evidence, list):
+        evidence = [evidence]
+    if lenient:
+        actions = [str(a) for a in actions] if isinstance(actions, list) else [str(actions)]
+
+    # Normalize evidence_summary → List[Dict]
+    normalized_evidence = []
+    for item in evidence:
+        if isinstance(item, dict):
+            normalized_evidence.append({"source": "decision_engine", "confidence": 0.8, **item})
+        else:
+            normalized_evidence.append({"description": item, "source": "decision_engine", "confidence": 0.8})
+
+    return RCAReport(
+        summary=data["summary"],
+        root_cause=data["root_cause"],
+        evidence_summary=normalized_evidence,
+        recommended_actions=actions,
+    )
@@ -0,0 +1,130 @@
+"""
+Tolerant, incremental JSON object parser for streamed LLM output.
+
+Text before the first `{` (prose, a ```json fence) and after the object closes is
+ignored, trailing commas are dropped, and a truncated object is completed by
+closing its open strings, arrays and objects. While the text is still streaming,
+`value()` is everything parsed so far and `fields()` only the top-level fields
+that are already finished.
+"""
+import json
+from typing import Any, Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Feed chunks as they arrive; each character is scanned once."""
+
+    def __init__(self):
+        self._chars: list[str] = []
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.complete = False
+        # (position, closers) pairs where the text can be cut and closed into valid JSON
+        self._cuts: list[tuple[int, tuple[str, ...]]] = []
+        self._fields: tuple[int, dict[str, Any]] = (0, {})
+
+    def feed(self, text: str) -> "IncrementalJSONParser":
+        for ch in text:
+            if self.complete:
+                break
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+            self._step(ch)
+        return self
+
+    def value(self) -> Optional[dict[str, Any]]:
+        """The object parsed so far, with unfinished strings and containers closed."""
+        if not self._started:
+            return None
+        text = "".join(self._chars)
+        if self.complete:
+            return _loads(text)
+        tail = text
+        if self._in_string:
+            tail = (tail[:-1] if self._escape else tail) + '"'
+        value = _loads(_close(tail, self._stack))
+        if value is not None:
+            return value
+        for pos, closers in reversed(self._cuts):
+            value = _loads(_close(text[:pos], closers))
+            if value is not None:
+                return value
+        return None
+
+    def fields(self) -> dict[str, Any]:
+        """Top-level fields whose values are finished; only re-parsed after a new one ends."""
+        for pos, closers in reversed(self._cuts):
+            if len(closers) <= 1:
+                break
+        else:
+            return {}
+        if pos != self._fields[0]:
+            text = "".join(self._chars[:pos])
+            self._fields = (pos, _loads(_close(text, closers)) or {})
+        return self._fields[1]
+
+    def _step(self, ch: str) -> None:
+        chars = self._chars
+        if self._in_string:
+            chars.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+            return
+        if ch == '"':
+            self._in_string = True
+        elif ch in _CLOSERS:
+            self._stack.append(_CLOSERS[ch])
+            chars.append(ch)
+            self._cuts.append((len(chars), tuple(self._stack)))
+            return
+        elif ch in "}]":
+            self._drop_trailing_comma()
+            chars.append(ch)
+            if self._stack:
+                self._stack.pop()
+            if not self._stack:
+                self.complete = True
+            self._cuts.append((len(chars), tuple(self._stack)))
+            return
+        elif ch == ",":
+            self._cuts.append((len(chars), tuple(self._stack)))
+        chars.append(ch)
+
+    def _drop_trailing_comma(self) -> None:
+        # Blanked rather than removed, so recorded cut positions stay valid
+        for i in range(len(self._chars) - 1, -1, -1):
+            if self._chars[i] not in _WHITESPACE:
+                if self._chars[i] == ",":
+                    self._chars[i] = " "
+                return
+
+
+def parse_json_object(text: str) -> Optional[dict[str, Any]]:
+    """The first JSON object in `text`, repaired as far as possible; None if there is none."""
+    return IncrementalJSONParser().feed(text).value()
+
+
+def _close(text: str, closers) -> str:
+    text = text.rstrip(_WHITESPACE)
+    if text.endswith(","):
+        text = text[:-1]
+    return text + "".join(reversed(closers))
+
+
+def _loads(text: str) -> Optional[dict[str, Any]]:
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
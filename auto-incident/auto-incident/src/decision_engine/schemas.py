@@ -1,5 +1,5 @@
 """RCA and action schemas."""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class RCAReport(BaseModel):
@@ -9,3 +9,14 @@ class RCAReport(BaseModel):
     root_cause: str
     evidence_summary: list[dict] = Field(default_factory=list)
     recommended_actions: list[str] = Field(default_factory=list)
+
+
+class RCAOutput(BaseModel):
+    """RCA report as the LLM is asked to produce it (JSON schema / tool for structured output)."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    summary: str = Field(description="Concise incident summary")
+    root_cause: str = Field(description="The most likely root cause")
+    evidence_summary: list[str] = Field(description="Key points of evidence")
+    recommended_actions: list[str] = Field(description='Actions, e.g. "Rollback to version v2.3.0"')
@@ -0,0 +1,31 @@
+"""Latency, token and cache instrumentation, exported as Prometheus metrics."""
+from .callbacks import CACHE_HIT_INFO, InstrumentationHandler
+from .metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+from .timings import (
+    IncidentTimings,
+    current_timings,
+    record_integration,
+    record_integration_cache,
+    record_llm_cache,
+    record_llm_queue_wait,
+    timed_node,
+    timed_stage,
+)
+
+__all__ = [
+    "CACHE_HIT_INFO",
+    "REGISTRY",
+    "Registry",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "IncidentTimings",
+    "InstrumentationHandler",
+    "current_timings",
+    "record_integration",
+    "record_integration_cache",
+    "record_llm_cache",
+    "record_llm_queue_wait",
+    "timed_node",
+    "timed_stage",
+]
@@ -0,0 +1,85 @@
+"""LangChain callback handler that times every LLM call and counts its tokens."""
+import threading
+import time
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .metrics import LLM_SECONDS, LLM_TOKENS
+from .timings import IncidentTimings
+
+# Set in `generation_info` by the LLM response cache on the generations it answers with
+CACHE_HIT_INFO = "cache_hit"
+
+
+def _cache_hit(response: LLMResult) -> bool:
+    return any((g.generation_info or {}).get(CACHE_HIT_INFO) for gens in response.generations for g in gens)
+
+
+def _usage(response: LLMResult) -> tuple[int, int]:
+    """(prompt, completion) tokens from message usage metadata, or the provider's llm_output."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not (prompt or completion) and response.llm_output:
+        usage = response.llm_output.get("token_usage") or response.llm_output.get("usage") or {}
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+        completion = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+    return prompt, completion
+
+
+class InstrumentationHandler(BaseCallbackHandler):
+    """
+    Passed in the graph run config, so it sees every chat model call made by any node.
+    Calls answered from the response cache are counted by the cache as hits, not here.
+    """
+
+    def __init__(self, timings: Optional[IncidentTimings] = None):
+        self.timings = timings
+        self._runs: dict[UUID, tuple[float, dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        labels = {
+            "provider": str(metadata.get("ls_provider", "unknown")),
+            "model": str(metadata.get("ls_model_name", "unknown")),
+            "node": str(metadata.get("langgraph_node", "")),
+        }
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), labels)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, response=response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=True)
+
+    def _finish(self, run_id: UUID, response: Optional[LLMResult] = None, error: bool = False) -> None:
+        with self._lock:
+            started, labels = self._runs.pop(run_id, (None, None))
+        if started is None or (response is not None and _cache_hit(response)):
+            return
+        elapsed = time.perf_counter() - started
+        prompt, completion = _usage(response) if response is not None else (0, 0)
+        LLM_SECONDS.observe(elapsed, outcome="error" if error else "ok", **labels)
+        if prompt:
+            LLM_TOKENS.inc(prompt, provider=labels["provider"], model=labels["model"], kind="prompt")
+        if completion:
+            LLM_TOKENS.inc(completion, provider=labels["provider"], model=labels["model"], kind="completion")
+        if self.timings is not None:
+            self.timings.add_llm(elapsed, prompt, completion, error=error)
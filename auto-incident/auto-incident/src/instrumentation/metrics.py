@@ -0,0 +1,168 @@
+"""
+Minimal Prometheus metric types rendered in the text exposition format.
+
+Only what the service needs (labelled counters, gauges and histograms); metrics are
+process-local and thread-safe.
+"""
+import math
+import threading
+from typing import Iterable, Optional, Sequence
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["Registry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts..., sum, count]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[-1]) if series else 0
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(cumulative)}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {_number(series[-1])}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+NODE_SECONDS = Histogram("incident_node_duration_seconds", "Wall time of each investigation graph node.", ["node", "outcome"])
+STAGE_SECONDS = Histogram("incident_stage_duration_seconds", "Wall time of CPU-side stages such as RCA parsing.", ["stage"])
+INCIDENT_SECONDS = Histogram("incident_duration_seconds", "Wall time of a whole investigation.", ["outcome"])
+INTEGRATION_SECONDS = Histogram(
+    "integration_request_duration_seconds", "Wall time of each backend HTTP request.", ["backend", "outcome"]
+)
+INTEGRATION_CACHE = Counter(
+    "integration_cache_requests_total", "Backend response cache lookups.", ["backend", "result"]
+)
+LLM_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Wall time of each LLM call.", ["provider", "model", "node", "outcome"]
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by kind (prompt or completion).", ["provider", "model", "kind"])
+LLM_CACHE = Counter("llm_cache_requests_total", "LLM response cache lookups.", ["result"])
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "LLM requests waiting for a provider slot, by priority lane.", ["provider", "lane"])
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time LLM requests waited in the scheduler queue.", ["provider", "lane"]
+)
+LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "LLM requests currently holding a provider slot.", ["provider"])
+LLM_RETRIES = Counter("llm_retries_total", "LLM requests retried by the scheduler.", ["provider", "reason"])
+RCA_PARSE = Counter("rca_parse_total", "RCA replies by parse outcome (ok, repaired or degraded).", ["outcome"])
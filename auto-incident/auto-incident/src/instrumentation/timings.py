@@ -0,0 +1,170 @@
+"""Per-incident timing breakdown, collected alongside the process-wide Prometheus metrics."""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from .metrics import (
+    INCIDENT_SECONDS,
+    INTEGRATION_CACHE,
+    INTEGRATION_SECONDS,
+    LLM_CACHE,
+    LLM_QUEUE_WAIT,
+    NODE_SECONDS,
+    STAGE_SECONDS,
+)
+
+_current: ContextVar[Optional["IncidentTimings"]] = ContextVar("incident_timings", default=None)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class IncidentTimings:
+    """
+    Accumulates where one investigation spent its time. Activated for the
+    duration of a graph run, so nodes, backend calls and LLM calls made on
+    its behalf (including from worker threads that copy the context) land here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self.nodes: dict[str, float] = {}
+        self.stages: dict[str, float] = {}
+        self.integrations: dict[str, dict[str, float]] = {}
+        self.llm = {
+            "calls": 0,
+            "ms": 0.0,
+            "queue_ms": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "errors": 0,
+            "cache_hits": 0,
+        }
+
+    @contextmanager
+    def activate(self) -> Iterator["IncidentTimings"]:
+        token = _current.set(self)
+        outcome = "error"
+        try:
+            yield self
+            outcome = "ok"
+        finally:
+            self._finished = time.perf_counter()
+            _current.reset(token)
+            INCIDENT_SECONDS.observe(self._finished - self._started, outcome=outcome)
+
+    def add_node(self, node: str, seconds: float) -> None:
+        with self._lock:
+            self.nodes[node] = self.nodes.get(node, 0.0) + _ms(seconds)
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + _ms(seconds)
+
+    def add_integration(self, backend: str, seconds: float = 0.0, error: bool = False, cache_hit: bool = False) -> None:
+        with self._lock:
+            stats = self.integrations.setdefault(backend, {"calls": 0, "ms": 0.0, "errors": 0, "cache_hits": 0})
+            if cache_hit:
+                stats["cache_hits"] += 1
+                return
+            stats["calls"] += 1
+            stats["ms"] += _ms(seconds)
+            stats["errors"] += int(error)
+
+    def add_llm(
+        self,
+        seconds: float = 0.0,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: bool = False,
+        cache_hit: bool = False,
+    ) -> None:
+        with self._lock:
+            if cache_hit:
+                self.llm["cache_hits"] += 1
+                return
+            self.llm["calls"] += 1
+            self.llm["ms"] += _ms(seconds)
+            self.llm["prompt_tokens"] += prompt_tokens
+            self.llm["completion_tokens"] += completion_tokens
+            self.llm["errors"] += int(error)
+
+    def add_llm_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.llm["queue_ms"] += _ms(seconds)
+
+    def breakdown(self) -> dict[str, Any]:
+        end = self._finished or time.perf_counter()
+        with self._lock:
+            return {
+                "total_ms": _ms(end - self._started),
+                "nodes": dict(self.nodes),
+                "stages": dict(self.stages),
+                "integrations": {k: dict(v) for k, v in self.integrations.items()},
+                "llm": dict(self.llm),
+            }
+
+
+def current_timings() -> Optional[IncidentTimings]:
+    return _current.get()
+
+
+@contextmanager
+def timed_node(node: str) -> Iterator[None]:
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        NODE_SECONDS.observe(elapsed, node=node, outcome=outcome)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_node(node, elapsed)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_stage(stage, elapsed)
+
+
+def record_integration(backend: str, seconds: float, error: bool) -> None:
+    INTEGRATION_SECONDS.observe(seconds, backend=backend, outcome="error" if error else "ok")
+    timings = _current.get()
+    if timings is not None:
+        timings.add_integration(backend, seconds, error=error)
+
+
+def record_integration_cache(backend: str, hit: bool) -> None:
+    INTEGRATION_CACHE.inc(backend=backend, result="hit" if hit else "miss")
+    timings = _current.get()
+    if hit and timings is not None:
+        timings.add_integration(backend, cache_hit=True)
+
+
+def record_llm_cache(hit: bool) -> None:
+    LLM_CACHE.inc(result="hit" if hit else "miss")
+    timings = _current.get()
+    if hit and timings is not None:
+        timings.add_llm(cache_hit=True)
+
+
+def record_llm_queue_wait(provider: str, lane: str, seconds: float) -> None:
+    LLM_QUEUE_WAIT.observe(seconds, provider=provider, lane=lane)
+    timings = _current.get()
+    if timings is not None:
+        timings.add_llm_wait(seconds)
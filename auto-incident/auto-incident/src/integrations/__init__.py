@@ -1 +1,16 @@
 """Integration clients for logs, metrics, and deploy systems."""
+from .backend import BackendClient, IntegrationError, aclose_http_clients, afan_out, fan_out
+from .deploy_client import ArgoCDClient
+from .logs_client import LokiClient
+from .metrics_client import PrometheusClient
+
+__all__ = [
+    "BackendClient",
+    "IntegrationError",
+    "aclose_http_clients",
+    "fan_out",
+    "afan_out",
+    "LokiClient",
+    "PrometheusClient",
+    "ArgoCDClient",
+]
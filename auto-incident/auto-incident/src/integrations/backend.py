@@ -0,0 +1,314 @@
+"""
+Shared HTTP plumbing for the telemetry and deploy backends.
+
+All clients share one pooled `httpx.Client` (and one `httpx.AsyncClient` per
+event loop). Each backend gets its own concurrency limit, timeout and retry
+policy; async requests are hedged (a second attempt is started when the first
+is slow, and whichever answers first wins). Parsed responses are cached for a
+short TTL and concurrent identical requests share a single round-trip.
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Hashable, Optional, Sequence, TypeVar
+
+import httpx
+
+from src.config import get_settings
+from src.instrumentation import record_integration, record_integration_cache
+
+# Status codes worth retrying; anything else >= 400 is returned to the caller as an error
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class IntegrationError(Exception):
+    """A backend request failed after all retries."""
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Connection pool shared by every synchronous backend client."""
+    return httpx.Client(limits=_POOL_LIMITS)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Connection pool shared by every async backend client on the running loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(limits=_POOL_LIMITS)
+    return client
+
+
+async def aclose_http_clients() -> None:
+    """Close the shared pools (the async one for the running loop)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
+
+
+def backend_options() -> dict[str, Any]:
+    """Client keyword arguments from the integration settings."""
+    settings = get_settings()
+    return {
+        "timeout": settings.integration_timeout_seconds,
+        "max_concurrency": settings.integration_max_concurrency,
+        "retries": settings.integration_retries,
+        "hedge_after": settings.integration_hedge_after_seconds or None,
+        "cache_ttl": settings.integration_cache_ttl_seconds,
+        "bucket_seconds": settings.integration_cache_bucket_seconds,
+    }
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def fan_out(fn: Callable[[T], R], items: Sequence[T]) -> list[R]:
+    """
+    `fn` applied to every item concurrently, results in item order. Each call runs on its
+    own thread (up to INTEGRATION_MAX_CONCURRENCY) in a copy of the caller's context, so
+    timings follow it; per-backend limits still apply inside the clients.
+    """
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    workers = min(len(items), get_settings().integration_max_concurrency)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fan-out") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [f.result() for f in futures]
+
+
+async def afan_out(fn: Callable[[T], Awaitable[R]], items: Sequence[T]) -> list[R]:
+    """Async `fan_out`: every call runs concurrently on the event loop."""
+    return list(await asyncio.gather(*(fn(item) for item in items)))
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if self._clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _LoopState:
+    """Per-event-loop primitives; asyncio objects cannot be shared across loops."""
+
+    def __init__(self, max_concurrency: int):
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.inflight: dict[Hashable, asyncio.Future] = {}
+
+
+class BackendClient:
+    """
+    Base for one HTTP backend. Subclasses build requests and parse responses;
+    this class handles pooling, limits, timeouts, retries, hedging and caching.
+    Cached results are shared between callers and must be treated as read-only.
+    """
+
+    name = "backend"
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        timeout: float = 10.0,
+        max_concurrency: int = 8,
+        retries: int = 2,
+        backoff: float = 0.2,
+        hedge_after: Optional[float] = 1.0,
+        cache_ttl: float = 30.0,
+        bucket_seconds: int = 60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.bucket_seconds = bucket_seconds
+        self.cache = TTLCache(cache_ttl)
+        self._limit = threading.BoundedSemaphore(max_concurrency)
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._key_locks_guard = threading.Lock()
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+    def bucket(self, ts) -> int:
+        """Time bucket for cache keys, so requests for the same window share a response."""
+        return int(ts.timestamp() // self.bucket_seconds) if ts is not None else 0
+
+    # --- sync ---
+
+    def get_json(self, path: str, params: Optional[dict[str, Any]] = None) -> Any:
+        """GET with retries on transport errors, timeouts and retryable statuses."""
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                with self._limit:
+                    response = get_http_client().get(
+                        self.base_url + path, params=params, headers=self.headers, timeout=self.timeout
+                    )
+                body = self._json(response)
+                record_integration(self.name, time.perf_counter() - started, error=False)
+                return body
+            except IntegrationError:
+                record_integration(self.name, time.perf_counter() - started, error=True)
+                raise
+            except (httpx.TransportError, _Retryable) as e:
+                record_integration(self.name, time.perf_counter() - started, error=True)
+                if attempt == self.retries:
+                    raise IntegrationError(f"{self.name} GET {path} failed: {e}") from e
+                time.sleep(self._delay(attempt))
+
+    def cached(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, or fetch it once even under concurrent callers."""
+        hit, value = self.cache.get(key)
+        if hit:
+            record_integration_cache(self.name, hit=True)
+            return value
+        with self._key_locks_guard:
+            lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                hit, value = self.cache.get(key)
+                record_integration_cache(self.name, hit=hit)
+                if hit:
+                    return value
+                value = fetch()
+                self.cache.set(key, value)
+                return value
+        finally:
+            with self._key_locks_guard:
+                self._key_locks.pop(key, None)
+
+    # --- async ---
+
+    async def aget_json(self, path: str, params: Optional[dict[str, Any]] = None) -> Any:
+        """Async GET, hedged after `hedge_after` seconds, with the same retry policy as `get_json`."""
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._hedged(path, params)
+            except (httpx.TransportError, _Retryable) as e:
+                if attempt == self.retries:
+                    raise IntegrationError(f"{self.name} GET {path} failed: {e}") from e
+                await asyncio.sleep(self._delay(attempt))
+
+    async def acached(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async `cached`: concurrent callers for the same key await one shared fetch."""
+        hit, value = self.cache.get(key)
+        record_integration_cache(self.name, hit=hit)
+        if hit:
+            return value
+        inflight = self._loop_state().inflight
+        task = inflight.get(key)
+        if task is None:
+
+            async def run():
+                result = await fetch()
+                self.cache.set(key, result)
+                return result
+
+            task = inflight[key] = asyncio.ensure_future(run())
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _hedged(self, path: str, params: Optional[dict[str, Any]]) -> Any:
+        pending = {asyncio.ensure_future(self._arequest(path, params))}
+        if self.hedge_after is not None:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if not done:
+                pending.add(asyncio.ensure_future(self._arequest(path, params)))
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _arequest(self, path: str, params: Optional[dict[str, Any]]) -> Any:
+        async with self._loop_state().limit:
+            started = time.perf_counter()
+            try:
+                response = await get_async_http_client().get(
+                    self.base_url + path, params=params, headers=self.headers, timeout=self.timeout
+                )
+                body = self._json(response)
+            except asyncio.CancelledError:
+                raise  # a losing hedge, not a failure
+            except Exception:
+                record_integration(self.name, time.perf_counter() - started, error=True)
+                raise
+        record_integration(self.name, time.perf_counter() - started, error=False)
+        return body
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    # --- shared ---
+
+    def _json(self, response: httpx.Response) -> Any:
+        if response.status_code in RETRYABLE_STATUS or response.status_code >= 500:
+            raise _Retryable(f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise IntegrationError(f"{self.name} returned HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def _delay(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+class _Retryable(Exception):
+    """Internal marker for responses that should be retried."""
@@ -1,8 +1,171 @@
-"""Deploy / CI-CD integration - Jenkins, ArgoCD, GitHub Actions. Mock for Phase 1."""
-from datetime import datetime, timedelta
+"""Deploy / CI-CD integration - Jenkins, ArgoCD, GitHub Actions. Uses ArgoCD when ARGOCD_URL is set, mock data otherwise."""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any, Optional
 
+from src.config import get_settings
+from src.replay.cassette import recorded
+from .backend import BackendClient, IntegrationError, backend_options, fan_out
 
+# Workload kinds whose pod template's literal env vars count as config
+_WORKLOAD_KINDS = frozenset({"Deployment", "StatefulSet", "DaemonSet", "Rollout"})
+
+
+class ArgoCDClient(BackendClient):
+    """
+    ArgoCD application sync history, one application per service.
+
+    Each deploy's `config_diff` compares the rendered manifests of its revision with
+    the previous one's: ConfigMap data and literal container env vars, by key.
+    Revisions whose manifests can't be fetched get an empty diff.
+    """
+
+    name = "argocd"
+
+    def deploy_history(self, service: str, limit: int = 10, since: Optional[datetime] = None) -> list[dict[str, Any]]:
+        history = self.cached(
+            ("deploys", service),
+            lambda: self.parse(self.get_json(f"/api/v1/applications/{service}")),
+        )
+        deploys = _window(history, limit, since)
+        revisions = _revisions(history, deploys)
+        configs = dict(zip(revisions, fan_out(lambda revision: self.revision_config(service, revision), revisions)))
+        return _with_config_diffs(history, deploys, configs)
+
+    async def adeploy_history(
+        self, service: str, limit: int = 10, since: Optional[datetime] = None
+    ) -> list[dict[str, Any]]:
+        async def fetch():
+            return self.parse(await self.aget_json(f"/api/v1/applications/{service}"))
+
+        history = await self.acached(("deploys", service), fetch)
+        deploys = _window(history, limit, since)
+        revisions = _revisions(history, deploys)
+        configs = await asyncio.gather(*(self.arevision_config(service, revision) for revision in revisions))
+        return _with_config_diffs(history, deploys, dict(zip(revisions, configs)))
+
+    def revision_config(self, service: str, revision: str) -> Optional[dict[str, Any]]:
+        """Config of one revision (see `parse_config`), or None when its manifests are unavailable."""
+        path = f"/api/v1/applications/{service}/manifests"
+        try:
+            return self.cached(
+                ("config", service, revision),
+                lambda: self.parse_config(self.get_json(path, {"revision": revision})),
+            )
+        except IntegrationError:
+            return None
+
+    async def arevision_config(self, service: str, revision: str) -> Optional[dict[str, Any]]:
+        path = f"/api/v1/applications/{service}/manifests"
+
+        async def fetch():
+            return self.parse_config(await self.aget_json(path, {"revision": revision}))
+
+        try:
+            return await self.acached(("config", service, revision), fetch)
+        except IntegrationError:
+            return None
+
+    @staticmethod
+    def parse_config(body: dict[str, Any]) -> dict[str, Any]:
+        """Flat config of a revision's rendered manifests: ConfigMap data and literal container env vars."""
+        config: dict[str, Any] = {}
+        for raw in body.get("manifests") or []:
+            manifest = json.loads(raw) if isinstance(raw, str) else raw
+            kind = manifest.get("kind")
+            if kind == "ConfigMap":
+                config.update(manifest.get("data") or {})
+            elif kind in _WORKLOAD_KINDS:
+                pod = manifest.get("spec", {}).get("template", {}).get("spec", {})
+                for container in pod.get("containers", []):
+                    config.update({env["name"]: env["value"] for env in container.get("env", []) if "value" in env})
+        return config
+
+    @staticmethod
+    def parse(body: dict[str, Any]) -> list[dict[str, Any]]:
+        """Sync history, newest first. ArgoCD only records successful syncs in history."""
+        deploys = []
+        for entry in body.get("status", {}).get("history", []):
+            revision = entry.get("revision", "")
+            source = entry.get("source", {})
+            deploys.append(
+                {
+                    "deploy_id": f"argocd-{entry.get('id')}",
+                    "version": source.get("targetRevision") or revision[:7],
+                    "timestamp": _naive_iso(entry.get("deployedAt")),
+                    "commit": revision[:7],
+                    "revision": revision,
+                    "branch": source.get("targetRevision", ""),
+                    "status": "success",
+                    "config_diff": {},
+                }
+            )
+        deploys.sort(key=lambda d: d["timestamp"], reverse=True)
+        return deploys
+
+
+def _naive_iso(value: Optional[str]) -> str:
+    """ArgoCD timestamps are RFC 3339 UTC; the rest of the pipeline uses naive UTC ISO strings."""
+    if not value:
+        return ""
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ts.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _window(deploys: list[dict[str, Any]], limit: int, since: Optional[datetime]) -> list[dict[str, Any]]:
+    cutoff = since.isoformat() if since else ""
+    return [d for d in deploys if d["timestamp"] >= cutoff][:limit]
+
+
+def _previous(history: list[dict[str, Any]], deploy: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """The deploy before `deploy` in a newest-first history."""
+    index = history.index(deploy)
+    return history[index + 1] if index + 1 < len(history) else None
+
+
+def _revisions(history: list[dict[str, Any]], deploys: list[dict[str, Any]]) -> list[str]:
+    """Revisions whose config is needed to diff `deploys`: each one's and its predecessor's."""
+    revisions: dict[str, None] = {}
+    for deploy in deploys:
+        previous = _previous(history, deploy)
+        if previous is not None and deploy["revision"] and previous["revision"]:
+            revisions.update({deploy["revision"]: None, previous["revision"]: None})
+    return list(revisions)
+
+
+def _with_config_diffs(
+    history: list[dict[str, Any]], deploys: list[dict[str, Any]], configs: dict[str, Optional[dict[str, Any]]]
+) -> list[dict[str, Any]]:
+    """Copies of `deploys` (the history is cached and shared) with `config_diff` filled in."""
+    result = []
+    for deploy in deploys:
+        previous = _previous(history, deploy)
+        old = configs.get(previous["revision"]) if previous is not None else None
+        new = configs.get(deploy["revision"])
+        diff = {}
+        if old is not None and new is not None:
+            diff = {
+                key: {"old": old.get(key), "new": new.get(key)}
+                for key in sorted(old.keys() | new.keys())
+                if old.get(key) != new.get(key)
+            }
+        result.append({**deploy, "config_diff": diff})
+    return result
+
+
+@lru_cache(maxsize=1)
+def get_deploy_client() -> Optional[ArgoCDClient]:
+    """Shared ArgoCD client, or None when no backend is configured."""
+    settings = get_settings()
+    if not settings.argocd_url:
+        return None
+    headers = {"Authorization": f"Bearer {settings.argocd_token}"} if settings.argocd_token else None
+    return ArgoCDClient(settings.argocd_url, headers=headers, **backend_options())
+
+
+@recorded("deploys")
 def fetch_deploy_history(
     service: str,
     limit: int = 10,
@@ -10,9 +173,12 @@ def fetch_deploy_history(
 ) -> list[dict[str, Any]]:
     """
     Fetch recent deployment history for a service.
-    Returns mock data in Phase 1.
+    Returns mock data when no deploy backend is configured.
     """
     since = since or datetime.utcnow() - timedelta(hours=24)
+    client = get_deploy_client()
+    if client is not None:
+        return client.deploy_history(service, limit=limit, since=since)
     return [
         {
             "deploy_id": "dpl-001",
@@ -36,3 +202,17 @@ def fetch_deploy_history(
             "config_diff": {},
         },
     ]
+
+
+@recorded("deploys")
+async def afetch_deploy_history(
+    service: str,
+    limit: int = 10,
+    since: Optional[datetime] = None,
+) -> list[dict[str, Any]]:
+    """Async variant of `fetch_deploy_history` for the asyncio pipeline."""
+    client = get_deploy_client()
+    if client is None:
+        return fetch_deploy_history(service, limit=limit, since=since)
+    since = since or datetime.utcnow() - timedelta(hours=24)
+    return await client.adeploy_history(service, limit=limit, since=since)
@@ -1,8 +1,159 @@
-"""Logs integration - Loki, CloudWatch, etc. Mock implementation for Phase 1."""
-from datetime import datetime, timedelta
-from typing import Any, Optional
+"""Logs integration - Loki, CloudWatch, etc. Uses Loki when LOKI_URL is set, mock data otherwise."""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator, Optional
 
+from src.config import get_settings
+from src.replay.cassette import recorded
+from .backend import BackendClient, backend_options
 
+
+QUERY_RANGE = "/loki/api/v1/query_range"
+
+
+class LokiClient(BackendClient):
+    """
+    Loki `query_range` client returning log records in the shape of the mock data.
+
+    `iter_logs` / `aiter_logs` page through the window oldest-first, so only one
+    page of raw lines (two on the async path, which prefetches) is held at a time;
+    each line is decoded only when the consumer pulls it.
+    """
+
+    name = "loki"
+
+    def __init__(self, base_url: str, *, selector: str = '{{service="{service}"}}', **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.selector = selector
+
+    def query_logs(self, service: str, start: datetime, end: datetime, limit: int = 100) -> list[dict[str, Any]]:
+        params = self._params(service, _nanos(start), _nanos(end), limit)
+        return self.cached(
+            ("logs", service, self.bucket(start), self.bucket(end), limit),
+            lambda: self.parse(self.get_json(QUERY_RANGE, params), service),
+        )
+
+    async def aquery_logs(
+        self, service: str, start: datetime, end: datetime, limit: int = 100
+    ) -> list[dict[str, Any]]:
+        params = self._params(service, _nanos(start), _nanos(end), limit)
+
+        async def fetch():
+            return self.parse(await self.aget_json(QUERY_RANGE, params), service)
+
+        return await self.acached(("logs", service, self.bucket(start), self.bucket(end), limit), fetch)
+
+    def iter_logs(
+        self,
+        service: str,
+        start: datetime,
+        end: datetime,
+        page_size: int = 1000,
+        max_lines: Optional[int] = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Every line in the window, oldest first, fetched one page at a time as the consumer advances."""
+        cursor, stop = _nanos(start), _nanos(end)
+        remaining = max_lines
+        while cursor < stop:
+            entries = self._entries(self.get_json(QUERY_RANGE, self._params(service, cursor, stop, page_size)))
+            for entry in entries[:remaining]:
+                yield self._record(*entry, service)
+            if remaining is not None:
+                remaining -= len(entries)
+                if remaining <= 0:
+                    return
+            if len(entries) < page_size:
+                return
+            cursor = entries[-1][0] + 1
+
+    async def aiter_logs(
+        self,
+        service: str,
+        start: datetime,
+        end: datetime,
+        page_size: int = 1000,
+        max_lines: Optional[int] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Async `iter_logs`; the next page is requested while the current one is being consumed."""
+        cursor, stop = _nanos(start), _nanos(end)
+        remaining = max_lines
+        page = asyncio.ensure_future(self.aget_json(QUERY_RANGE, self._params(service, cursor, stop, page_size)))
+        try:
+            while page is not None:
+                entries = self._entries(await page)
+                page = None
+                more = len(entries) == page_size and (remaining is None or remaining > page_size)
+                if more and entries[-1][0] + 1 < stop:
+                    cursor = entries[-1][0] + 1
+                    page = asyncio.ensure_future(
+                        self.aget_json(QUERY_RANGE, self._params(service, cursor, stop, page_size))
+                    )
+                for entry in entries[:remaining]:
+                    yield self._record(*entry, service)
+                if remaining is not None:
+                    remaining -= len(entries)
+        finally:
+            if page is not None:
+                page.cancel()
+
+    def _params(self, service: str, start_ns: int, end_ns: int, limit: int) -> dict[str, Any]:
+        return {
+            "query": self.selector.format(service=service),
+            "start": start_ns,
+            "end": end_ns,
+            "limit": limit,
+            "direction": "forward",
+        }
+
+    @staticmethod
+    def _entries(body: dict[str, Any]) -> list[tuple[int, str, dict[str, str]]]:
+        """Raw (timestamp ns, line, stream labels) of a response, oldest first across streams."""
+        entries = [
+            (int(ts), line, stream.get("stream", {}))
+            for stream in body.get("data", {}).get("result", [])
+            for ts, line in stream.get("values", [])
+        ]
+        entries.sort(key=lambda e: e[0])
+        return entries
+
+    @staticmethod
+    def _record(ts: int, line: str, labels: dict[str, str], service: str) -> dict[str, Any]:
+        """Decode one line; structured (JSON) lines are merged into the record."""
+        record: Any = None
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                pass
+        if not isinstance(record, dict) or not record:
+            record = {"message": line}
+        record["level"] = str(record.get("level") or labels.get("level", labels.get("detected_level", "INFO"))).upper()
+        record.setdefault("service", labels.get("service", service))
+        record["timestamp"] = datetime.fromtimestamp(ts / 1e9, tz=timezone.utc).replace(tzinfo=None).isoformat()
+        return record
+
+    @classmethod
+    def parse(cls, body: dict[str, Any], service: str) -> list[dict[str, Any]]:
+        """Flatten Loki streams into records, oldest first."""
+        return [cls._record(*entry, service) for entry in cls._entries(body)]
+
+
+def _nanos(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1e9)
+
+
+@lru_cache(maxsize=1)
+def get_logs_client() -> Optional[LokiClient]:
+    """Shared Loki client, or None when no backend is configured."""
+    url = get_settings().loki_url
+    return LokiClient(url, **backend_options()) if url else None
+
+
+@recorded("logs")
 def fetch_logs(
     service: str,
     start_time: Optional[datetime] = None,
@@ -11,11 +162,17 @@ def fetch_logs(
 ) -> list[dict[str, Any]]:
     """
     Fetch application logs for a service within a time range.
-    Returns mock data in Phase 1.
+    Returns mock data when no logs backend is configured.
     """
     end = end_time or datetime.utcnow()
     start = start_time or end - timedelta(minutes=15)
+    client = get_logs_client()
+    if client is not None:
+        return client.query_logs(service, start, end, limit)
+    return _mock_logs(service, start)[:limit]
+
 
+def _mock_logs(service: str, start: datetime) -> list[dict[str, Any]]:
     # Mock stack traces and errors
     return [
         {
@@ -49,3 +206,75 @@ def fetch_logs(
             "latency_ms": 4500,
         },
     ]
+
+
+@recorded("logs")
+async def afetch_logs(
+    service: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    limit: int = 100,
+) -> list[dict[str, Any]]:
+    """Async variant of `fetch_logs` for the asyncio pipeline."""
+    client = get_logs_client()
+    if client is None:
+        return fetch_logs(service, start_time=start_time, end_time=end_time, limit=limit)
+    end = end_time or datetime.utcnow()
+    start = start_time or end - timedelta(minutes=15)
+    return await client.aquery_logs(service, start, end, limit)
+
+
+
+@recorded("log_stream")
+def iter_logs(
+    service: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    page_size: Optional[int] = None,
+    max_lines: Optional[int] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Stream every log line for a service within a time range, oldest first.
+    Pages are fetched lazily, so memory does not grow with the size of the window.
+    """
+    end = end_time or datetime.utcnow()
+    start = start_time or end - timedelta(minutes=15)
+    client = get_logs_client()
+    if client is None:
+        yield from _mock_logs(service, start)[:max_lines]
+        return
+    settings = get_settings()
+    yield from client.iter_logs(
+        service,
+        start,
+        end,
+        page_size=page_size or settings.logs_page_size,
+        max_lines=max_lines if max_lines is not None else settings.logs_max_lines,
+    )
+
+
+@recorded("log_stream")
+async def aiter_logs(
+    service: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    page_size: Optional[int] = None,
+    max_lines: Optional[int] = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Async variant of `iter_logs` for the asyncio pipeline."""
+    end = end_time or datetime.utcnow()
+    start = start_time or end - timedelta(minutes=15)
+    client = get_logs_client()
+    if client is None:
+        for record in _mock_logs(service, start)[:max_lines]:
+            yield record
+        return
+    settings = get_settings()
+    async for record in client.aiter_logs(
+        service,
+        start,
+        end,
+        page_size=page_size or settings.logs_page_size,
+        max_lines=max_lines if max_lines is not None else settings.logs_max_lines,
+    ):
+        yield record
@@ -1,8 +1,116 @@
-"""Metrics integration - Prometheus, Datadog, etc. Mock implementation for Phase 1."""
-from datetime import datetime, timedelta
+"""Metrics integration - Prometheus, Datadog, etc. Uses Prometheus when PROMETHEUS_URL is set, mock data otherwise."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any, List, Optional
 
+from src.config import get_settings
+from src.replay.cassette import recorded
+from .backend import BackendClient, backend_options
 
+# Series name -> (PromQL template, key of its latest value in the result)
+DEFAULT_QUERIES = {
+    "p99": (
+        'histogram_quantile(0.99, sum(rate(http_request_duration_seconds_bucket{{service="{service}"}}[5m])) by (le)) * 1000',
+        "p99_latency_ms",
+    ),
+    "cpu": ('avg(rate(process_cpu_seconds_total{{service="{service}"}}[5m])) * 100', "cpu_percent"),
+    "error_rate": (
+        'sum(rate(http_requests_total{{service="{service}",status=~"5.."}}[5m]))'
+        ' / sum(rate(http_requests_total{{service="{service}"}}[5m]))',
+        "error_rate",
+    ),
+    "request_rate": ('sum(rate(http_requests_total{{service="{service}"}}[5m]))', "request_rate"),
+}
+
+
+class PrometheusClient(BackendClient):
+    """Prometheus `query_range` client; one range query per series, fanned out concurrently when async."""
+
+    name = "prometheus"
+
+    def __init__(self, base_url: str, *, queries: Optional[dict[str, tuple[str, str]]] = None, step: int = 30, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.queries = queries or DEFAULT_QUERIES
+        self.step = step
+
+    def query_metrics(
+        self, service: str, start: datetime, end: datetime, metrics: Optional[List[str]] = None
+    ) -> dict[str, Any]:
+        names = self._names(metrics)
+
+        def fetch():
+            series = {
+                name: self._values(self.get_json("/api/v1/query_range", self._params(name, service, start, end)))
+                for name in names
+            }
+            return self._assemble(service, start, end, series)
+
+        return self.cached(self._key(service, start, end, names), fetch)
+
+    async def aquery_metrics(
+        self, service: str, start: datetime, end: datetime, metrics: Optional[List[str]] = None
+    ) -> dict[str, Any]:
+        names = self._names(metrics)
+
+        async def fetch():
+            bodies = await asyncio.gather(
+                *(self.aget_json("/api/v1/query_range", self._params(name, service, start, end)) for name in names)
+            )
+            return self._assemble(service, start, end, {n: self._values(b) for n, b in zip(names, bodies)})
+
+        return await self.acached(self._key(service, start, end, names), fetch)
+
+    def _names(self, metrics: Optional[List[str]]) -> tuple[str, ...]:
+        return tuple(name for name in self.queries if metrics is None or name in metrics)
+
+    def _key(self, service: str, start: datetime, end: datetime, names: tuple[str, ...]) -> tuple:
+        return ("metrics", service, self.bucket(start), self.bucket(end), names)
+
+    def _params(self, name: str, service: str, start: datetime, end: datetime) -> dict[str, Any]:
+        return {
+            "query": self.queries[name][0].format(service=service),
+            "start": _unix(start),
+            "end": _unix(end),
+            "step": self.step,
+        }
+
+    @staticmethod
+    def _values(body: dict[str, Any]) -> list[float]:
+        """Values of the first series of a matrix result; Prometheus sends them as strings."""
+        result = body.get("data", {}).get("result", [])
+        if not result:
+            return []
+        return [round(float(v), 4) for _, v in result[0].get("values", [])]
+
+    def _assemble(
+        self, service: str, start: datetime, end: datetime, series: dict[str, list[float]]
+    ) -> dict[str, Any]:
+        metrics: dict[str, Any] = {
+            "service": service,
+            "time_range": {"start": start.isoformat(), "end": end.isoformat()},
+        }
+        for name, values in series.items():
+            if values:
+                metrics[self.queries[name][1]] = values[-1]
+        metrics["time_series"] = {name: values for name, values in series.items() if values}
+        return metrics
+
+
+def _unix(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+@lru_cache(maxsize=1)
+def get_metrics_client() -> Optional[PrometheusClient]:
+    """Shared Prometheus client, or None when no backend is configured."""
+    url = get_settings().prometheus_url
+    return PrometheusClient(url, **backend_options()) if url else None
+
+
+@recorded("metrics")
 def fetch_metrics(
     service: str,
     start_time: Optional[datetime] = None,
@@ -11,10 +119,13 @@ def fetch_metrics(
 ) -> dict[str, Any]:
     """
     Fetch system metrics for a service within a time range.
-    Returns mock data in Phase 1.
+    Returns mock data when no metrics backend is configured.
     """
     end = end_time or datetime.utcnow()
     start = start_time or end - timedelta(minutes=15)
+    client = get_metrics_client()
+    if client is not None:
+        return client.query_metrics(service, start, end, metrics)
 
     return {
         "service": service,
@@ -30,3 +141,19 @@ def fetch_metrics(
             "error_rate": [0.01, 0.02, 0.08, 0.15, 0.14],
         },
     }
+
+
+@recorded("metrics")
+async def afetch_metrics(
+    service: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    metrics: Optional[List[str]] = None,
+) -> dict[str, Any]:
+    """Async variant of `fetch_metrics` for the asyncio pipeline."""
+    client = get_metrics_client()
+    if client is None:
+        return fetch_metrics(service, start_time=start_time, end_time=end_time, metrics=metrics)
+    end = end_time or datetime.utcnow()
+    start = start_time or end - timedelta(minutes=15)
+    return await client.aquery_metrics(service, start, end, metrics)
@@ -0,0 +1,5 @@
+"""Investigation job queue - runs incident investigations off the request path."""
+from .queue import InvestigationQueue, QueueFullError
+from .schemas import InvestigationJob, JobStatus
+
+__all__ = ["InvestigationQueue", "QueueFullError", "InvestigationJob", "JobStatus"]
@@ -0,0 +1,96 @@
+"""Per-incident event stream - fans investigation progress out to live subscribers."""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Optional
+
+from src.state import InMemoryStateBackend, StateBackend
+
+# Event types that end a stream
+TERMINAL_EVENTS = frozenset({"completed", "failed", "shed"})
+
+
+class IncidentEventStream:
+    """
+    Append-only log of events for one incident, kept in the state backend so a
+    subscriber on any worker process sees the same stream.
+
+    Subscribers first replay the history, then receive new events as they are
+    published, until a terminal event (completed, failed, shed). `publish` never
+    blocks: events go to an outbox that one background task writes to the backend,
+    merging consecutive RCA tokens into one event while a write is in progress.
+    Writes from this process wake subscribers immediately; events from other
+    processes are picked up every `poll_interval` seconds. History is capped so a
+    long token stream cannot grow without bound; late subscribers then miss the
+    oldest events.
+    """
+
+    def __init__(
+        self,
+        incident_id: str,
+        backend: Optional[StateBackend] = None,
+        max_history: int = 5000,
+        ttl: Optional[float] = None,
+        poll_interval: float = 0.1,
+    ):
+        self.incident_id = incident_id
+        self.backend = backend or InMemoryStateBackend()
+        self.max_history = max_history
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._key = f"events:{incident_id}"
+        self._outbox: list[dict[str, Any]] = []
+        self._writer: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self.closed = False
+
+    def publish(self, event: dict[str, Any]) -> None:
+        """Queue an event for the backend; must be called on the event loop."""
+        if self.closed:
+            return
+        self._outbox.append({**event, "ts": time.time()})
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def close(self) -> None:
+        """Stop accepting events and wait until everything published is written."""
+        self.closed = True
+        while self._writer is not None and not self._writer.done():
+            await self._writer
+
+    async def subscribe(self) -> AsyncIterator[dict[str, Any]]:
+        after = 0
+        while True:
+            changed = self._changed
+            for seq, raw in await self.backend.aread(self._key, after):
+                after = seq
+                event = {"seq": seq, **json.loads(raw)}
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+            if self.closed and not self._outbox and (self._writer is None or self._writer.done()):
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _write(self) -> None:
+        while self._outbox:
+            batch, self._outbox = _coalesce_tokens(self._outbox), []
+            for event in batch:
+                entry = json.dumps(event, default=str)
+                await self.backend.aappend(self._key, entry, max_len=self.max_history, ttl=self.ttl)
+            # Waiters hold the old event, so swapping avoids clearing under a subscriber
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+
+def _coalesce_tokens(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    merged: list[dict[str, Any]] = []
+    for event in events:
+        if event.get("type") == "rca_token" and merged and merged[-1].get("type") == "rca_token":
+            merged[-1] = {**merged[-1], "text": merged[-1].get("text", "") + event.get("text", "")}
+        else:
+            merged.append(event)
+    return merged
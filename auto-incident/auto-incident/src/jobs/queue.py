@@ -0,0 +1,240 @@
+"""Bounded investigation queue that runs investigations with limited concurrency."""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Literal, Optional, Sequence
+
+from src.alert_layer.schemas import AlertEvent
+from src.state import InMemoryStateBackend, StateBackend
+from .events import IncidentEventStream
+from .schemas import InvestigationJob
+
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["reject", "shed_oldest"]
+Emit = Callable[[dict[str, Any]], None]
+Runner = Callable[[AlertEvent, str, Emit], Awaitable[dict[str, Any]]]
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is full and the overflow policy is `reject`."""
+
+
+class InvestigationQueue:
+    """
+    Accepts alerts, assigns incident IDs immediately, and runs investigations
+    on a fixed pool of asyncio workers.
+
+    Pending jobs, job records and event streams live in the state backend, so with a
+    shared backend every worker process pulls from one queue and can report on any
+    incident. Workers in the submitting process are woken immediately; others notice
+    new jobs within `poll_interval`. The size bound is checked before pushing, so
+    concurrent submitters in different processes can overshoot it slightly.
+
+    When the queue is full, `reject` raises QueueFullError (surfaced as 429)
+    and `shed_oldest` drops the oldest queued job to make room.
+
+    The runner receives an `emit` callback; everything it emits, plus the job's
+    status transitions, is published on the incident's IncidentEventStream.
+    Backend access goes through the async calls, so the event loop never waits on it.
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        max_size: int = 100,
+        concurrency: int = 4,
+        overflow_policy: OverflowPolicy = "reject",
+        max_retained: int = 1000,
+        backend: Optional[StateBackend] = None,
+        name: str = "investigations",
+        job_ttl: Optional[float] = 86400.0,
+        poll_interval: float = 0.2,
+    ):
+        self.runner = runner
+        self.max_size = max_size
+        self.concurrency = concurrency
+        self.overflow_policy = overflow_policy
+        self.max_retained = max_retained
+        self.backend = backend or InMemoryStateBackend()
+        self.name = name
+        self.job_ttl = job_ttl
+        self.poll_interval = poll_interval
+        # Jobs submitted or run by this process, kept as live objects
+        self._jobs: OrderedDict[str, InvestigationJob] = OrderedDict()
+        self._streams: dict[str, IncidentEventStream] = {}
+        self._workers: list[asyncio.Task] = []
+        self._running = 0
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        for i in range(self.concurrency):
+            self._workers.append(asyncio.create_task(self._worker(), name=f"investigation-worker-{i}"))
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def join(self) -> None:
+        """Wait until the queue is empty and this process has no investigation running."""
+        while await self.pending() or self._running:
+            await asyncio.sleep(0.01)
+
+    async def submit(
+        self, alert: AlertEvent, incident_id: Optional[str] = None, related_alerts: Sequence[AlertEvent] = ()
+    ) -> InvestigationJob:
+        """
+        Enqueue an investigation and return its job record without waiting for it to run.
+        `related_alerts` are correlated alerts investigated in the same run; the runner
+        finds them on the job (`get`).
+        """
+        job = InvestigationJob(
+            incident_id=incident_id or str(uuid.uuid4()), alert=alert, related_alerts=list(related_alerts)
+        )
+
+        if await self.pending() >= self.max_size:
+            if self.overflow_policy == "reject":
+                raise QueueFullError(f"Investigation queue is full ({self.max_size} pending)")
+            shed_id = await self.backend.apop(self._queue_key)
+            shed = await self._local_or_load(shed_id) if shed_id is not None else None
+            if shed is not None:
+                shed.status = "shed"
+                shed.finished_at = datetime.utcnow()
+                shed.error = "Dropped from a full queue in favour of a newer alert"
+                await self._save(shed)
+                await self._finish_stream(shed)
+                logger.warning("Shed queued investigation %s", shed.incident_id)
+
+        self._remember(job)
+        await self._save(job)
+        await self.backend.apush(self._queue_key, job.incident_id)
+        self._publish_status(job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, incident_id: str) -> Optional[InvestigationJob]:
+        """The job's current state, whichever worker process submitted or is running it."""
+        job = await self._load(incident_id)
+        if job is None:
+            return None
+        duplicates = await self.backend.aget(self._key(incident_id, "duplicates"))
+        if duplicates is not None:
+            job.duplicate_count = int(duplicates)
+            last = await self.backend.aget(self._key(incident_id, "last_duplicate_at"))
+            job.last_duplicate_at = datetime.fromisoformat(last) if last else None
+        return job
+
+    async def events(self, incident_id: str) -> Optional[IncidentEventStream]:
+        stream = self._streams.get(incident_id)
+        if stream is None and await self._load(incident_id) is not None:
+            stream = self._stream(incident_id)
+        return stream
+
+    async def attach_duplicate(self, incident_id: str) -> Optional[InvestigationJob]:
+        """Count a duplicate alert against an existing job instead of starting a new run."""
+        if await self._load(incident_id) is None:
+            return None
+        # Counted in their own keys so they don't race the running worker's job writes
+        await self.backend.aincr(self._key(incident_id, "duplicates"), ttl=self.job_ttl)
+        await self.backend.aset(
+            self._key(incident_id, "last_duplicate_at"), datetime.utcnow().isoformat(), ttl=self.job_ttl
+        )
+        job = await self.get(incident_id)
+        local = self._jobs.get(incident_id)
+        if local is not None:
+            local.duplicate_count, local.last_duplicate_at = job.duplicate_count, job.last_duplicate_at
+        return job
+
+    async def is_active(self, incident_id: str) -> bool:
+        job = await self._load(incident_id)
+        return job is not None and job.status in ("queued", "running")
+
+    async def pending(self) -> int:
+        """Jobs waiting in the shared queue, across all worker processes."""
+        return await self.backend.alength(self._queue_key)
+
+    @property
+    def _queue_key(self) -> str:
+        return f"{self.name}:queue"
+
+    def _key(self, incident_id: str, field: str = "job") -> str:
+        return f"{self.name}:{field}:{incident_id}"
+
+    async def _save(self, job: InvestigationJob) -> None:
+        data = job.model_dump_json(exclude={"duplicate_count", "last_duplicate_at"})
+        await self.backend.aset(self._key(job.incident_id), data, ttl=self.job_ttl)
+
+    async def _load(self, incident_id: str) -> Optional[InvestigationJob]:
+        data = await self.backend.aget(self._key(incident_id))
+        return InvestigationJob.model_validate_json(data) if data is not None else None
+
+    async def _local_or_load(self, incident_id: str) -> Optional[InvestigationJob]:
+        return self._jobs.get(incident_id) or await self._load(incident_id)
+
+    def _stream(self, incident_id: str) -> IncidentEventStream:
+        stream = self._streams.get(incident_id)
+        if stream is None:
+            stream = IncidentEventStream(incident_id, self.backend, ttl=self.job_ttl, poll_interval=self.poll_interval)
+        return stream
+
+    def _remember(self, job: InvestigationJob) -> None:
+        self._jobs[job.incident_id] = job
+        self._streams[job.incident_id] = self._stream(job.incident_id)
+        # Evict the oldest finished jobs so a long-running server stays bounded
+        while len(self._jobs) > self.max_retained:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self._jobs[oldest_id]
+            self._streams.pop(oldest_id, None)
+
+    def _publish_status(self, job: InvestigationJob) -> None:
+        self._stream(job.incident_id).publish({"type": "status", "status": job.status})
+
+    async def _finish_stream(self, job: InvestigationJob) -> None:
+        stream = self._stream(job.incident_id)
+        stream.publish({"type": job.status, "result": job.result, "error": job.error})
+        await stream.close()
+
+    async def _worker(self) -> None:
+        while True:
+            incident_id = await self.backend.apop(self._queue_key)
+            if incident_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job = await self._local_or_load(incident_id)
+            if job is None or job.status != "queued":
+                continue
+            self._running += 1
+            try:
+                self._remember(job)
+                await self._run(job)
+            finally:
+                self._running -= 1
+
+    async def _run(self, job: InvestigationJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        await self._save(job)
+        self._publish_status(job)
+        stream = self._stream(job.incident_id)
+        try:
+            job.result = await self.runner(job.alert, job.incident_id, stream.publish)
+            job.status = "completed"
+        except Exception as e:
+            logger.exception("Investigation %s failed", job.incident_id)
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.utcnow()
+            await self._save(job)
+            await self._finish_stream(job)
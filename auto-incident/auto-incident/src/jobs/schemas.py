@@ -0,0 +1,32 @@
+"""Investigation job schemas."""
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from src.alert_layer.schemas import AlertEvent
+
+
+JobStatus = Literal["queued", "running", "completed", "failed", "shed"]
+
+
+class InvestigationJob(BaseModel):
+    """A queued or running investigation of an alert, or of a cluster of correlated alerts."""
+
+    incident_id: str
+    alert: AlertEvent
+    related_alerts: list[AlertEvent] = Field(default_factory=list)
+    status: JobStatus = "queued"
+    duplicate_count: int = 0
+    last_duplicate_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_response(self) -> dict[str, Any]:
+        """Serialize for the API, leaving out the raw alert payload."""
+        return self.model_dump(
+            mode="json", exclude={"alert": {"raw_payload"}, "related_alerts": {"__all__": {"raw_payload"}}}
+        )
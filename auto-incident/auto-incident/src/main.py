@@ -1,20 +1,79 @@
 """Main entrypoint - FastAPI webhook and pipeline."""
+import asyncio
+import json
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Optional, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from src.alert_layer import parse_alert
+from src.alert_layer import AlertCluster, AlertDeduplicator, cluster_alerts, parse_alert, parse_alerts
 from src.agents import CommanderAgent
+from src.agents.llm_cache import get_llm_cache
+from src.agents.llm_scheduler import get_llm_scheduler
+from src.config import get_settings
+from src.instrumentation import REGISTRY
+from src.integrations import aclose_http_clients
+from src.jobs import InvestigationQueue, QueueFullError
+from src.memory import SimilarIncidentIndex, SQLiteIncidentStore, WriteBehindStore
+from src.state import get_state_backend
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.commander = CommanderAgent()
+    settings = get_settings()
+    # Job queue, event streams, dedup and the LLM cache are shared by every worker process
+    # through the state backend; the incident store is a SQLite file they all open.
+    backend = get_state_backend()
+    store = WriteBehindStore(
+        SQLiteIncidentStore(settings.incident_store_path),
+        batch_size=settings.incident_store_batch_size,
+        flush_interval=settings.incident_store_flush_seconds,
+    )
+    index = SimilarIncidentIndex()
+    commander = CommanderAgent(store=store, index=index)
+    # Agents, LLM clients, the graph and the similar-incident index are built in the
+    # background, so the worker starts serving right away; an investigation arriving
+    # first waits for the build, and may miss a past incident not yet indexed.
+    warm_up = asyncio.create_task(asyncio.to_thread(commander.warm_up))
+    load_index = asyncio.create_task(asyncio.to_thread(lambda: index.add_many(store.recent_outcomes(limit=1000))))
+
+    async def investigate(alert, incident_id, emit):
+        # A correlated cluster's other alerts travel on the job record
+        job = await queue.get(incident_id)
+        related = job.related_alerts if job is not None else []
+        return await commander.arun(alert, incident_id=incident_id, on_event=emit, related_alerts=related)
+
+    queue = InvestigationQueue(
+        runner=investigate,
+        max_size=settings.investigation_queue_size,
+        concurrency=settings.max_concurrent_investigations,
+        overflow_policy=settings.queue_overflow_policy,
+        backend=backend,
+        job_ttl=settings.job_retention_seconds,
+    )
+    await queue.start()
+    app.state.commander = commander
+    app.state.queue = queue
+    app.state.store = store
+    app.state.dedup = AlertDeduplicator(
+        window_seconds=settings.alert_dedup_window_seconds,
+        is_active=queue.is_active,
+        backend=backend if settings.state_backend != "memory" else None,
+    )
     yield
+    await asyncio.gather(warm_up, load_index, return_exceptions=True)
+    await queue.stop()
+    store.close()
+    await aclose_http_clients()
     app.state.commander = None
+    app.state.queue = None
+    app.state.store = None
+    app.state.dedup = None
 
 
 app = FastAPI(
@@ -33,20 +92,156 @@ app.add_middleware(
 )
 
 
-@app.post("/webhook/alert")
-def handle_alert(payload: dict):
+@app.post("/webhook/alert", status_code=202)
+async def handle_alert(payload: dict, request: Request):
     """
-    Receive alert from Prometheus, Datadog, PagerDuty, or generic webhook.
-    Triggers full investigation pipeline and returns RCA.
+    Receive alert from Alertmanager, Grafana, Datadog, PagerDuty, CloudWatch (SNS), or generic webhook.
+    The source is detected from the headers (`X-Alert-Source` forces one) or the payload.
+    Grouped Alertmanager notifications are expanded into all their alerts, and
+    alerts matching an in-flight incident are attached to it instead of starting
+    a new investigation. Returns incident IDs immediately; poll
+    `GET /incidents/{incident_id}` for status and the RCA. Resolved notifications
+    start nothing (`incidents` is empty).
     """
     try:
-        alert = parse_alert(payload)
+        alerts = parse_alerts(payload, request.headers)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid alert payload: {e}")
+    if not alerts:
+        return {"incident_id": None, "status": "resolved", "deduplicated": False, "incidents": []}
 
-    commander: CommanderAgent = app.state.commander
-    result = commander.run(alert)
-    return result
+    incidents = []
+    for alert in alerts:
+        try:
+            incidents.append(await _enqueue(AlertCluster(primary=alert)))
+        except QueueFullError as e:
+            if not incidents:
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+            incidents.append({"incident_id": None, "status": "rejected", "deduplicated": False})
+
+    return {**incidents[0], "incidents": incidents}
+
+
+@app.post("/webhook/alerts:batch", status_code=202)
+async def handle_alert_batch(payload: Union[list[dict], dict], request: Request):
+    """
+    Receive many alerts at once: a list of webhook payloads (or one grouped Alertmanager
+    notification). Alerts that fired within ALERT_CORRELATION_WINDOW_SECONDS of each other
+    on the same or dependent services (SERVICE_DEPENDENCIES) form a cluster, and each
+    cluster gets one investigation covering all of its services. Resolved alerts are skipped.
+    """
+    items = payload if isinstance(payload, list) else [payload]
+    if not items:
+        raise HTTPException(status_code=400, detail="No alerts in the batch")
+    try:
+        alerts = [alert for item in items for alert in parse_alerts(item, request.headers)]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid alert payload: {e}")
+
+    settings = get_settings()
+    clusters = cluster_alerts(alerts, settings.alert_correlation_window_seconds, settings.service_dependencies)
+    incidents = []
+    for cluster in clusters:
+        summary = {"services": cluster.services, "alerts": len(cluster.alerts)}
+        try:
+            incidents.append({**await _enqueue(cluster), **summary})
+        except QueueFullError as e:
+            if not incidents:
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+            incidents.append({"incident_id": None, "status": "rejected", "deduplicated": False, **summary})
+
+    return {"alerts": len(alerts), "incidents": incidents}
+
+
+async def _enqueue(cluster: AlertCluster) -> dict:
+    """
+    Attach the cluster to the in-flight incident of any of its alerts, or queue a new
+    investigation for it. Raises QueueFullError when the queue rejects it.
+    """
+    queue: InvestigationQueue = app.state.queue
+    dedup: AlertDeduplicator = app.state.dedup
+    for alert in cluster.alerts:
+        existing_id = await dedup.acheck(alert)
+        if existing_id is not None and await queue.attach_duplicate(existing_id) is not None:
+            job = await queue.get(existing_id)
+            return {"incident_id": job.incident_id, "status": job.status, "deduplicated": True}
+
+    job = await queue.submit(cluster.primary, related_alerts=cluster.related)
+    for alert in cluster.alerts:
+        await dedup.arecord(alert, job.incident_id)
+    return {"incident_id": job.incident_id, "status": job.status, "deduplicated": False}
+
+
+@app.get("/incidents")
+def list_incidents(
+    service: Optional[str] = None,
+    trigger_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Past investigations from the incident store, newest first."""
+    items, total = app.state.store.list(
+        service=service,
+        trigger_type=trigger_type,
+        since=since,
+        until=until,
+        limit=limit,
+        offset=offset,
+    )
+    return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+
+@app.get("/incidents/{incident_id}")
+async def get_incident(incident_id: str):
+    """
+    Return status of a queued or finished investigation, including the RCA once complete.
+    Any worker can answer, whichever one is running the investigation. Falls back to the
+    incident store for investigations no longer held by the queue.
+    """
+    queue: InvestigationQueue = app.state.queue
+    job = await queue.get(incident_id)
+    if job is not None:
+        return job.to_response()
+    # The store is blocking SQLite
+    record = await asyncio.to_thread(app.state.store.get, incident_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Incident {incident_id} not found")
+    return {
+        "incident_id": record.incident_id,
+        "status": "completed",
+        "created_at": record.created_at,
+        "result": {
+            "incident_id": record.incident_id,
+            "alert": {"trigger_type": record.trigger_type, "service": record.service},
+            "rca": record.rca,
+        },
+        "findings": [f.model_dump() for f in record.findings],
+    }
+
+
+@app.get("/incidents/{incident_id}/stream")
+async def stream_incident(incident_id: str):
+    """
+    Server-Sent Events stream of an investigation: status changes, graph node
+    transitions, agent findings as they land and RCA tokens as the LLM produces
+    them. Ends with a `completed` or `failed` event carrying the result.
+    """
+    queue: InvestigationQueue = app.state.queue
+    stream = await queue.events(incident_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail=f"Incident {incident_id} not found")
+
+    async def sse():
+        async for event in stream.subscribe():
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/health")
@@ -54,6 +249,27 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: node, LLM and backend latency histograms, token and cache counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/llm/cache")
+def llm_cache_stats():
+    """Hit/miss counters and size of the shared LLM response cache."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/llm/scheduler")
+def llm_scheduler_stats():
+    """Per-provider LLM limits, in-flight requests, queue depth by priority lane and token budget."""
+    return get_llm_scheduler().stats()
+
+
 # Serve frontend last so API routes take precedence
 frontend_dir = Path(__file__).resolve().parent.parent / "frontend"
 if frontend_dir.exists():
@@ -75,6 +291,5 @@ def run_cli(alert_service: str = "api-gateway", trigger_type: str = "latency_spi
 
 
 if __name__ == "__main__":
-    import json
     result = run_cli()
     print(json.dumps(result, indent=2))
@@ -1,5 +1,24 @@
 """Shared Incident Memory - central store for findings, hypotheses, evidence."""
+from .context import ContextBuilder
+from .entries import EvidenceEntry, FindingEntry, HypothesisEntry, MemorySnapshot
 from .incident_memory import IncidentMemory
-from .schemas import Evidence, Finding, Hypothesis
+from .schemas import Evidence, Finding, Hypothesis, IncidentRecord
+from .similar_incidents import SimilarIncidentIndex
+from .store import IncidentStore, SQLiteIncidentStore, WriteBehindStore
 
-__all__ = ["IncidentMemory", "Finding", "Hypothesis", "Evidence"]
+__all__ = [
+    "IncidentMemory",
+    "ContextBuilder",
+    "MemorySnapshot",
+    "FindingEntry",
+    "HypothesisEntry",
+    "EvidenceEntry",
+    "Finding",
+    "Hypothesis",
+    "Evidence",
+    "IncidentRecord",
+    "IncidentStore",
+    "SQLiteIncidentStore",
+    "WriteBehindStore",
+    "SimilarIncidentIndex",
+]
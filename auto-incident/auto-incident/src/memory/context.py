@@ -0,0 +1,220 @@
+"""Token-budgeted, compact rendering of incident memory for LLM prompts."""
+import math
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from src.alert_layer.schemas import AlertEvent
+from src.analysis.log_templates import LogTemplateMiner
+from src.config import get_settings
+
+if TYPE_CHECKING:
+    from .entries import MemorySnapshot
+
+
+# Rough chars-per-token ratio for English/JSON text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+MAX_SERIES_POINTS = 8
+MAX_LOG_TEMPLATES = 30
+
+# Which evidence matters most for each trigger type (higher = rendered first)
+_SOURCE_RELEVANCE = {
+    "latency_spike": {"metric_anomalies": 4, "metrics": 3, "similar_incidents": 2, "deploy_history": 2, "logs": 1},
+    "error_rate": {"logs": 3, "metric_anomalies": 3, "similar_incidents": 2, "deploy_history": 2, "metrics": 1},
+    "saturation": {"metric_anomalies": 4, "metrics": 3, "deploy_history": 2, "similar_incidents": 2, "logs": 1},
+    "availability": {"logs": 3, "deploy_history": 3, "metric_anomalies": 2, "similar_incidents": 2, "metrics": 1},
+    "crashloop": {"logs": 4, "deploy_history": 3, "similar_incidents": 2, "metric_anomalies": 1, "metrics": 1},
+    "traffic_anomaly": {"metric_anomalies": 4, "metrics": 3, "deploy_history": 2, "similar_incidents": 2, "logs": 1},
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_context_budget(model: Optional[str] = None) -> int:
+    """Prompt context budget in tokens for a model (CONTEXT_TOKEN_BUDGETS overrides the default)."""
+    settings = get_settings()
+    model = model or settings.llm_model
+    return settings.context_token_budgets.get(model, settings.context_token_budget)
+
+
+def render_alert_header(alert: AlertEvent, related: Iterable[AlertEvent] = ()) -> str:
+    """The alert line of a prompt, plus a line listing the alerts correlated with it."""
+    header = f"Alert: {alert.trigger_type} on service {alert.service}"
+    related = list(related)
+    if related:
+        header += "\nCorrelated alerts: " + ", ".join(f"{a.trigger_type} on {a.service}" for a in related)
+    return header
+
+
+def render_log_templates(templates: Iterable[dict[str, Any]], total: Optional[int] = None) -> str:
+    """One line per mined template: count, levels, template, time span, exemplar traces and frames."""
+    lines = [f"{total} log lines" + (":" if templates else "")] if total is not None else []
+    for t in templates:
+        levels = "/".join(t["levels"])
+        line = f"{t['count']}x {levels} {t['template']} [{t['first_seen']} .. {t['last_seen']}]"
+        if t.get("trace_ids"):
+            line += f" traces={','.join(t['trace_ids'])}"
+        if t.get("stack"):
+            line += f" | {t['stack']}"
+        lines.append(line)
+    return "\n".join(lines) if lines else "(no logs)"
+
+
+def render_logs(logs: Iterable[dict[str, Any]], top: int = MAX_LOG_TEMPLATES) -> str:
+    """Mine raw log records into templates and render them compactly."""
+    miner = LogTemplateMiner().consume(logs)
+    return render_log_templates(miner.summary(top))
+
+
+def _downsample(values: list, points: int = MAX_SERIES_POINTS) -> list:
+    if len(values) <= points:
+        return values
+    step = (len(values) - 1) / (points - 1)
+    return [values[round(i * step)] for i in range(points)]
+
+
+def render_metric_values(metrics: dict[str, Any]) -> str:
+    """Current scalar metric values on one line."""
+    return ", ".join(
+        f"{k}={v}" for k, v in metrics.items()
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    )
+
+
+def render_metrics(metrics: dict[str, Any]) -> str:
+    """Current metric values plus downsampled time series with min/max/last."""
+    scalars = render_metric_values(metrics)
+    lines = [scalars] if scalars else []
+    for name, values in metrics.get("time_series", {}).items():
+        if not values:
+            continue
+        lines.append(
+            f"{name}: {_downsample(list(values))} (min={min(values)}, max={max(values)}, last={values[-1]})"
+        )
+    return "\n".join(lines) if lines else "(no metrics)"
+
+
+def render_config_diff(diff: dict[str, Any]) -> str:
+    """Config diff summarized as `key old->new`, comma separated."""
+    return ", ".join(
+        f"{key} {change.get('old')}->{change.get('new')}" if isinstance(change, dict) else f"{key}={change}"
+        for key, change in diff.items()
+    )
+
+
+def render_deploys(deploys: Iterable[dict[str, Any]]) -> str:
+    """One line per deployment with its config diff summarized as old->new."""
+    lines = []
+    for d in deploys:
+        diff = render_config_diff(d.get("config_diff") or {})
+        line = f"{d.get('version', '?')} ({d.get('deploy_id', '?')}) at {d.get('timestamp', '?')} {d.get('status', '')}".rstrip()
+        if d.get("service"):
+            line = f"{d['service']}: {line}"
+        if diff:
+            line += f"; config: {diff}"
+        lines.append(line)
+    return "\n".join(lines) if lines else "(no deployments)"
+
+
+def render_evidence(source: str, data: Any) -> str:
+    if isinstance(data, dict):
+        if source == "logs" and "templates" in data:
+            return render_log_templates(data["templates"], data.get("total_lines"))
+        if source == "logs" and "logs" in data:
+            return render_logs(data["logs"])
+        if source == "metrics":
+            return render_metrics(data)
+        if source in ("metric_anomalies", "similar_incidents") and "summary" in data:
+            return data["summary"]
+        if source == "deploy_history" and "deployments" in data:
+            return render_deploys(data["deployments"])
+    return str(data)
+
+
+def _label(evidence) -> str:
+    """Evidence source, with its service when the incident spans several."""
+    service = evidence.data.get("service") if isinstance(evidence.data, dict) else None
+    return f"{evidence.source} ({service})" if service else evidence.source
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(0, max_chars - 3)] + "..."
+
+
+class ContextBuilder:
+    """
+    Builds the shared context string for agents and the decision engine.
+
+    Findings come first (highest confidence first), then hypotheses, then evidence
+    ranked by relevance to the alert. Items are added until the token budget is
+    spent; the last item that does not fit is truncated. Rendered evidence is
+    cached by evidence ID, since evidence is never modified after it is added.
+    """
+
+    def __init__(self):
+        self._rendered: dict[str, str] = {}
+
+    def build(
+        self,
+        memory: "MemorySnapshot",
+        alert: Optional[AlertEvent] = None,
+        max_tokens: Optional[int] = None,
+        exclude: Iterable[str] = (),
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        `exclude` drops evidence from those sources, e.g. when the prompt renders it separately.
+        Without `max_tokens`, the budget is `model`'s (see `get_context_budget`).
+        """
+        budget = max_tokens if max_tokens is not None else get_context_budget(model)
+        sections: list[tuple[str, list[str]]] = []
+
+        findings = sorted(memory.findings, key=lambda f: f.confidence, reverse=True)
+        if findings:
+            sections.append(
+                ("## Findings", [f"- [{f.agent}] {f.content} (confidence: {f.confidence})" for f in findings])
+            )
+        if memory.hypotheses:
+            sections.append(("## Hypotheses", [f"- {h.description}" for h in memory.hypotheses]))
+        excluded = set(exclude)
+        evidence = [e for e in memory.evidence if e.source not in excluded]
+        if evidence:
+            evidence.sort(key=lambda e: self._relevance(e.source, alert), reverse=True)
+            sections.append(("## Evidence", [f"- [{e.id}] {_label(e)}:\n{self._render(e)}" for e in evidence]))
+
+        if not sections:
+            return "(No findings yet)"
+
+        parts: list[str] = []
+        remaining = budget
+        for header, items in sections:
+            if remaining <= 0:
+                break
+            parts.append(("\n" if parts else "") + header)
+            remaining -= estimate_tokens(header)
+            for item in items:
+                cost = estimate_tokens(item)
+                if cost > remaining:
+                    if remaining > 0:
+                        parts.append(_truncate(item, remaining))
+                    remaining = 0
+                    break
+                parts.append(item)
+                remaining -= cost
+        return "\n".join(parts)
+
+    def _render(self, evidence) -> str:
+        rendered = self._rendered.get(evidence.id)
+        if rendered is None:
+            rendered = render_evidence(evidence.source, evidence.data)
+            self._rendered[evidence.id] = rendered
+        return rendered
+
+    @staticmethod
+    def _relevance(source: str, alert: Optional[AlertEvent]) -> int:
+        if alert is None:
+            return 0
+        return _SOURCE_RELEVANCE.get(alert.trigger_type, {}).get(source, 0)
@@ -0,0 +1,44 @@
+"""Compact in-memory records for a running investigation; converted to schemas at the store/API boundary."""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Union
+
+from .schemas import Evidence, Finding, Hypothesis
+
+
+@dataclass(frozen=True, slots=True)
+class FindingEntry:
+    agent: str
+    content: str
+    confidence: float
+
+    def to_model(self) -> Finding:
+        return Finding(agent=self.agent, content=self.content, confidence=self.confidence)
+
+
+@dataclass(frozen=True, slots=True)
+class HypothesisEntry:
+    description: str
+    supporting_evidence_ids: List[str] = field(default_factory=list)
+
+    def to_model(self) -> Hypothesis:
+        return Hypothesis(description=self.description, supporting_evidence_ids=self.supporting_evidence_ids)
+
+
+@dataclass(frozen=True, slots=True)
+class EvidenceEntry:
+    id: str
+    source: str
+    data: Union[str, Dict[str, Any]]
+
+    def to_model(self) -> Evidence:
+        return Evidence(id=self.id, source=self.source, data=self.data)
+
+
+@dataclass(frozen=True, slots=True)
+class MemorySnapshot:
+    """Consistent view of an IncidentMemory at one version; never changes once taken."""
+
+    version: int
+    findings: tuple[FindingEntry, ...] = ()
+    hypotheses: tuple[HypothesisEntry, ...] = ()
+    evidence: tuple[EvidenceEntry, ...] = ()
@@ -1,57 +1,148 @@
 """Shared Incident Memory - stores findings, hypotheses, evidence for an incident."""
+import itertools
+import threading
 import uuid
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
-from .schemas import Evidence, Finding, Hypothesis
+from src.alert_layer.schemas import AlertEvent
+from src.instrumentation import timed_stage
+from .context import ContextBuilder
+from .entries import EvidenceEntry, FindingEntry, HypothesisEntry, MemorySnapshot
+from .schemas import IncidentRecord
 
 
 class IncidentMemory:
-    """Central memory store for a single incident investigation."""
+    """
+    Central memory store for a single incident investigation.
+    For a correlated cluster, `related_alerts` are the alerts investigated alongside
+    `alert`, and findings and evidence for all of their services land here.
 
-    def __init__(self, incident_id: Optional[str] = None):
+    Agents write from several threads at once (parallel graph branches, per-service
+    fetches), so writes take a short lock and bump `version`. Readers work on an
+    immutable `snapshot()`; `findings`, `hypotheses` and `evidence` are the current
+    snapshot's tuples. Evidence IDs are sequential within the incident.
+    """
+
+    def __init__(
+        self,
+        incident_id: Optional[str] = None,
+        alert: Optional[AlertEvent] = None,
+        related_alerts: Iterable[AlertEvent] = (),
+    ):
         self.incident_id = incident_id or str(uuid.uuid4())
-        self.findings: list[Finding] = []
-        self.hypotheses: list[Hypothesis] = []
-        self.evidence: list[Evidence] = []
-        self._evidence_ids: set[str] = set()
+        self.alert = alert
+        self.related_alerts = list(related_alerts)
+        self._findings: list[FindingEntry] = []
+        self._hypotheses: list[HypothesisEntry] = []
+        self._evidence: list[EvidenceEntry] = []
+        self._evidence_seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = MemorySnapshot(version=0)
+        # (max_tokens, exclude) -> (version, context)
+        self._contexts: dict[tuple, tuple[int, str]] = {}
+        self._context_builder = ContextBuilder()
+
+    @property
+    def version(self) -> int:
+        """Incremented on every write."""
+        return self._version
+
+    @property
+    def findings(self) -> tuple[FindingEntry, ...]:
+        return self.snapshot().findings
+
+    @property
+    def hypotheses(self) -> tuple[HypothesisEntry, ...]:
+        return self.snapshot().hypotheses
+
+    @property
+    def evidence(self) -> tuple[EvidenceEntry, ...]:
+        return self.snapshot().evidence
 
     def add_finding(self, agent: str, content: str, confidence: float = 0.8) -> None:
-        self.findings.append(
-            Finding(agent=agent, content=content, confidence=confidence)
-        )
+        if not 0.0 <= confidence <= 1.0:
+            raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+        entry = FindingEntry(agent, content, confidence)
+        with self._lock:
+            self._findings.append(entry)
+            self._version += 1
 
     def add_hypothesis(self, description: str, supporting_evidence_ids: Optional[List[str]] = None) -> None:
-        self.hypotheses.append(
-            Hypothesis(
-                description=description,
-                supporting_evidence_ids=supporting_evidence_ids or [],
-            )
-        )
+        entry = HypothesisEntry(description, list(supporting_evidence_ids or ()))
+        with self._lock:
+            self._hypotheses.append(entry)
+            self._version += 1
 
     def add_evidence(self, source: str, data: Union[str, Dict[str, Any]]) -> str:
-        ev_id = str(uuid.uuid4())[:8]
-        self.evidence.append(Evidence(id=ev_id, source=source, data=data))
-        self._evidence_ids.add(ev_id)
+        with self._lock:
+            ev_id = f"ev-{next(self._evidence_seq)}"
+            self._evidence.append(EvidenceEntry(ev_id, source, data))
+            self._version += 1
         return ev_id
 
-    def get_context(self) -> str:
-        """Build context string for downstream agents and decision engine."""
-        parts = []
+    def snapshot(self) -> MemorySnapshot:
+        """Consistent view of findings, hypotheses and evidence; rebuilt only after a write."""
+        snapshot = self._snapshot
+        if snapshot.version == self._version:
+            return snapshot
+        with self._lock:
+            if self._snapshot.version != self._version:
+                self._snapshot = MemorySnapshot(
+                    version=self._version,
+                    findings=tuple(self._findings),
+                    hypotheses=tuple(self._hypotheses),
+                    evidence=tuple(self._evidence),
+                )
+            return self._snapshot
 
-        if self.findings:
-            parts.append("## Findings")
-            for f in self.findings:
-                parts.append(f"- [{f.agent}] {f.content} (confidence: {f.confidence})")
+    def services(self, alert: Optional[AlertEvent] = None) -> list[str]:
+        """Services under investigation: `alert`'s (by default this memory's alert) first, then the related alerts'."""
+        alert = alert or self.alert
+        alerts = [alert, *self.related_alerts] if alert else self.related_alerts
+        return list(dict.fromkeys(a.service for a in alerts))
 
-        if self.hypotheses:
-            parts.append("\n## Hypotheses")
-            for h in self.hypotheses:
-                parts.append(f"- {h.description}")
+    def to_record(self, rca: Optional[Dict[str, Any]] = None) -> IncidentRecord:
+        """Snapshot of this investigation for the incident store."""
+        alert = self.alert
+        snapshot = self.snapshot()
+        return IncidentRecord(
+            incident_id=self.incident_id,
+            service=alert.service if alert else "unknown",
+            trigger_type=alert.trigger_type if alert else "unknown",
+            alert=self._alert_summary(),
+            rca=rca,
+            findings=[f.to_model() for f in snapshot.findings],
+            hypotheses=[h.to_model() for h in snapshot.hypotheses],
+            evidence=[e.to_model() for e in snapshot.evidence],
+        )
 
-        if self.evidence:
-            parts.append("\n## Evidence")
-            for e in self.evidence:
-                data_str = str(e.data) if isinstance(e.data, dict) else e.data
-                parts.append(f"- [{e.id}] {e.source}: {data_str[:500]}")
+    def _alert_summary(self) -> Dict[str, Any]:
+        if self.alert is None:
+            return {}
+        summary = self.alert.model_dump(mode="json", exclude={"raw_payload"})
+        if self.related_alerts:
+            summary["related"] = [a.model_dump(mode="json", exclude={"raw_payload"}) for a in self.related_alerts]
+        return summary
 
-        return "\n".join(parts) if parts else "(No findings yet)"
+    def get_context(
+        self, max_tokens: Optional[int] = None, exclude: Iterable[str] = (), model: Optional[str] = None
+    ) -> str:
+        """
+        Build context string for downstream agents and decision engine.
+        Evidence is rendered compactly and ranked by relevance to the alert;
+        the result fits within `max_tokens` (default: the budget of `model`, the
+        caller's LLM). Evidence from the `exclude` sources is left out. The result
+        is reused until the memory changes.
+        """
+        snapshot = self.snapshot()
+        key = (max_tokens, model, frozenset(exclude))
+        cached = self._contexts.get(key)
+        if cached is not None and cached[0] == snapshot.version:
+            return cached[1]
+        with timed_stage("context_build"):
+            context = self._context_builder.build(
+                snapshot, alert=self.alert, max_tokens=max_tokens, exclude=key[2], model=model
+            )
+        self._contexts[key] = (snapshot.version, context)
+        return context
@@ -1,5 +1,6 @@
 """Shared memory schemas."""
-from typing import Any, Dict, Union
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -25,3 +26,17 @@ class Evidence(BaseModel):
     id: str
     source: str
     data: Union[str, Dict[str, Any]]
+
+
+class IncidentRecord(BaseModel):
+    """A finished investigation as persisted in the incident store."""
+
+    incident_id: str
+    service: str
+    trigger_type: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    alert: Dict[str, Any] = Field(default_factory=dict)
+    rca: Optional[Dict[str, Any]] = None
+    findings: list[Finding] = Field(default_factory=list)
+    hypotheses: list[Hypothesis] = Field(default_factory=list)
+    evidence: list[Evidence] = Field(default_factory=list)
@@ -0,0 +1,116 @@
+"""Similar-incident retrieval over past investigations."""
+import re
+import threading
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from src.alert_layer.schemas import AlertEvent
+from src.analysis.log_templates import mask
+from src.analysis.similarity import TfidfIndex
+from .schemas import IncidentRecord
+
+_WORD = re.compile(r"[a-z0-9_<>*]+")
+
+# Label values that identify a replica rather than the failure mode
+_VOLATILE_LABELS = frozenset({"instance", "pod", "pod_name", "container_id", "node", "ip", "host"})
+
+# Weight of the alert signature vs. RCA/finding text when the query has both
+SIGNATURE_WEIGHT = 0.6
+
+
+def signature_tokens(alert: AlertEvent) -> list[str]:
+    """Tokens describing what fired: service, trigger type and stable labels."""
+    tokens = [f"service={alert.service}", f"trigger={alert.trigger_type}"]
+    for key, value in sorted(alert.labels.items()):
+        if key not in _VOLATILE_LABELS:
+            tokens.append(f"{key}={mask(value)}")
+    return tokens
+
+
+def text_tokens(text: str) -> list[str]:
+    return _WORD.findall(mask(text).lower())
+
+
+def _content_text(record: IncidentRecord) -> str:
+    rca = record.rca or {}
+    parts = [str(rca.get("summary", "")), str(rca.get("root_cause", ""))]
+    parts.extend(f.content for f in record.findings)
+    return " ".join(parts)
+
+
+class SimilarIncidentIndex:
+    """
+    Indexes finished incidents by alert signature and by RCA/finding text.
+
+    Lookups by alert score on the signature; free-text queries (e.g. a
+    finding summary) also score on the content, blended by SIGNATURE_WEIGHT.
+    Only a compact summary and the RCA of each incident is kept in memory.
+    """
+
+    def __init__(self, dims: int = 1024, capacity: int = 5000):
+        self._signatures = TfidfIndex(dims=dims, capacity=capacity)
+        self._contents = TfidfIndex(dims=dims, capacity=capacity)
+        self._incidents: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._incidents)
+
+    def add(self, record: IncidentRecord, alert: Optional[AlertEvent] = None) -> None:
+        if record.rca is None:
+            return
+        alert = alert or AlertEvent.model_validate(
+            {"threshold": 0, **record.alert, "service": record.service, "trigger_type": record.trigger_type}
+        )
+        with self._lock:
+            self._signatures.add(record.incident_id, signature_tokens(alert))
+            self._contents.add(record.incident_id, text_tokens(_content_text(record)))
+            self._incidents.pop(record.incident_id, None)
+            self._incidents[record.incident_id] = {
+                "incident_id": record.incident_id,
+                "service": record.service,
+                "trigger_type": record.trigger_type,
+                "created_at": record.created_at,
+                "rca": record.rca,
+            }
+            # The indexes evict oldest-first; mirror that here
+            while len(self._incidents) > len(self._signatures):
+                del self._incidents[next(iter(self._incidents))]
+
+    def add_many(self, records: Iterable[IncidentRecord]) -> None:
+        for record in records:
+            self.add(record)
+
+    def search(self, alert: AlertEvent, k: int = 3, text: str = "") -> list[dict[str, Any]]:
+        """Top-k similar past incidents, best first, each with its `score` and prior RCA."""
+        with self._lock:
+            scores = dict(self._signatures.search(signature_tokens(alert), k=k * 2))
+            if text:
+                content = dict(self._contents.search(text_tokens(text), k=k * 2))
+                scores = {
+                    key: SIGNATURE_WEIGHT * scores.get(key, 0.0) + (1 - SIGNATURE_WEIGHT) * content.get(key, 0.0)
+                    for key in scores.keys() | content.keys()
+                }
+            best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+            return [{**self._incidents[key], "score": round(score, 4)} for key, score in best]
+
+    def score(self, incident_id: str, alert: AlertEvent, text: str) -> float:
+        """Blended signature and content similarity of one past incident to `alert` plus `text`."""
+        with self._lock:
+            signature = self._signatures.score(incident_id, signature_tokens(alert))
+            content = self._contents.score(incident_id, text_tokens(text))
+        return round(SIGNATURE_WEIGHT * signature + (1 - SIGNATURE_WEIGHT) * content, 4)
+
+
+def render_similar_incidents(incidents: list[dict[str, Any]]) -> str:
+    """One line per prior incident: similarity, age and its root cause."""
+    lines = []
+    for inc in incidents:
+        rca = inc.get("rca") or {}
+        created = inc.get("created_at")
+        when = created.strftime("%Y-%m-%d %H:%M") if isinstance(created, datetime) else str(created)
+        lines.append(
+            f"- {inc['incident_id']} (similarity {inc['score']:.2f}, {when}): "
+            f"{rca.get('root_cause', '?')} | {rca.get('summary', '')}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,414 @@
+"""Persistent incident store - history of investigations, findings and RCAs."""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional
+
+from .schemas import IncidentRecord
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    incident_id TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    trigger_type TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    alert TEXT NOT NULL,
+    rca TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_incidents_created ON incidents (created_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_service ON incidents (service, created_at);
+CREATE INDEX IF NOT EXISTS idx_incidents_trigger ON incidents (trigger_type, created_at);
+
+CREATE TABLE IF NOT EXISTS findings (
+    incident_id TEXT NOT NULL REFERENCES incidents (incident_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    content TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    PRIMARY KEY (incident_id, seq)
+);
+CREATE TABLE IF NOT EXISTS hypotheses (
+    incident_id TEXT NOT NULL REFERENCES incidents (incident_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    supporting_evidence_ids TEXT NOT NULL,
+    PRIMARY KEY (incident_id, seq)
+);
+CREATE TABLE IF NOT EXISTS evidence (
+    incident_id TEXT NOT NULL REFERENCES incidents (incident_id) ON DELETE CASCADE,
+    evidence_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (incident_id, evidence_id)
+);
+"""
+
+# IDs per `IN (...)` query, under SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+
+def _iso(ts: datetime) -> str:
+    """Naive-UTC ISO string, so stored timestamps compare correctly as text."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.isoformat()
+
+
+def _summary(
+    incident_id: str, service: str, trigger_type: str, created_at: str, rca: dict[str, Any]
+) -> dict[str, Any]:
+    """One `list` item."""
+    return {
+        "incident_id": incident_id,
+        "service": service,
+        "trigger_type": trigger_type,
+        "created_at": created_at,
+        "summary": rca.get("summary"),
+        "root_cause": rca.get("root_cause"),
+    }
+
+
+class IncidentStore(ABC):
+    """Storage backend for finished investigations."""
+
+    @abstractmethod
+    def save_many(self, records: Iterable[IncidentRecord]) -> None:
+        ...
+
+    def save(self, record: IncidentRecord) -> None:
+        self.save_many([record])
+
+    @abstractmethod
+    def get(self, incident_id: str) -> Optional[IncidentRecord]:
+        ...
+
+    @abstractmethod
+    def list(
+        self,
+        service: Optional[str] = None,
+        trigger_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Incident summaries (newest first) matching the filters, plus the total match count."""
+
+    def existing(self, incident_ids: Iterable[str]) -> set[str]:
+        """Those of `incident_ids` that are stored."""
+        return {i for i in incident_ids if self.get(i) is not None}
+
+    def recent(self, limit: int = 1000) -> List[IncidentRecord]:
+        """The most recent `limit` incidents, newest first."""
+        items, _ = self.list(limit=limit)
+        return [r for r in (self.get(item["incident_id"]) for item in items) if r is not None]
+
+    def recent_outcomes(self, limit: int = 1000) -> List[IncidentRecord]:
+        """
+        The most recent `limit` incidents that have an RCA, newest first, with their
+        alert, RCA and findings only (no hypotheses or evidence).
+        """
+        return [
+            r.model_copy(update={"hypotheses": [], "evidence": []}) for r in self.recent(limit) if r.rca is not None
+        ]
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteIncidentStore(IncidentStore):
+    """SQLite store in WAL mode, so readers are never blocked by the writer."""
+
+    def __init__(self, path: str = "incidents.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(_SCHEMA)
+
+    def save_many(self, records: Iterable[IncidentRecord]) -> None:
+        records = list(records)
+        if not records:
+            return
+        with self._lock, self._db:
+            for r in records:
+                self._db.execute("DELETE FROM incidents WHERE incident_id = ?", (r.incident_id,))
+                self._db.execute(
+                    "INSERT INTO incidents (incident_id, service, trigger_type, created_at, alert, rca) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        r.incident_id,
+                        r.service,
+                        r.trigger_type,
+                        _iso(r.created_at),
+                        json.dumps(r.alert, default=str),
+                        json.dumps(r.rca, default=str) if r.rca is not None else None,
+                    ),
+                )
+                self._db.executemany(
+                    "INSERT INTO findings (incident_id, seq, agent, content, confidence) VALUES (?, ?, ?, ?, ?)",
+                    [(r.incident_id, i, f.agent, f.content, f.confidence) for i, f in enumerate(r.findings)],
+                )
+                self._db.executemany(
+                    "INSERT INTO hypotheses (incident_id, seq, description, supporting_evidence_ids) VALUES (?, ?, ?, ?)",
+                    [
+                        (r.incident_id, i, h.description, json.dumps(h.supporting_evidence_ids))
+                        for i, h in enumerate(r.hypotheses)
+                    ],
+                )
+                self._db.executemany(
+                    "INSERT INTO evidence (incident_id, evidence_id, source, data) VALUES (?, ?, ?, ?)",
+                    [(r.incident_id, e.id, e.source, json.dumps(e.data, default=str)) for e in r.evidence],
+                )
+
+    def get(self, incident_id: str) -> Optional[IncidentRecord]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM incidents WHERE incident_id = ?", (incident_id,)).fetchone()
+            if row is None:
+                return None
+            findings = self._db.execute(
+                "SELECT agent, content, confidence FROM findings WHERE incident_id = ? ORDER BY seq", (incident_id,)
+            ).fetchall()
+            hypotheses = self._db.execute(
+                "SELECT description, supporting_evidence_ids FROM hypotheses WHERE incident_id = ? ORDER BY seq",
+                (incident_id,),
+            ).fetchall()
+            evidence = self._db.execute(
+                "SELECT evidence_id, source, data FROM evidence WHERE incident_id = ? ORDER BY rowid", (incident_id,)
+            ).fetchall()
+        return IncidentRecord(
+            incident_id=row["incident_id"],
+            service=row["service"],
+            trigger_type=row["trigger_type"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            alert=json.loads(row["alert"]),
+            rca=json.loads(row["rca"]) if row["rca"] else None,
+            findings=[dict(f) for f in findings],
+            hypotheses=[
+                {"description": h["description"], "supporting_evidence_ids": json.loads(h["supporting_evidence_ids"])}
+                for h in hypotheses
+            ],
+            evidence=[{"id": e["evidence_id"], "source": e["source"], "data": json.loads(e["data"])} for e in evidence],
+        )
+
+    def existing(self, incident_ids: Iterable[str]) -> set[str]:
+        incident_ids = list(incident_ids)
+        found: set[str] = set()
+        for start in range(0, len(incident_ids), _MAX_PARAMS):
+            chunk = incident_ids[start : start + _MAX_PARAMS]
+            marks = ", ".join("?" * len(chunk))
+            with self._lock:
+                rows = self._db.execute(f"SELECT incident_id FROM incidents WHERE incident_id IN ({marks})", chunk)
+                found.update(row["incident_id"] for row in rows)
+        return found
+
+    def recent_outcomes(self, limit: int = 1000) -> List[IncidentRecord]:
+        # One query; findings come back as a JSON array per incident
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT incident_id, service, trigger_type, created_at, alert, rca, ("
+                "SELECT json_group_array(json_object('agent', agent, 'content', content, 'confidence', confidence)) "
+                "FROM (SELECT agent, content, confidence FROM findings f "
+                "WHERE f.incident_id = i.incident_id ORDER BY seq)"
+                ") AS findings FROM incidents i WHERE rca IS NOT NULL ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            IncidentRecord(
+                incident_id=row["incident_id"],
+                service=row["service"],
+                trigger_type=row["trigger_type"],
+                created_at=datetime.fromisoformat(row["created_at"]),
+                alert=json.loads(row["alert"]),
+                rca=json.loads(row["rca"]),
+                findings=json.loads(row["findings"]),
+            )
+            for row in rows
+        ]
+
+    def list(
+        self,
+        service: Optional[str] = None,
+        trigger_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        clauses, params = [], []
+        if service is not None:
+            clauses.append("service = ?")
+            params.append(service)
+        if trigger_type is not None:
+            clauses.append("trigger_type = ?")
+            params.append(trigger_type)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(_iso(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM incidents {where}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT incident_id, service, trigger_type, created_at, rca FROM incidents {where} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+
+        items = [
+            _summary(
+                row["incident_id"],
+                row["service"],
+                row["trigger_type"],
+                row["created_at"],
+                json.loads(row["rca"]) if row["rca"] else {},
+            )
+            for row in rows
+        ]
+        return items, total
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class WriteBehindStore(IncidentStore):
+    """
+    Wraps a store so `save` only enqueues; a background thread writes batches.
+
+    Keeps persistence off the investigation critical path. A batch is written
+    once it is full or `flush_interval` after its first record, whichever comes
+    first. Records not yet flushed are still served by `get` and `list`. If a
+    batch fails, its records are retried one by one, so only the failing ones
+    are lost. `close` flushes everything pending.
+    """
+
+    def __init__(self, store: IncidentStore, batch_size: int = 50, flush_interval: float = 0.5):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[Optional[IncidentRecord]] = queue.Queue()
+        self._pending: dict[str, IncidentRecord] = {}
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._writer, name="incident-store-writer", daemon=True)
+        self._thread.start()
+
+    def save_many(self, records: Iterable[IncidentRecord]) -> None:
+        for record in records:
+            with self._pending_lock:
+                self._pending[record.incident_id] = record
+            self._queue.put(record)
+
+    def get(self, incident_id: str) -> Optional[IncidentRecord]:
+        with self._pending_lock:
+            record = self._pending.get(incident_id)
+        return record or self.store.get(incident_id)
+
+    def list(
+        self,
+        service: Optional[str] = None,
+        trigger_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        with self._pending_lock:
+            pending = [
+                r for r in self._pending.values()
+                if (service is None or r.service == service)
+                and (trigger_type is None or r.trigger_type == trigger_type)
+                and (since is None or _iso(r.created_at) >= _iso(since))
+                and (until is None or _iso(r.created_at) < _iso(until))
+            ]
+        if not pending:
+            return self.store.list(service, trigger_type, since, until, limit, offset)
+        # The stored page may hold older copies of pending records; fetch enough to merge around them
+        stored, total = self.store.list(service, trigger_type, since, until, offset + limit + len(pending), 0)
+        ids = {r.incident_id for r in pending}
+        total += len(ids - self.store.existing(ids))
+        items = [i for i in stored if i["incident_id"] not in ids]
+        items += [
+            _summary(r.incident_id, r.service, r.trigger_type, _iso(r.created_at), r.rca or {}) for r in pending
+        ]
+        items.sort(key=lambda i: i["created_at"], reverse=True)
+        return items[offset : offset + limit], total
+
+    def existing(self, incident_ids: Iterable[str]) -> set[str]:
+        incident_ids = set(incident_ids)
+        with self._pending_lock:
+            pending = incident_ids & self._pending.keys()
+        return pending | self.store.existing(incident_ids - pending)
+
+    def recent_outcomes(self, limit: int = 1000) -> List[IncidentRecord]:
+        return self.store.recent_outcomes(limit)
+
+    def flush(self) -> None:
+        """Block until everything enqueued so far is written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self.store.close()
+
+    def _writer(self) -> None:
+        stop = False
+        while not stop:
+            batch: list[IncidentRecord] = []
+            item = self._queue.get()
+            taken = 1
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+                # Gather whatever else arrives within the flush interval, up to a batch
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+            try:
+                self._write(batch)
+            finally:
+                with self._pending_lock:
+                    for record in batch:
+                        if self._pending.get(record.incident_id) is record:
+                            del self._pending[record.incident_id]
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def _write(self, batch: List[IncidentRecord]) -> None:
+        try:
+            self.store.save_many(batch)
+            return
+        except Exception:
+            if len(batch) == 1:
+                logger.exception("Failed to persist incident %s", batch[0].incident_id)
+                return
+            logger.warning("Failed to persist a batch of %d incidents; retrying one by one", len(batch), exc_info=True)
+        for record in batch:
+            try:
+                self.store.save(record)
+            except Exception:
+                logger.exception("Failed to persist incident %s", record.incident_id)
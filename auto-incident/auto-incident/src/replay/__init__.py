@@ -0,0 +1,44 @@
+"""
+Incident record/replay: cassettes of integration fetches and LLM calls, and a
+runner that re-executes the graph against them.
+
+The cassette layer is light and imported by the integrations; the chat model and
+runner (which pull in LangChain and the graph) are imported on first access.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+from .cassette import Cassette, CassetteMiss, active_cassette, list_cassettes, recorded, use_cassette
+
+if TYPE_CHECKING:
+    from .llm import CassetteChatModel, replay_llm
+    from .runner import replay_cassette, replay_dir
+
+_EXPORTS = {
+    "CassetteChatModel": "llm",
+    "replay_llm": "llm",
+    "replay_cassette": "runner",
+    "replay_dir": "runner",
+}
+
+__all__ = [
+    "Cassette",
+    "CassetteMiss",
+    "active_cassette",
+    "list_cassettes",
+    "recorded",
+    "use_cassette",
+    "CassetteChatModel",
+    "replay_llm",
+    "replay_cassette",
+    "replay_dir",
+]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,42 @@
+"""
+Replay a directory of cassettes and report per-node latency and RCA changes.
+
+Usage: python -m src.replay CASSETTE_DIR [--workers 8] [--live-llm] [--output report.json]
+       [--fail-on-diff]
+
+Fetches always come from the cassettes. LLM replies do too, unless --live-llm sends
+the (possibly changed) prompts to the configured models. --fail-on-diff exits with
+status 1 when any replay errors or produces a different RCA.
+"""
+import argparse
+import json
+import sys
+
+from .runner import replay_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--live-llm", action="store_true", help="call the configured models instead of replaying replies")
+    parser.add_argument("--output", help="write the full report, with every incident, to this file")
+    parser.add_argument("--fail-on-diff", action="store_true")
+    args = parser.parse_args()
+
+    report = replay_dir(args.directory, workers=args.workers, live_llm=args.live_llm)
+    summary = {k: v for k, v in report.items() if k != "incidents"}
+    summary["changed"] = {
+        i["incident_id"]: i.get("error") or i["rca_diff"]
+        for i in report["incidents"] if i.get("error") or i["rca_changed"]
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.fail_on_diff and (report["errors"] or report["rca_changed"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
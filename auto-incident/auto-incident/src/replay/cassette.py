@@ -0,0 +1,349 @@
+"""
+Cassettes: everything an investigation read from the outside world, for offline replay.
+
+A cassette holds the alert, every integration fetch result (by kind and service, in
+call order), every LLM request and response (with the graph node that made it) and
+the resulting RCA. It is stored as gzipped JSON, one file per incident.
+
+Fetch functions opt in with `@recorded(kind)`. While a cassette is active
+(`use_cassette`), a recording cassette captures their results and a replaying one
+answers them instead of the backend.
+"""
+import asyncio
+import contextvars
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Sequence, TypeVar
+
+from src.config import get_settings
+
+FORMAT_VERSION = 1
+SUFFIX = ".cassette.json.gz"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_active: contextvars.ContextVar[Optional["Cassette"]] = contextvars.ContextVar("cassette", default=None)
+# Set inside a recorded call, so fetch functions that delegate to each other record once
+_in_fetch: contextvars.ContextVar[bool] = contextvars.ContextVar("cassette_in_fetch", default=False)
+
+
+class CassetteMiss(LookupError):
+    """A replayed call has no recorded counterpart in the cassette."""
+
+
+def prompt_key(messages: Sequence[Any]) -> str:
+    """Stable hash of a chat prompt (message types and text)."""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(f"{message.type}\x00{message.content}\x01".encode())
+    return digest.hexdigest()[:16]
+
+
+class Cassette:
+    """
+    One incident's recorded inputs. Thread-safe: fetches and LLM calls arrive from
+    parallel graph branches and fan-out threads. In replay, each fetch (kind, service)
+    and each prompt returns its recordings in order, repeating the last one if the
+    code now asks more often; an LLM prompt that changed since recording is answered
+    with the next recording made by the same graph node (counted in `stats`).
+    Streamed fetches (log lines) keep their first `max_stream_items` items.
+    """
+
+    def __init__(
+        self,
+        incident_id: str = "",
+        alert: Optional[dict[str, Any]] = None,
+        related_alerts: Sequence[dict[str, Any]] = (),
+        replaying: bool = False,
+        max_stream_items: Optional[int] = None,
+    ):
+        self.incident_id = incident_id
+        self.alert = alert or {}
+        self.related_alerts = list(related_alerts)
+        self.replaying = replaying
+        self.max_stream_items = max_stream_items
+        self.recorded_at = time.time()
+        self.fetches: dict[str, list[Any]] = {}
+        self.llm_calls: list[dict[str, Any]] = []
+        self.result: Optional[dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.stats = {"fetches": 0, "llm_exact": 0, "llm_by_node": 0}
+        self._lock = threading.Lock()
+        self._fetch_cursor: dict[str, int] = defaultdict(int)
+        self._by_prompt: dict[str, list[int]] = defaultdict(list)
+        self._by_node: dict[Optional[str], list[int]] = defaultdict(list)
+        self._used: set[int] = set()
+
+    # --- recording ---
+
+    def record_fetch(self, kind: str, service: str, value: Any) -> None:
+        with self._lock:
+            self.fetches.setdefault(f"{kind}:{service}", []).append(value)
+
+    def record_llm(self, messages: Sequence[Any], node: Optional[str], response: dict[str, Any]) -> None:
+        call = {
+            "node": node,
+            "prompt": prompt_key(messages),
+            "request": [[m.type, m.content] for m in messages],
+            "response": response,
+        }
+        with self._lock:
+            self._index(len(self.llm_calls), call)
+            self.llm_calls.append(call)
+
+    # --- replay ---
+
+    def fetch(self, kind: str, service: str) -> Any:
+        key = f"{kind}:{service}"
+        with self._lock:
+            recorded = self.fetches.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No recorded {kind} fetch for {service!r}")
+            position = self._fetch_cursor[key]
+            self._fetch_cursor[key] = position + 1
+            self.stats["fetches"] += 1
+            return recorded[min(position, len(recorded) - 1)]
+
+    def llm_response(self, messages: Sequence[Any], node: Optional[str]) -> dict[str, Any]:
+        with self._lock:
+            matches = (("llm_exact", self._by_prompt.get(prompt_key(messages))), ("llm_by_node", self._by_node.get(node)))
+            for stat, candidates in matches:
+                if candidates:
+                    index = next((i for i in candidates if i not in self._used), candidates[-1])
+                    self._used.add(index)
+                    self.stats[stat] += 1
+                    return self.llm_calls[index]["response"]
+        raise CassetteMiss(f"No recorded LLM call for node {node!r}")
+
+    def _index(self, index: int, call: dict[str, Any]) -> None:
+        self._by_prompt[call["prompt"]].append(index)
+        self._by_node[call["node"]].append(index)
+
+    # --- files ---
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "format": FORMAT_VERSION,
+            "incident_id": self.incident_id,
+            "recorded_at": self.recorded_at,
+            "alert": self.alert,
+            "related_alerts": self.related_alerts,
+            "fetches": self.fetches,
+            "llm_calls": self.llm_calls,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def save(self, directory: str) -> Path:
+        path = Path(directory) / f"{self.incident_id}{SUFFIX}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.to_dict(), separators=(",", ":"), default=str).encode()
+        path.write_bytes(gzip.compress(data, compresslevel=6))
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """A cassette file, ready to replay."""
+        data = json.loads(gzip.decompress(Path(path).read_bytes()))
+        if data.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported cassette format {data.get('format')!r}")
+        cassette = cls(data["incident_id"], data["alert"], data["related_alerts"], replaying=True)
+        cassette.recorded_at = data["recorded_at"]
+        cassette.fetches = data["fetches"]
+        cassette.llm_calls = data["llm_calls"]
+        cassette.result = data["result"]
+        cassette.error = data["error"]
+        for index, call in enumerate(cassette.llm_calls):
+            cassette._index(index, call)
+        return cassette
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active.get()
+
+
+@contextmanager
+def use_cassette(cassette: Cassette) -> Iterator[Cassette]:
+    """Record into, or replay from, `cassette` for calls made in this context (and threads/tasks it spawns)."""
+    token = _active.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active.reset(token)
+
+
+def _new_recording(alert: Any, incident_id: Optional[str], related_alerts: Sequence[Any]) -> Optional[Cassette]:
+    settings = get_settings()
+    if not settings.cassette_dir:
+        return None
+    return Cassette(
+        incident_id or "",
+        alert.model_dump(mode="json", exclude={"raw_payload"}),
+        [a.model_dump(mode="json", exclude={"raw_payload"}) for a in related_alerts],
+        max_stream_items=settings.cassette_max_stream_items,
+    )
+
+
+def _finish(cassette: Cassette, result: Optional[dict[str, Any]], error: Optional[BaseException]) -> None:
+    if result is not None:
+        cassette.result = result
+        cassette.incident_id = result.get("incident_id") or cassette.incident_id
+    if error is not None:
+        cassette.error = repr(error)
+    cassette.incident_id = cassette.incident_id or str(uuid.uuid4())
+
+
+@contextmanager
+def recording(
+    alert: Any, incident_id: Optional[str] = None, related_alerts: Sequence[Any] = ()
+) -> Iterator[Callable[[dict[str, Any]], None]]:
+    """
+    Record the investigation run inside the block into CASSETTE_DIR (a no-op when unset).
+    Yields a function to call with the run's result; the cassette is saved on exit,
+    also when the run fails.
+    """
+    cassette = _new_recording(alert, incident_id, related_alerts)
+    if cassette is None:
+        yield lambda result: None
+        return
+    outcome: dict[str, Any] = {}
+    try:
+        with use_cassette(cassette):
+            yield lambda result: outcome.update(result=result)
+    except Exception as e:
+        _finish(cassette, None, e)
+        raise
+    else:
+        _finish(cassette, outcome.get("result"), None)
+    finally:
+        cassette.save(get_settings().cassette_dir)
+
+
+@asynccontextmanager
+async def arecording(
+    alert: Any, incident_id: Optional[str] = None, related_alerts: Sequence[Any] = ()
+) -> AsyncIterator[Callable[[dict[str, Any]], None]]:
+    """Async `recording`; the cassette is written off the event loop."""
+    cassette = _new_recording(alert, incident_id, related_alerts)
+    if cassette is None:
+        yield lambda result: None
+        return
+    outcome: dict[str, Any] = {}
+    try:
+        with use_cassette(cassette):
+            yield lambda result: outcome.update(result=result)
+    except Exception as e:
+        _finish(cassette, None, e)
+        raise
+    else:
+        _finish(cassette, outcome.get("result"), None)
+    finally:
+        await asyncio.to_thread(cassette.save, get_settings().cassette_dir)
+
+
+def list_cassettes(directory: str) -> list[Path]:
+    return sorted(Path(directory).glob(f"*{SUFFIX}"))
+
+
+def _outermost() -> Optional[Cassette]:
+    return None if _in_fetch.get() else _active.get()
+
+
+def recorded(kind: str) -> Callable[[F], F]:
+    """
+    Record/replay a fetch function whose first argument is the service. Works on
+    plain and async functions and on sync and async generators (whose items are
+    recorded as one list, up to the cassette's `max_stream_items`).
+    """
+
+    def decorate(fn: F) -> F:
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def agen_wrapper(service: str, *args: Any, **kwargs: Any):
+                cassette = _outermost()
+                if cassette is None:
+                    async for item in fn(service, *args, **kwargs):
+                        yield item
+                elif cassette.replaying:
+                    for item in cassette.fetch(kind, service):
+                        yield item
+                else:
+                    items: list[Any] = []
+                    try:
+                        async for item in fn(service, *args, **kwargs):
+                            if cassette.max_stream_items is None or len(items) < cassette.max_stream_items:
+                                items.append(item)
+                            yield item
+                    finally:
+                        cassette.record_fetch(kind, service, items)
+
+            return agen_wrapper  # type: ignore[return-value]
+
+        if inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def gen_wrapper(service: str, *args: Any, **kwargs: Any):
+                cassette = _outermost()
+                if cassette is None:
+                    yield from fn(service, *args, **kwargs)
+                elif cassette.replaying:
+                    yield from cassette.fetch(kind, service)
+                else:
+                    items: list[Any] = []
+                    try:
+                        for item in fn(service, *args, **kwargs):
+                            if cassette.max_stream_items is None or len(items) < cassette.max_stream_items:
+                                items.append(item)
+                            yield item
+                    finally:
+                        cassette.record_fetch(kind, service, items)
+
+            return gen_wrapper  # type: ignore[return-value]
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(service: str, *args: Any, **kwargs: Any):
+                cassette = _outermost()
+                if cassette is None:
+                    return await fn(service, *args, **kwargs)
+                if cassette.replaying:
+                    return cassette.fetch(kind, service)
+                token = _in_fetch.set(True)
+                try:
+                    value = await fn(service, *args, **kwargs)
+                finally:
+                    _in_fetch.reset(token)
+                cassette.record_fetch(kind, service, value)
+                return value
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(service: str, *args: Any, **kwargs: Any):
+            cassette = _outermost()
+            if cassette is None:
+                return fn(service, *args, **kwargs)
+            if cassette.replaying:
+                return cassette.fetch(kind, service)
+            token = _in_fetch.set(True)
+            try:
+                value = fn(service, *args, **kwargs)
+            finally:
+                _in_fetch.reset(token)
+            cassette.record_fetch(kind, service, value)
+            return value
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,124 @@
+"""Chat model that records LLM calls into the active cassette, or answers them from it."""
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+
+from src.agents.llm_scheduler import _as_chunk
+from .cassette import CassetteMiss, active_cassette
+
+
+def _node(run_manager: Any) -> Optional[str]:
+    """Graph node making the call, from the LangGraph run metadata."""
+    return (getattr(run_manager, "metadata", None) or {}).get("langgraph_node")
+
+
+def _response(message: BaseMessage) -> dict[str, Any]:
+    response: dict[str, Any] = {"content": message.content}
+    if getattr(message, "tool_calls", None):
+        response["tool_calls"] = [{"name": c["name"], "args": c["args"], "id": c.get("id")} for c in message.tool_calls]
+    if getattr(message, "usage_metadata", None):
+        response["usage_metadata"] = dict(message.usage_metadata)
+    return response
+
+
+def _result(response: dict[str, Any]) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(**response))])
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Sits under the scheduler in place of the provider model. With an `inner` model,
+    calls go to it and are recorded into the active recording cassette, if any.
+    Without one (offline replay), calls are answered from the active replaying
+    cassette, and raise CassetteMiss outside one.
+    """
+
+    inner: Optional[BaseChatModel] = None
+    cache: Any = False  # responses must reach the cassette, not a response cache
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type if self.inner is not None else "cassette"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return self.inner._identifying_params if self.inner is not None else {}
+
+    def bind_tools(self, tools, **kwargs: Any) -> Runnable:
+        if self.inner is not None:
+            return self.inner.bind_tools(tools, **kwargs)
+        return self.bind(tools=tools, **kwargs)  # replayed responses already carry the tool calls
+
+    def _replayed(self, messages: list[BaseMessage], run_manager: Any) -> Optional[ChatResult]:
+        if self.inner is not None:
+            return None
+        cassette = active_cassette()
+        if cassette is None or not cassette.replaying:
+            raise CassetteMiss("No replaying cassette is active and there is no live model to call")
+        return _result(cassette.llm_response(messages, _node(run_manager)))
+
+    def _record(self, messages: list[BaseMessage], run_manager: Any, message: BaseMessage) -> None:
+        cassette = active_cassette()
+        if cassette is not None and not cassette.replaying:
+            cassette.record_llm(messages, _node(run_manager), _response(message))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        replayed = self._replayed(messages, run_manager)
+        if replayed is not None:
+            return replayed
+        result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._record(messages, run_manager, result.generations[0].message)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        replayed = self._replayed(messages, run_manager)
+        if replayed is not None:
+            return replayed
+        result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._record(messages, run_manager, result.generations[0].message)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        replayed = self._replayed(messages, run_manager)
+        if replayed is not None or type(self.inner)._stream is BaseChatModel._stream:
+            yield _as_chunk(replayed or self._generate(messages, stop=stop, run_manager=run_manager, **kwargs))
+            return
+        merged: Optional[ChatGenerationChunk] = None
+        for chunk in self.inner._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            merged = chunk if merged is None else merged + chunk
+            yield chunk
+        if merged is not None:
+            self._record(messages, run_manager, merged.message)
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        replayed = self._replayed(messages, run_manager)
+        inner = type(self.inner)
+        if replayed is not None or (inner._stream is BaseChatModel._stream and inner._astream is BaseChatModel._astream):
+            yield _as_chunk(replayed or await self._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs))
+            return
+        merged: Optional[ChatGenerationChunk] = None
+        async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            merged = chunk if merged is None else merged + chunk
+            yield chunk
+        if merged is not None:
+            self._record(messages, run_manager, merged.message)
+
+
+@contextmanager
+def replay_llm() -> Iterator[CassetteChatModel]:
+    """Route every `get_llm()` model to the active cassette's recordings for the duration of the block."""
+    from src.agents import llm
+
+    model = CassetteChatModel()
+    real_build = llm._build_llm
+    llm._build_llm = lambda *args: model
+    try:
+        yield model
+    finally:
+        llm._build_llm = real_build
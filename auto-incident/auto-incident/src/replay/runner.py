@@ -0,0 +1,107 @@
+"""Re-execute the investigation graph against cassettes and compare with what was recorded."""
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from src.alert_layer.schemas import AlertEvent
+from .cassette import Cassette, list_cassettes, use_cassette
+from .llm import replay_llm
+
+
+@lru_cache(maxsize=2)
+def _graph(live_llm: bool):
+    """One graph per process. Offline, every agent's model answers from the active cassette."""
+    from src.agents.graph import build_graph
+
+    if live_llm:
+        return build_graph()
+    with replay_llm():
+        return build_graph()
+
+
+def rca_diff(recorded: Optional[dict[str, Any]], replayed: Optional[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """RCA fields whose value changed: field -> {"recorded": ..., "replayed": ...}."""
+    recorded, replayed = recorded or {}, replayed or {}
+    return {
+        field: {"recorded": recorded.get(field), "replayed": replayed.get(field)}
+        for field in dict.fromkeys([*recorded, *replayed])
+        if recorded.get(field) != replayed.get(field)
+    }
+
+
+def replay_cassette(path: Union[str, Path], live_llm: bool = False) -> dict[str, Any]:
+    """
+    Run the graph on one cassette's alert with fetches (and, unless `live_llm`, LLM
+    replies) served from the cassette. Returns per-node latency, the RCA diff against
+    the recording and how the LLM calls were matched.
+    """
+    cassette = Cassette.load(str(path))
+    report: dict[str, Any] = {"cassette": Path(path).name, "incident_id": cassette.incident_id}
+    try:
+        alert = AlertEvent.model_validate(cassette.alert)
+        related = [AlertEvent.model_validate(a) for a in cassette.related_alerts]
+        with use_cassette(cassette):
+            from src.agents.graph import run_graph
+
+            result = run_graph(alert, incident_id=cassette.incident_id, graph=_graph(live_llm), related_alerts=related)
+    except Exception as e:
+        return {**report, "error": repr(e), "matches": cassette.stats}
+    recorded = cassette.result or {}
+    replayed_rca = json.loads(json.dumps(result["rca"], default=str))  # compare as it was stored
+    diff = rca_diff(recorded.get("rca"), replayed_rca)
+    return {
+        **report,
+        "total_ms": result["timings"]["total_ms"],
+        "nodes_ms": result["timings"]["nodes"],
+        "recorded_nodes_ms": (recorded.get("timings") or {}).get("nodes", {}),
+        "rca_changed": bool(diff),
+        "rca_diff": diff,
+        "matches": cassette.stats,
+    }
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"p50_ms": at(0.5), "p95_ms": at(0.95), "max_ms": round(ordered[-1], 2)}
+
+
+def replay_dir(directory: str, workers: Optional[int] = None, live_llm: bool = False) -> dict[str, Any]:
+    """
+    Replay every cassette in `directory` across `workers` processes (default: one per
+    CPU; 1 replays in this process) and summarize latency per node and RCA changes.
+    """
+    paths = list_cassettes(directory)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers <= 1 or len(paths) <= 1:
+        incidents = [replay_cassette(p, live_llm) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            incidents = list(pool.map(replay_cassette, paths, itertools.repeat(live_llm)))
+    wall = time.perf_counter() - started
+
+    ok = [i for i in incidents if "error" not in i]
+    nodes: dict[str, list[float]] = {}
+    for incident in ok:
+        for node, ms in incident["nodes_ms"].items():
+            nodes.setdefault(node, []).append(ms)
+    return {
+        "cassettes": len(paths),
+        "workers": workers,
+        "wall_s": round(wall, 2),
+        "errors": len(incidents) - len(ok),
+        "rca_changed": sum(i["rca_changed"] for i in ok),
+        "llm_prompts_changed": sum(i["matches"]["llm_by_node"] for i in ok),
+        "total": _percentiles([i["total_ms"] for i in ok]) if ok else {},
+        "nodes": {node: _percentiles(values) for node, values in sorted(nodes.items())},
+        "incidents": incidents,
+    }
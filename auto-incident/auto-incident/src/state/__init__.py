@@ -0,0 +1,6 @@
+"""Shared state - job queue, event streams, dedup and caches visible to every worker process."""
+from .backend import InMemoryStateBackend, StateBackend
+from .factory import get_state_backend
+from .sqlite import SQLiteStateBackend
+
+__all__ = ["StateBackend", "InMemoryStateBackend", "SQLiteStateBackend", "get_state_backend"]
@@ -0,0 +1,232 @@
+"""Shared state backends - state every API worker process must see the same way."""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Optional
+
+
+class StateBackend(ABC):
+    """
+    Cross-process state: expiring keys, counters, FIFO work queues and append-only event logs.
+
+    Values are strings (callers serialize). Each operation is atomic on its own; the set
+    maps directly onto Redis (GET/SET EX/SET NX EX/INCR/SCAN+DEL, LPUSH/RPOP/LLEN,
+    XADD MAXLEN/XRANGE), so a Redis backend is a thin adapter over a client.
+    `ttl` is in seconds; None means no expiry.
+
+    Code on the event loop must use the `a*` variants: they run the blocking call
+    off the loop (see `_offload`), so a slow or contended backend never stalls it.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Set `key` only if it is absent (or expired); True if it was set."""
+
+    @abstractmethod
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """Increment an integer counter (absent counts as 0) and return the new value."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> None:
+        """Delete every key starting with `prefix`."""
+
+    @abstractmethod
+    def trim_prefix(self, prefix: str, max_keys: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        """
+        Delete expired keys starting with `prefix`, then the ones expiring soonest until at
+        most `max_keys` remain and their values total at most `max_bytes`. Returns the number
+        deleted. (Redis expires keys itself; an adapter tracks the rest in a sorted set.)
+        """
+
+    @abstractmethod
+    def push(self, queue: str, item: str) -> None:
+        """Append to the tail of a FIFO queue."""
+
+    @abstractmethod
+    def pop(self, queue: str) -> Optional[str]:
+        """Remove and return the head of a queue; exactly one caller receives each item."""
+
+    @abstractmethod
+    def length(self, queue: str) -> int:
+        ...
+
+    @abstractmethod
+    def append(self, log: str, entry: str, max_len: Optional[int] = None, ttl: Optional[float] = None) -> int:
+        """
+        Append to an event log and return the entry's sequence number (1, 2, ...).
+        With `max_len`, the oldest entries beyond it are dropped; with `ttl`, the whole log
+        expires that many seconds after its last append.
+        """
+
+    @abstractmethod
+    def read(self, log: str, after: int = 0) -> list[tuple[int, str]]:
+        """Entries with a sequence number greater than `after`, oldest first."""
+
+    def close(self) -> None:
+        pass
+
+    # --- async variants ---
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await self._offload(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self._offload(self.set, key, value, ttl)
+
+    async def aadd(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return await self._offload(self.add, key, value, ttl)
+
+    async def aincr(self, key: str, ttl: Optional[float] = None) -> int:
+        return await self._offload(self.incr, key, ttl)
+
+    async def adelete(self, key: str) -> None:
+        await self._offload(self.delete, key)
+
+    async def atrim_prefix(self, prefix: str, max_keys: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        return await self._offload(self.trim_prefix, prefix, max_keys, max_bytes)
+
+    async def apush(self, queue: str, item: str) -> None:
+        await self._offload(self.push, queue, item)
+
+    async def apop(self, queue: str) -> Optional[str]:
+        return await self._offload(self.pop, queue)
+
+    async def alength(self, queue: str) -> int:
+        return await self._offload(self.length, queue)
+
+    async def aappend(self, log: str, entry: str, max_len: Optional[int] = None, ttl: Optional[float] = None) -> int:
+        return await self._offload(self.append, log, entry, max_len, ttl)
+
+    async def aread(self, log: str, after: int = 0) -> list[tuple[int, str]]:
+        return await self._offload(self.read, log, after)
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking backend call on a worker thread."""
+        return await asyncio.to_thread(fn, *args)
+
+
+class InMemoryStateBackend(StateBackend):
+    """Process-local backend: the default for a single worker, and for tests."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._keys: dict[str, tuple[str, Optional[float]]] = {}
+        self._queues: dict[str, deque[str]] = {}
+        # log -> (next sequence number, entries, expires_at)
+        self._logs: dict[str, tuple[int, deque[tuple[int, str]], Optional[float]]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._keys[key] = (value, self._expiry(ttl))
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._keys[key] = (value, self._expiry(ttl))
+            return True
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            value = int(self._get(key) or 0) + 1
+            self._keys[key] = (str(value), self._expiry(ttl))
+            return value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._keys if k.startswith(prefix)]:
+                del self._keys[key]
+
+    def trim_prefix(self, prefix: str, max_keys: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        with self._lock:
+            before = len(self._keys)
+            now = self.clock()
+            live = []
+            for key in [k for k in self._keys if k.startswith(prefix)]:
+                value, expires_at = self._keys[key]
+                if expires_at is not None and expires_at <= now:
+                    del self._keys[key]
+                else:
+                    live.append((float("inf") if expires_at is None else expires_at, key, len(value.encode())))
+            # Keep the latest-expiring keys that fit both limits
+            live.sort(reverse=True)
+            size = 0
+            for kept, (_, key, length) in enumerate(live):
+                size += length
+                if (max_keys is not None and kept >= max_keys) or (max_bytes is not None and size > max_bytes):
+                    del self._keys[key]
+            return before - len(self._keys)
+
+    def push(self, queue: str, item: str) -> None:
+        with self._lock:
+            self._queues.setdefault(queue, deque()).append(item)
+
+    def pop(self, queue: str) -> Optional[str]:
+        with self._lock:
+            items = self._queues.get(queue)
+            return items.popleft() if items else None
+
+    def length(self, queue: str) -> int:
+        with self._lock:
+            return len(self._queues.get(queue, ()))
+
+    def append(self, log: str, entry: str, max_len: Optional[int] = None, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            seq, entries, _ = self._log(log)
+            entries.append((seq, entry))
+            if max_len is not None:
+                while len(entries) > max_len:
+                    entries.popleft()
+            self._logs[log] = (seq + 1, entries, self._expiry(ttl))
+            return seq
+
+    def read(self, log: str, after: int = 0) -> list[tuple[int, str]]:
+        with self._lock:
+            _, entries, _ = self._log(log)
+            return [(seq, entry) for seq, entry in entries if seq > after]
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Dict operations under a short lock; a thread hop would cost more than the call
+        return fn(*args)
+
+    def _get(self, key: str) -> Optional[str]:
+        entry = self._keys.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self._keys[key]
+            return None
+        return value
+
+    def _log(self, log: str) -> tuple[int, deque[tuple[int, str]], Optional[float]]:
+        entry = self._logs.get(log)
+        if entry is None or (entry[2] is not None and entry[2] <= self.clock()):
+            return 1, deque(), None
+        return entry
+
+    def _expiry(self, ttl: Optional[float]) -> Optional[float]:
+        return None if ttl is None else self.clock() + ttl
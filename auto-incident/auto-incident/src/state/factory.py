@@ -0,0 +1,18 @@
+"""Process-wide state backend built from settings."""
+from functools import lru_cache
+
+from src.config import get_settings
+from .backend import InMemoryStateBackend, StateBackend
+from .sqlite import SQLiteStateBackend
+
+
+@lru_cache(maxsize=1)
+def get_state_backend() -> StateBackend:
+    """
+    The backend named by STATE_BACKEND: `memory` (one worker process) or `sqlite`
+    (STATE_SQLITE_PATH, shared by every worker on the host).
+    """
+    settings = get_settings()
+    if settings.state_backend == "sqlite":
+        return SQLiteStateBackend(settings.state_sqlite_path)
+    return InMemoryStateBackend()
@@ -0,0 +1,174 @@
+"""SQLite state backend - shares state between worker processes on one host."""
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .backend import StateBackend
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS queue_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_queue_items ON queue_items (queue, id);
+CREATE TABLE IF NOT EXISTS log_entries (
+    log TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (log, seq)
+);
+"""
+
+# Expired keys and logs are deleted at most this often
+_PURGE_INTERVAL = 60.0
+# Stands in for an unset limit in SQL comparisons
+_NO_LIMIT = 2**62
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    StateBackend on a SQLite file in WAL mode. Every operation is a single statement
+    in autocommit mode, so it is atomic across processes; writers wait up to
+    `busy_timeout` seconds for each other. Uses wall-clock time for expiry so all
+    processes agree on it. Async calls run on a dedicated thread, so a writer waiting
+    on the file lock holds up only other state operations, never the event loop.
+    """
+
+    def __init__(self, path: str = "state.db", busy_timeout: float = 30.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._purged_at = 0.0
+        # One connection behind a lock, so one thread is all the calls can use anyway
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-backend")
+
+    def get(self, key: str) -> Optional[str]:
+        rows = self._query(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, self.clock())
+        )
+        return rows[0][0] if rows else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._write("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, value, self._expiry(ttl)))
+        self._maybe_purge()
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        # Inserts, or overwrites only a row that has already expired
+        changed = self._write(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?",
+            (key, value, self._expiry(ttl), self.clock()),
+        )
+        self._maybe_purge()
+        return changed == 1
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        rows = self._query(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, '1', ?) "
+            "ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at, value = CAST("
+            "CASE WHEN kv.expires_at IS NOT NULL AND kv.expires_at <= ? THEN 0 ELSE CAST(kv.value AS INTEGER) END + 1 "
+            "AS TEXT) RETURNING value",
+            (key, self._expiry(ttl), self.clock()),
+        )
+        return int(rows[0][0])
+
+    def delete(self, key: str) -> None:
+        self._write("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> None:
+        # Range scan on the primary key instead of LIKE, which would treat % and _ as wildcards
+        self._write("DELETE FROM kv WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff"))
+
+    def trim_prefix(self, prefix: str, max_keys: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        bounds = (prefix, prefix + "\U0010ffff")
+        removed = self._write(
+            "DELETE FROM kv WHERE key >= ? AND key < ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (*bounds, self.clock()),
+        )
+        if max_keys is None and max_bytes is None:
+            return removed
+        # Keep the latest-expiring rows (no expiry counts as latest) that fit both limits
+        return removed + self._write(
+            "DELETE FROM kv WHERE key IN (SELECT key FROM ("
+            "SELECT key, ROW_NUMBER() OVER w AS n, SUM(LENGTH(CAST(value AS BLOB))) OVER w AS size "
+            "FROM kv WHERE key >= ? AND key < ? "
+            "WINDOW w AS (ORDER BY COALESCE(expires_at, 1e308) DESC, key)"
+            ") WHERE n > ? OR size > ?)",
+            (*bounds, _NO_LIMIT if max_keys is None else max_keys, _NO_LIMIT if max_bytes is None else max_bytes),
+        )
+
+    def push(self, queue: str, item: str) -> None:
+        self._write("INSERT INTO queue_items (queue, item) VALUES (?, ?)", (queue, item))
+
+    def pop(self, queue: str) -> Optional[str]:
+        rows = self._query(
+            "DELETE FROM queue_items WHERE id = "
+            "(SELECT id FROM queue_items WHERE queue = ? ORDER BY id LIMIT 1) RETURNING item",
+            (queue,),
+        )
+        return rows[0][0] if rows else None
+
+    def length(self, queue: str) -> int:
+        return self._query("SELECT COUNT(*) FROM queue_items WHERE queue = ?", (queue,))[0][0]
+
+    def append(self, log: str, entry: str, max_len: Optional[int] = None, ttl: Optional[float] = None) -> int:
+        seq = self._query(
+            "INSERT INTO log_entries (log, seq, entry, expires_at) "
+            "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM log_entries WHERE log = ? RETURNING seq",
+            (log, entry, self._expiry(ttl), log),
+        )[0][0]
+        if max_len is not None and seq > max_len:
+            self._write("DELETE FROM log_entries WHERE log = ? AND seq <= ?", (log, seq - max_len))
+        self._maybe_purge()
+        return seq
+
+    def read(self, log: str, after: int = 0) -> list[tuple[int, str]]:
+        return self._query("SELECT seq, entry FROM log_entries WHERE log = ? AND seq > ? ORDER BY seq", (log, after))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
+
+    def _expiry(self, ttl: Optional[float]) -> Optional[float]:
+        return None if ttl is None else self.clock() + ttl
+
+    def _maybe_purge(self) -> None:
+        now = self.clock()
+        if now - self._purged_at < _PURGE_INTERVAL:
+            return
+        self._purged_at = now
+        self._write("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        # A log expires as a whole, `ttl` after its last append
+        self._write(
+            "DELETE FROM log_entries WHERE log IN "
+            "(SELECT log FROM log_entries GROUP BY log HAVING MAX(expires_at) <= ?)",
+            (now,),
+        )
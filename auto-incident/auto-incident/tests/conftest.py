@@ -0,0 +1,24 @@
+"""Shared test fixtures."""
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.agents import llm
+
+
+RCA_JSON = json.dumps(
+    {
+        "summary": "Database pool exhausted",
+        "root_cause": "pool_size change in v2.3.1",
+        "evidence_summary": ["Too many connections"],
+        "recommended_actions": ["Rollback to v2.3.0"],
+    }
+)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    fake = FakeListChatModel(responses=[RCA_JSON])
+    monkeypatch.setattr(llm, "_build_llm", lambda *args: fake)
+    return fake
@@ -2,7 +2,7 @@
 import pytest
 from datetime import datetime
 
-from src.alert_layer import parse_alert, AlertEvent, TriggerType
+from src.alert_layer import AlertDeduplicator, fingerprint, parse_alert, parse_alerts
 
 
 def test_parse_generic_webhook():
@@ -40,3 +40,136 @@ def test_parse_missing_fields_defaults():
     assert alert.trigger_type == "error_rate"
     assert alert.service == "unknown"
     assert alert.threshold == 0
+
+
+def test_parse_alerts_expands_grouped_alertmanager_payload():
+    payload = {
+        "commonLabels": {"service": "user-service"},
+        "alerts": [
+            {"labels": {"alertname": "HighErrorRate", "pod": "a"}, "annotations": {}},
+            {"labels": {"alertname": "HighLatency", "pod": "b"}, "annotations": {}},
+        ],
+    }
+    alerts = parse_alerts(payload)
+    assert [a.trigger_type for a in alerts] == ["error_rate", "latency_spike"]
+    assert all(a.service == "user-service" for a in alerts)
+    assert alerts[1].labels["pod"] == "b"
+    assert parse_alert(payload).labels["pod"] == "a"
+    # Each alert carries the group metadata and only its own entry
+    assert alerts[1].raw_payload == {"commonLabels": {"service": "user-service"}, "alerts": [payload["alerts"][1]]}
+
+
+def test_resolved_alerts_in_a_group_are_skipped():
+    payload = {
+        "commonLabels": {"service": "user-service", "alertname": "HighErrorRate"},
+        "alerts": [{"status": "resolved", "labels": {"pod": "a"}}, {"status": "firing", "labels": {"pod": "b"}}],
+    }
+    assert [a.labels["pod"] for a in parse_alerts(payload)] == ["b"]
+    assert parse_alerts({**payload, "orgId": 1, "alerts": payload["alerts"][:1]}) == []
+
+
+def test_fingerprint_ignores_label_order():
+    a = parse_alert({"service": "db", "labels": {"x": "1", "y": "2"}})
+    b = parse_alert({"service": "db", "labels": {"y": "2", "x": "1"}})
+    c = parse_alert({"service": "db", "labels": {"x": "1", "y": "3"}})
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(c)
+
+
+def test_dedup_coalesces_within_window():
+    now = [0.0]
+    dedup = AlertDeduplicator(window_seconds=60, clock=lambda: now[0])
+    alert = parse_alert({"service": "db", "trigger_type": "error_rate"})
+    assert dedup.check(alert) is None
+    dedup.record(alert, "inc-1")
+
+    now[0] = 30
+    assert dedup.check(alert) == "inc-1"
+
+    now[0] = 61
+    assert dedup.check(alert) is None
+    assert len(dedup) == 0
+
+
+def test_dedup_keeps_in_flight_incident_past_window():
+    now = [0.0]
+    active = {"inc-1"}
+    dedup = AlertDeduplicator(window_seconds=60, is_active=active.__contains__, clock=lambda: now[0])
+    alert = parse_alert({"service": "db", "trigger_type": "error_rate"})
+    dedup.record(alert, "inc-1")
+
+    now[0] = 120
+    assert dedup.check(alert) == "inc-1"
+    active.clear()
+    assert dedup.check(alert) is None
+
+
+def test_cluster_alerts_by_window_and_dependencies():
+    from src.alert_layer import cluster_alerts
+
+    def alert(service, second):
+        return parse_alert({"service": service, "timestamp": f"2024-05-01T12:00:{second:02d}Z"})
+
+    dependencies = {"api-gateway": ["user-service"], "user-service": ["user-db"]}
+    alerts = [alert("api-gateway", 5), alert("billing", 6), alert("user-db", 10), alert("user-service", 20)]
+    clusters = cluster_alerts(alerts, window_seconds=30, dependencies=dependencies)
+
+    assert [c.services for c in clusters] == [["user-db", "api-gateway", "user-service"], ["billing"]]
+    # The most downstream service is the likeliest origin
+    assert clusters[0].primary.service == "user-db"
+
+    late = alert("user-db", 59)
+    assert len(cluster_alerts([alerts[0], late], window_seconds=30, dependencies=dependencies)) == 2
+
+
+@pytest.mark.parametrize("name,expected", [
+    ("HighErrorRate", "error_rate"),
+    ("HighRequestLatency", "latency_spike"),
+    ("KubePodCrashLooping", "crashloop"),
+    ("HTTPCode_Target_5XX_Count", "error_rate"),
+    ("CPUUtilization", "saturation"),
+    ("ServiceDown", "availability"),
+    ("Watchdog", "error_rate"),
+])
+def test_classify_alert_names(name, expected):
+    from src.alert_layer import classify
+
+    assert classify(name) == expected
+
+
+def test_parse_pagerduty_and_cloudwatch_sns():
+    import json
+
+    pagerduty = {"event": {"event_type": "incident.triggered", "occurred_at": "2026-10-18T12:00:00Z", "data": {
+        "id": "Q1", "title": "billing pods CrashLoopBackOff", "urgency": "high", "service": {"summary": "billing"},
+    }}}
+    alert = parse_alert(pagerduty)
+    assert (alert.trigger_type, alert.service, alert.labels["severity"]) == ("crashloop", "billing", "high")
+    assert alert.timestamp == datetime(2026, 10, 18, 12, 0)
+
+    alarm = {
+        "AlarmName": "orders-db-cpu", "NewStateReason": "1 datapoint [93.5 (18/10/26 12:00:00)] was greater",
+        "Trigger": {"MetricName": "CPUUtilization", "Threshold": 80,
+                    "Dimensions": [{"name": "DBInstanceIdentifier", "value": "orders-db"}]},
+    }
+    sns = {"Type": "Notification", "TopicArn": "arn:aws:sns:eu-west-1:1:alarms", "Message": json.dumps(alarm)}
+    alert = parse_alert(sns)
+    assert (alert.trigger_type, alert.service, alert.threshold, alert.value) == ("saturation", "orders-db", 80, 93.5)
+
+
+def test_source_selected_by_headers_before_payload():
+    from pydantic import ValidationError
+
+    from src.alert_layer import ALERT_SOURCES
+
+    grafana = {"orgId": 1, "groupKey": "{}", "alerts": [{"labels": {"alertname": "HighLatency", "service": "api"},
+                                                          "values": {"B": 1.7}}]}
+    assert ALERT_SOURCES.select(grafana).name == "grafana"
+    assert parse_alert(grafana).value == 1.7
+    assert ALERT_SOURCES.select({"service": "api"}, {"User-Agent": "Alertmanager/0.27.0"}).name == "alertmanager"
+    assert ALERT_SOURCES.select({}, {"X-Amz-Sns-Message-Type": "Notification"}).name == "cloudwatch"
+    assert parse_alert({"trigger_type": "latency_spike"}, {"X-Alert-Source": "generic"}).trigger_type == "latency_spike"
+    with pytest.raises(ValueError):
+        parse_alerts({}, {"X-Alert-Source": "nagios"})
+    with pytest.raises(ValidationError):
+        parse_alerts({"service": "api"}, {"X-PagerDuty-Signature": "v1=x"})
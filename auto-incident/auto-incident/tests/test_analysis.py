@@ -0,0 +1,148 @@
+"""Tests for telemetry pre-analysis."""
+from src.analysis import LogTemplateMiner
+
+
+def test_miner_groups_variable_fields_into_templates():
+    miner = LogTemplateMiner()
+    for i in range(200):
+        miner.add({"message": f"User {i} login failed from 10.0.0.{i % 250}", "level": "WARN", "trace_id": f"t{i}"})
+        miner.add({"message": f"GET /api/orders/{i} took {i * 3}ms", "level": "INFO"})
+
+    templates = miner.templates()
+    assert miner.total == 400
+    assert len(templates) == 2
+    assert {t.template for t in templates} == {
+        "User <*> login failed from <*>",
+        "GET /api/orders/<*> took <*>",
+    }
+    login = next(t for t in templates if t.template.startswith("User"))
+    assert login.count == 200
+    assert login.trace_ids == ["t0", "t1", "t2"]
+
+
+def test_miner_tracks_first_and_last_seen_and_stack():
+    miner = LogTemplateMiner()
+    for ts in ["2025-01-01T10:05:00", "2025-01-01T10:01:00", "2025-01-01T10:09:00"]:
+        miner.add({
+            "timestamp": ts,
+            "level": "ERROR",
+            "message": "Connection timeout to database pool",
+            "stack_trace": "java.sql.SQLException: Connection timeout\n  at com.app.DatabasePool.getConnection(DatabasePool.java:42)",
+        })
+    [t] = miner.templates()
+    assert (t.first_seen, t.last_seen) == ("2025-01-01T10:01:00", "2025-01-01T10:09:00")
+    assert "SQLException" in t.template
+    assert t.stack == "at com.app.DatabasePool.getConnection(DatabasePool.java:42)"
+
+
+def test_miner_memory_is_bounded():
+    miner = LogTemplateMiner(max_clusters=10)
+    for i in range(100):
+        word = chr(65 + i % 26) + chr(65 + i // 26)
+        miner.add({"message": f"{word}start {word}middle {word}end"})
+    assert len(miner) == 10
+    assert miner.evicted == 90
+
+
+def test_detect_anomalies_finds_spike_shift_and_lagged_correlation():
+    import numpy as np
+
+    from src.analysis.anomaly import detect_anomalies
+
+    rng = np.random.default_rng(0)
+    cpu = rng.normal(50, 1, 60)
+    cpu[40:] += 30
+    p99 = np.roll(cpu, 2) * 20 + rng.normal(0, 5, 60)
+    errors = rng.normal(0.01, 0.0005, 60)
+    errors[45] = 0.3
+
+    report = detect_anomalies({"cpu": cpu.tolist(), "p99": p99.tolist(), "error_rate": errors.tolist()})
+
+    shifts = {a.series: a for a in report.anomalies if a.kind == "level_shift"}
+    assert shifts["cpu"].index == 40 and shifts["cpu"].direction == "up"
+    assert shifts["p99"].index == 42
+    assert "error_rate" not in shifts  # a single outlier is a spike, not a shift
+    assert any(a.kind == "spike" and a.series == "error_rate" and a.index == 45 for a in report.anomalies)
+    [corr] = [a for a in report.anomalies if a.kind == "correlation"]
+    assert (corr.series, corr.related_series, corr.lag) == ("cpu", "p99", 2)
+
+
+def test_detect_anomalies_quiet_series():
+    import numpy as np
+
+    from src.analysis.anomaly import detect_anomalies
+
+    rng = np.random.default_rng(1)
+    report = detect_anomalies({"cpu": rng.normal(50, 1, 60).tolist()})
+    assert [a for a in report.anomalies if a.kind != "spike" or a.score > 6] == []
+
+
+def test_metrics_agent_skips_llm_for_clear_cut_anomaly():
+    from src.agents.metrics_agent import MetricsAgent
+    from src.alert_layer import parse_alert
+    from src.memory import IncidentMemory
+
+    class NoLLM:
+        def __or__(self, other):
+            raise AssertionError("LLM should not be called")
+
+    agent = MetricsAgent()
+    agent.llm = NoLLM()
+    memory = IncidentMemory()
+    agent.investigate(parse_alert({"service": "api", "trigger_type": "error_rate"}), memory)
+
+    [finding] = memory.findings
+    assert finding.agent == "metrics"
+    assert "error_rate: up spike" in finding.content
+    assert {e.source for e in memory.evidence} == {"metrics", "metric_anomalies"}
+
+
+def test_clear_cut_needs_corroboration_of_the_primary_series():
+    from src.agents.metrics_agent import MetricsAgent
+    from src.alert_layer import parse_alert
+    from src.analysis.schemas import AnomalyReport, MetricAnomaly
+
+    alert = parse_alert({"service": "api", "trigger_type": "error_rate"})
+    spike = MetricAnomaly(series="error_rate", kind="spike", index=50, score=12.0)
+
+    def clear_cut(*others):
+        report = AnomalyReport(anomalies=[spike, *others], series_count=3)
+        return MetricsAgent._is_clear_cut(None, alert, [("api", {}, report)])
+
+    unrelated = MetricAnomaly(series="cpu", kind="correlation", index=0, score=0.9, related_series="memory")
+    related = MetricAnomaly(series="cpu", kind="correlation", index=0, score=0.9, related_series="error_rate")
+    assert not clear_cut(unrelated)
+    assert clear_cut(unrelated, related)
+    assert clear_cut(MetricAnomaly(series="p99_latency", kind="level_shift", index=48, score=5.0))
+
+
+def test_tfidf_index_ranks_and_evicts_oldest():
+    from src.analysis.similarity import TfidfIndex
+
+    index = TfidfIndex(dims=4096, capacity=3)
+    index.add("a", ["service=api", "trigger=latency_spike", "alertname=HighLatency"])
+    index.add("b", ["service=api", "trigger=error_rate", "alertname=HighErrors"])
+    index.add("c", ["service=db", "trigger=latency_spike"])
+
+    top = index.search(["service=api", "trigger=latency_spike", "alertname=HighLatency"], k=2)
+    assert top[0][0] == "a" and top[0][1] > 0.99
+    assert top[1][1] < top[0][1]
+
+    index.add("d", ["service=cache"])
+    assert "a" not in index and len(index) == 3
+    assert index.search(["unseen"]) == []
+
+
+def test_miner_aconsume_matches_consume():
+    import asyncio
+
+    records = [{"message": f"user {i} login failed", "level": "ERROR"} for i in range(25)]
+    records += [{"message": "cache warmed", "level": "INFO"}] * 5
+
+    async def stream():
+        for record in records:
+            yield record
+
+    mined = asyncio.run(LogTemplateMiner().aconsume(stream(), batch_size=4))
+    assert mined.summary() == LogTemplateMiner().consume(records).summary()
+    assert mined.total == 30
@@ -0,0 +1,121 @@
+"""Tests for the HTTP API, through the app's lifespan over an in-process ASGI transport."""
+import asyncio
+
+import httpx
+import pytest
+
+from src import main
+from src.config import Settings
+from src.state import InMemoryStateBackend
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, fake_llm):
+    """Runs `test(client)` against a started app and returns its result."""
+
+    def run(test, **settings):
+        resolved = Settings(incident_store_path=str(tmp_path / "incidents.db"), **settings)
+        monkeypatch.setattr(main, "get_settings", lambda: resolved)
+        # The process-wide backend would carry queued jobs over from other tests
+        monkeypatch.setattr(main, "get_state_backend", InMemoryStateBackend)
+
+        async def session():
+            async with main.lifespan(main.app):
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await test(client)
+
+        return asyncio.run(session())
+
+    return run
+
+
+def alertmanager(*statuses: str) -> dict:
+    return {
+        "groupKey": "{}",
+        "commonLabels": {"service": "api-gateway", "alertname": "HighLatency"},
+        "alerts": [{"status": status, "labels": {"pod": f"api-{i}"}} for i, status in enumerate(statuses)],
+    }
+
+
+def test_resolved_notification_starts_no_investigation(api):
+    async def test(client):
+        resolved = await client.post("/webhook/alert", json=alertmanager("resolved", "resolved"))
+        batch = await client.post("/webhook/alerts:batch", json=[alertmanager("resolved")])
+        mixed = await client.post("/webhook/alert", json=alertmanager("resolved", "firing"))
+        return resolved, batch, mixed
+
+    resolved, batch, mixed = api(test)
+    assert resolved.status_code == 202 and resolved.json()["incidents"] == []
+    assert batch.status_code == 202 and batch.json() == {"alerts": 0, "incidents": []}
+    assert len(mixed.json()["incidents"]) == 1
+
+
+def generic(service: str, trigger_type: str = "error_rate", **labels: str) -> dict:
+    return {"trigger_type": trigger_type, "service": service, "threshold": 1, "labels": labels}
+
+
+def test_batch_clusters_related_alerts_and_coalesces_repeats(api):
+    batch = [generic("users"), generic("db", "saturation"), generic("billing")]
+
+    async def test(client):
+        first = await client.post("/webhook/alerts:batch", json=batch)
+        again = await client.post("/webhook/alerts:batch", json=batch)
+        return first.json(), again.json()
+
+    # No workers, so the incidents stay in flight
+    first, again = api(test, max_concurrent_investigations=0, service_dependencies={"users": ["db"]})
+    assert first["alerts"] == 3
+    assert [(i["services"], i["alerts"], i["deduplicated"]) for i in first["incidents"]] == [
+        (["db", "users"], 2, False),
+        (["billing"], 1, False),
+    ]
+    assert [i["incident_id"] for i in again["incidents"]] == [i["incident_id"] for i in first["incidents"]]
+    assert all(i["deduplicated"] for i in again["incidents"])
+
+
+def test_full_queue_rejects_extra_alerts_then_answers_429(api):
+    async def test(client):
+        grouped = await client.post("/webhook/alert", json=alertmanager("firing", "firing"))
+        full = await client.post("/webhook/alert", json=generic("billing"))
+        return grouped, full
+
+    grouped, full = api(test, max_concurrent_investigations=0, investigation_queue_size=1)
+    assert grouped.status_code == 202
+    assert [i["status"] for i in grouped.json()["incidents"]] == ["queued", "rejected"]
+    assert full.status_code == 429 and full.headers["Retry-After"] == "30"
+
+
+def test_get_incident_falls_back_to_the_store(api, tmp_path):
+    from src.memory import SQLiteIncidentStore
+    from tests.test_store import make_record
+
+    record = make_record()
+    store = SQLiteIncidentStore(str(tmp_path / "incidents.db"))
+    store.save(record)
+    store.close()
+
+    async def test(client):
+        return await client.get(f"/incidents/{record.incident_id}"), await client.get("/incidents/missing")
+
+    stored, missing = api(test)
+    assert stored.status_code == 200
+    assert stored.json()["status"] == "completed"
+    assert stored.json()["result"]["rca"]["root_cause"] == "pool exhausted"
+    assert stored.json()["findings"][0]["content"] == "Connection pool exhausted"
+    assert missing.status_code == 404
+
+
+def test_stream_replays_progress_and_ends_with_completed(api):
+    async def test(client):
+        incident_id = (await client.post("/webhook/alert", json=generic("checkout"))).json()["incident_id"]
+        events = []
+        async with client.stream("GET", f"/incidents/{incident_id}/stream") as response:
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    events.append(line[len("event: ") :])
+        return incident_id, events
+
+    incident_id, events = api(lambda client: asyncio.wait_for(test(client), 30))
+    assert events[0] == "status" and events[-1] == "completed"
+    assert {"node_start", "finding", "rca_token"} <= set(events)
@@ -0,0 +1,42 @@
+"""Tests for latency/token instrumentation and the Prometheus exposition."""
+import asyncio
+
+from src.alert_layer import parse_alert
+from src.instrumentation import Counter, Histogram, Registry
+from src.instrumentation.metrics import NODE_SECONDS, REGISTRY
+
+
+def test_histogram_and_counter_render_exposition_format():
+    registry = Registry()
+    latency = Histogram("demo_seconds", "Demo latency.", ["node"], buckets=(0.1, 1.0), registry=registry)
+    calls = Counter("demo_calls_total", "Demo calls.", ["node"], registry=registry)
+    latency.observe(0.05, node="plan")
+    latency.observe(0.5, node="plan")
+    calls.inc(node='say "hi"')
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{node="plan",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{node="plan",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{node="plan"} 2' in text
+    assert 'demo_calls_total{node="say \\"hi\\""} 1' in text
+
+
+def test_run_result_carries_timing_breakdown(fake_llm):
+    from src.agents import CommanderAgent
+
+    commander = CommanderAgent()
+    alert = parse_alert({"trigger_type": "error_rate", "service": "user-service"})
+    before = NODE_SECONDS.count(node="decision_engine", outcome="ok")
+
+    sync_result = commander.run(alert)
+    async_result = asyncio.run(commander.arun(alert, on_event=lambda event: None))
+
+    for result in (sync_result, async_result):
+        timings = result["timings"]
+        assert set(timings["nodes"]) >= {"commander_plan", "investigate_telemetry", "deploy_intel", "decision_engine"}
+        assert timings["llm"]["calls"] >= 2  # the mock deploy is risky, so correlation skips the LLM
+        assert "rca_parse" in timings["stages"]
+        assert timings["total_ms"] >= max(timings["nodes"].values())
+    assert NODE_SECONDS.count(node="decision_engine", outcome="ok") == before + 2
+    assert "llm_request_duration_seconds_bucket" in REGISTRY.render()
@@ -0,0 +1,222 @@
+"""Tests for the HTTP backend clients against a local stub server."""
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.integrations import ArgoCDClient, IntegrationError, LokiClient, PrometheusClient
+
+LOKI_BODY = {
+    "status": "success",
+    "data": {
+        "resultType": "streams",
+        "result": [
+            {
+                "stream": {"service": "api-gateway", "level": "error"},
+                "values": [
+                    ["1700000060000000000", '{"message": "Too many connections", "trace_id": "t2"}'],
+                    ["1700000000000000000", "Connection timeout to database pool"],
+                ],
+            }
+        ],
+    },
+}
+PROM_BODY = {
+    "status": "success",
+    "data": {"resultType": "matrix", "result": [{"metric": {}, "values": [[1700000000, "1.5"], [1700000030, "2.5"]]}]},
+}
+ARGO_BODY = {
+    "status": {
+        "history": [
+            {"id": 1, "revision": "e4f5a6b7c8", "deployedAt": "2026-01-01T10:00:00Z", "source": {"targetRevision": "v2.3.0"}},
+            {"id": 2, "revision": "a1b2c3d4e5", "deployedAt": "2026-01-01T12:00:00Z", "source": {"targetRevision": "v2.3.1"}},
+        ]
+    }
+}
+
+
+def argo_manifests(revision):
+    """Rendered manifests per ARGO_BODY revision: the newer one raises the pool size and drops a timeout."""
+    newer = revision == "a1b2c3d4e5"
+    data = {"pool_size": "50" if newer else "10", "log_level": "info"}
+    if not newer:
+        data["timeout_seconds"] = "30"
+    deployment = {
+        "kind": "Deployment",
+        "spec": {"template": {"spec": {"containers": [{"env": [{"name": "WORKERS", "value": "4"}]}]}}},
+    }
+    return {"manifests": [json.dumps({"kind": "ConfigMap", "data": data}), json.dumps(deployment)]}
+
+
+def paged_loki(query, total):
+    """`total` lines one second apart from the Loki start time, honouring start/limit like Loki does."""
+    base = 1700000000 * 10**9
+    start, limit = int(query["start"][0]), int(query["limit"][0])
+    first = max(0, -(-(start - base) // 10**9))
+    values = [
+        [str(base + i * 10**9), json.dumps({"message": f"request {i} failed", "level": "error"})]
+        for i in range(first, min(total, first + limit))
+    ]
+    return {"status": "success", "data": {"resultType": "streams", "result": [{"stream": {}, "values": values}]}}
+
+
+@pytest.fixture
+def stub():
+    hits = Counter()
+    behaviour = {"delay": 0.0, "slow_first": 0.0, "fail_first": 0, "loki_lines": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path
+            hits[path] += 1
+            if hits[path] <= behaviour["fail_first"]:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if hits[path] == 1 and behaviour["slow_first"]:
+                time.sleep(behaviour["slow_first"])
+            time.sleep(behaviour["delay"])
+            if path.startswith("/loki") and behaviour["loki_lines"]:
+                body = paged_loki(parse_qs(urlparse(self.path).query), behaviour["loki_lines"])
+            elif path.startswith("/loki"):
+                body = LOKI_BODY
+            elif path.startswith("/api/v1/query_range"):
+                body = PROM_BODY
+            elif path.endswith("/manifests"):
+                body = argo_manifests(parse_qs(urlparse(self.path).query)["revision"][0])
+            else:
+                body = ARGO_BODY
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", hits, behaviour
+    server.shutdown()
+
+
+def window():
+    end = datetime(2026, 1, 1, 12, 0, 30)
+    return end - timedelta(minutes=15), end
+
+
+def test_loki_parses_and_caches_by_time_bucket(stub):
+    url, hits, _ = stub
+    client = LokiClient(url)
+    start, end = window()
+
+    logs = client.query_logs("api-gateway", start, end)
+    again = client.query_logs("api-gateway", start + timedelta(seconds=10), end + timedelta(seconds=10))
+
+    assert [r["message"] for r in logs] == ["Connection timeout to database pool", "Too many connections"]
+    assert logs[1]["trace_id"] == "t2" and logs[0]["level"] == "ERROR"
+    assert again is logs
+    assert hits["/loki/api/v1/query_range"] == 1
+
+
+def test_concurrent_async_callers_share_one_round_trip(stub):
+    url, hits, behaviour = stub
+    behaviour["delay"] = 0.2
+    client = PrometheusClient(url, queries={"p99": ("p99{{service=\"{service}\"}}", "p99_latency_ms")}, hedge_after=None)
+    start, end = window()
+
+    async def scenario():
+        return await asyncio.gather(*(client.aquery_metrics("api-gateway", start, end) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert hits["/api/v1/query_range"] == 1
+    assert results[0]["p99_latency_ms"] == 2.5
+    assert results[0]["time_series"]["p99"] == [1.5, 2.5]
+
+
+def test_retries_retryable_status_then_gives_up(stub):
+    url, hits, behaviour = stub
+    behaviour["fail_first"] = 1
+    deploys = ArgoCDClient(url, backoff=0.01).deploy_history("api-gateway", since=datetime(2026, 1, 1, 11))
+    assert [d["version"] for d in deploys] == ["v2.3.1"]
+    assert deploys[0]["timestamp"] == "2026-01-01T12:00:00"
+
+    behaviour["fail_first"] = 100
+    with pytest.raises(IntegrationError):
+        ArgoCDClient(url, retries=1, backoff=0.01).deploy_history("checkout")
+
+
+def test_argocd_diffs_config_between_revisions(stub):
+    url, hits, _ = stub
+    client = ArgoCDClient(url)
+    expected = {"pool_size": {"old": "10", "new": "50"}, "timeout_seconds": {"old": "30", "new": None}}
+
+    newest, oldest = client.deploy_history("api-gateway")
+    assert newest["config_diff"] == expected
+    assert oldest["config_diff"] == {}  # nothing earlier to compare with
+    assert asyncio.run(client.adeploy_history("api-gateway"))[0]["config_diff"] == expected
+    assert hits["/api/v1/applications/api-gateway/manifests"] == 2  # once per revision, then cached
+
+
+def test_slow_request_is_hedged(stub):
+    url, hits, behaviour = stub
+    behaviour["slow_first"] = 2.0
+    client = LokiClient(url, hedge_after=0.1, timeout=5.0)
+    start, end = window()
+
+    began = time.monotonic()
+    logs = asyncio.run(client.aquery_logs("api-gateway", start, end))
+
+    assert len(logs) == 2
+    assert time.monotonic() - began < 1.5
+    assert hits["/loki/api/v1/query_range"] == 2
+
+
+def test_iter_logs_pages_lazily(stub):
+    url, hits, behaviour = stub
+    behaviour["loki_lines"] = 25
+    client = LokiClient(url)
+    start, end = datetime(2023, 11, 14, 22, 0), datetime(2023, 11, 15)
+
+    stream = client.iter_logs("api-gateway", start, end, page_size=10)
+    first = next(stream)
+    assert first["message"] == "request 0 failed" and first["level"] == "ERROR"
+    assert hits["/loki/api/v1/query_range"] == 1
+
+    rest = list(stream)
+    assert len(rest) == 24 and rest[-1]["message"] == "request 24 failed"
+    assert hits["/loki/api/v1/query_range"] == 3
+
+    async def collect():
+        return [r async for r in client.aiter_logs("api-gateway", start, end, page_size=10, max_lines=15)]
+
+    assert [r["message"] for r in asyncio.run(collect())][-1] == "request 14 failed"
+
+
+def test_logs_agent_reuses_mined_templates_within_time_bucket(stub, fake_llm, monkeypatch):
+    from src.agents import logs_agent
+    from src.alert_layer import parse_alert
+    from src.memory import IncidentMemory
+
+    url, hits, _ = stub
+    client = LokiClient(url, bucket_seconds=10**9)
+    monkeypatch.setattr(logs_agent, "get_logs_client", lambda: client)
+    monkeypatch.setattr("src.integrations.logs_client.get_logs_client", lambda: client)
+    agent = logs_agent.LogsAgent()
+    alert = parse_alert({"trigger_type": "error_rate", "service": "api-gateway"})
+
+    agent.investigate(alert, IncidentMemory(alert=alert))
+    pages = hits["/loki/api/v1/query_range"]
+    memory = IncidentMemory(alert=alert)
+    asyncio.run(agent.ainvestigate(alert, memory))
+
+    assert pages == 1 and hits["/loki/api/v1/query_range"] == 1
+    assert memory.evidence[0].data["total_lines"] == 2
@@ -0,0 +1,97 @@
+"""Tests for the investigation job queue."""
+import asyncio
+
+import pytest
+
+from src.alert_layer import parse_alert
+from src.jobs import InvestigationQueue, QueueFullError
+
+
+def make_alert(service="api-gateway"):
+    return parse_alert({"trigger_type": "latency_spike", "service": service, "threshold": 1000})
+
+
+def test_submit_returns_immediately_and_completes():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(alert, incident_id, emit):
+            await release.wait()
+            return {"incident_id": incident_id, "rca": {"summary": alert.service}}
+
+        queue = InvestigationQueue(runner, max_size=10, concurrency=1)
+        await queue.start()
+        job = await queue.submit(make_alert())
+        assert job.status == "queued"
+        await asyncio.sleep(0)
+        assert (await queue.get(job.incident_id)).status == "running"
+
+        release.set()
+        await queue.join()
+        await queue.stop()
+        return await queue.get(job.incident_id)
+
+    job = asyncio.run(scenario())
+    assert job.status == "completed"
+    assert job.result["rca"]["summary"] == "api-gateway"
+
+
+def test_failed_investigation_records_error():
+    async def scenario():
+        async def runner(alert, incident_id, emit):
+            raise RuntimeError("LLM unavailable")
+
+        queue = InvestigationQueue(runner, concurrency=1)
+        await queue.start()
+        job = await queue.submit(make_alert())
+        await queue.join()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed"
+    assert "LLM unavailable" in job.error
+
+
+def test_reject_when_full():
+    async def scenario():
+        queue = InvestigationQueue(lambda a, i, e: None, max_size=2, overflow_policy="reject")
+        await queue.submit(make_alert())
+        await queue.submit(make_alert())
+        with pytest.raises(QueueFullError):
+            await queue.submit(make_alert())
+
+    asyncio.run(scenario())
+
+
+def test_shed_oldest_when_full():
+    async def scenario():
+        queue = InvestigationQueue(lambda a, i, e: None, max_size=2, overflow_policy="shed_oldest")
+        first = await queue.submit(make_alert("a"))
+        await queue.submit(make_alert("b"))
+        third = await queue.submit(make_alert("c"))
+        return first, third, await queue.pending()
+
+    first, third, pending = asyncio.run(scenario())
+    assert first.status == "shed"
+    assert third.status == "queued"
+    assert pending == 2
+
+
+def test_event_stream_replays_history_and_closes():
+    async def scenario():
+        async def runner(alert, incident_id, emit):
+            emit({"type": "finding", "agent": "logs"})
+            return {"incident_id": incident_id}
+
+        queue = InvestigationQueue(runner, concurrency=1)
+        await queue.start()
+        job = await queue.submit(make_alert())
+        await queue.join()
+        await queue.stop()
+        stream = await queue.events(job.incident_id)
+        return [e async for e in stream.subscribe()]
+
+    events = asyncio.run(scenario())
+    assert [e["type"] for e in events] == ["status", "status", "finding", "completed"]
+    assert [e["seq"] for e in events] == [1, 2, 3, 4]
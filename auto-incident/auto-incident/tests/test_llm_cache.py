@@ -0,0 +1,106 @@
+"""Tests for the LLM response cache."""
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.agents.llm_cache import LLMResponseCache, cache_key, normalize_prompt
+
+
+def gen(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_normalize_drops_volatile_tokens():
+    a = "at 2024-05-01T10:00:00.123Z trace_id: abc123 incident 123e4567-e89b-12d3-a456-426614174000"
+    b = "at 2024-05-02T11:30:00Z trace_id: fff999 incident 00000000-1111-2222-3333-444444444444"
+    assert normalize_prompt(a) == normalize_prompt(b)
+    assert cache_key(a, "model-a") == cache_key(b, "model-a")
+    assert cache_key(a, "model-a") != cache_key(a, "model-b")
+
+
+def test_normalize_masks_epochs_only_in_time_fields():
+    assert normalize_prompt('ts=1760781600 "timestamp": 1760781600123 startedAt: 1760781600.5') == (
+        'ts=<epoch> "timestamp": <epoch> startedAt: <epoch>'
+    )
+    # Same-sized numbers that aren't times must still tell prompts apart
+    assert normalize_prompt("bytes=1073741824 order 1234567890123") == "bytes=1073741824 order 1234567890123"
+
+
+def test_near_identical_prompts_hit_through_chat_model():
+    cache = LLMResponseCache()
+    llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+    r1 = llm.invoke([HumanMessage(content="timeout at 2024-05-01T10:00:00 'trace_id': 'abc123'")])
+    r2 = llm.invoke([HumanMessage(content="timeout at 2024-05-01T10:07:00 'trace_id': 'def456'")])
+
+    assert r1.content == r2.content == "first"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_hits_are_not_timed_as_llm_calls():
+    from src.instrumentation import IncidentTimings, InstrumentationHandler
+
+    timings = IncidentTimings()
+    llm = FakeListChatModel(responses=["first"], cache=LLMResponseCache())
+    config = {"callbacks": [InstrumentationHandler(timings)]}
+
+    with timings.activate():
+        llm.invoke([HumanMessage(content="pool exhausted")], config=config)
+        llm.invoke([HumanMessage(content="pool exhausted")], config=config)
+
+    assert (timings.llm["calls"], timings.llm["cache_hits"]) == (1, 1)
+
+
+def test_ttl_expiry():
+    now = [0.0]
+    cache = LLMResponseCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.update("p", "llm", gen("x"))
+    assert cache.lookup("p", "llm")[0].message.content == "x"
+    now[0] = 11
+    assert cache.lookup("p", "llm") is None
+
+
+def test_lru_eviction_by_entries():
+    cache = LLMResponseCache(max_entries=2)
+    cache.update("a", "llm", gen("a"))
+    cache.update("b", "llm", gen("b"))
+    cache.lookup("a", "llm")
+    cache.update("c", "llm", gen("c"))
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_based_eviction():
+    cache = LLMResponseCache(max_bytes=300)
+    cache.update("a", "llm", gen("x" * 100))
+    cache.update("b", "llm", gen("y" * 100))
+    assert cache.stats()["bytes"] <= 300
+    assert cache.lookup("a", "llm") is None
+
+
+def test_sqlite_backend_survives_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    LLMResponseCache(sqlite_path=path).update("p", "llm", gen("persisted"))
+
+    fresh = LLMResponseCache(sqlite_path=path)
+    hit = fresh.lookup("p", "llm")
+    assert hit[0].message.content == "persisted"
+    assert fresh.stats()["entries"] == 1
+
+
+def test_shared_tier_is_trimmed_periodically(tmp_path):
+    now = [0.0]
+    cache = LLMResponseCache(
+        sqlite_path=str(tmp_path / "llm_cache.db"), clock=lambda: now[0], shared_max_entries=2, trim_interval=60
+    )
+    for i in range(4):
+        cache.update(f"p{i}", "llm", gen(f"r{i}"))
+    shared = cache._shared
+    assert len([k for k in ("p0", "p1", "p2", "p3") if shared.get(f"llm:{cache_key(k, 'llm')}")]) == 4
+
+    now[0] += 60
+    cache.update("p4", "llm", gen("r4"))
+    kept = [k for k in ("p0", "p1", "p2", "p3", "p4") if shared.get(f"llm:{cache_key(k, 'llm')}")]
+    assert kept == ["p3", "p4"]
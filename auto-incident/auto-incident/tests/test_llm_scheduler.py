@@ -0,0 +1,101 @@
+"""Tests for the LLM scheduler: limits, priority lanes and retries."""
+import asyncio
+import threading
+import time
+
+import httpx
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+from src.agents.llm_scheduler import LLMScheduler, ProviderLimiter, ScheduledChatModel, llm_priority
+from src.alert_layer import alert_priority, parse_alert
+from src.instrumentation.metrics import LLM_RETRIES
+
+
+def test_alert_priority_from_severity_and_environment():
+    def priority(**labels):
+        return alert_priority(parse_alert({"service": "api", "labels": labels}))
+
+    assert priority(severity="critical") == 0
+    assert priority(severity="warning") == 2
+    assert priority() == 2
+    assert priority(severity="info") == 3
+    assert priority(severity="critical", env="staging") == 1
+
+
+def test_waiters_are_granted_by_priority_lane():
+    limiter = ProviderLimiter("test", max_concurrency=1)
+    held = limiter.acquire()
+    order = []
+
+    def wait(name, priority):
+        limiter.acquire(priority).release()
+        order.append(name)
+
+    threads = [threading.Thread(target=wait, args=("low", 3)), threading.Thread(target=wait, args=("critical", 0))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)  # both queued behind the held slot, low first
+    assert limiter.stats()["queued"] == {"critical": 1, "high": 0, "normal": 0, "low": 1}
+
+    held.release()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == ["critical", "low"]
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_tokens_per_minute_budget_delays_requests():
+    limiter = ProviderLimiter("test", max_concurrency=4, tokens_per_minute=6000)  # 100 tokens/s
+    limiter.acquire(tokens=6000).release(used_tokens=6000)
+
+    lease = limiter.acquire(tokens=20)
+    assert lease.waited >= 0.15
+    lease.release()
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = ProviderLimiter("test", max_concurrency=1)
+        held = await limiter.aacquire()
+        waiter = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        held.release()
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0
+    assert sum(stats["queued"].values()) == 0
+
+
+class RateLimitError(Exception):
+    def __init__(self):
+        super().__init__("429 Too Many Requests")
+        self.response = httpx.Response(429, headers={"retry-after": "0.05"})
+        self.status_code = 429
+
+
+class FlakyChatModel(FakeListChatModel):
+    failures: int = 1
+
+    def _generate(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RateLimitError()
+        return super()._generate(*args, **kwargs)
+
+
+def test_rate_limited_call_is_retried_after_retry_after():
+    scheduler = LLMScheduler(max_concurrency={"flaky": 2})
+    llm = ScheduledChatModel(inner=FlakyChatModel(responses=["ok"]), provider="flaky", scheduler=scheduler)
+    before = LLM_RETRIES.value(provider="flaky", reason="rate_limited")
+
+    started = time.perf_counter()
+    with llm_priority(0):
+        assert llm.invoke([HumanMessage(content="hi")]).content == "ok"
+
+    assert time.perf_counter() - started >= 0.05
+    assert LLM_RETRIES.value(provider="flaky", reason="rate_limited") == before + 1
+    assert scheduler.stats()["flaky"]["in_flight"] == 0
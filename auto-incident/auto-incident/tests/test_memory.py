@@ -38,3 +38,86 @@ def test_get_context():
     assert "Stack trace found" in ctx
     assert "Hypotheses" in ctx
     assert "Config change" in ctx
+
+
+def test_render_logs_deduplicates_templates():
+    from src.memory.context import render_logs
+
+    logs = [
+        {"timestamp": f"t{i:02d}", "level": "ERROR", "message": f"Timeout after {i}ms", "stack_trace": "Exc: boom\n  at A.b"}
+        for i in range(50)
+    ]
+    rendered = render_logs(logs)
+    assert rendered.startswith("50x ERROR Timeout after <*> | Exc: boom [t00 .. t49]")
+    assert rendered.endswith("| at A.b")
+    assert len(rendered.splitlines()) == 1
+
+
+def test_get_context_respects_token_budget():
+    from src.memory.context import estimate_tokens
+
+    m = IncidentMemory()
+    m.add_finding("logs", "Pool exhausted", 0.9)
+    m.add_evidence("logs", {"logs": [{"level": "ERROR", "message": f"unique failure {'x' * i}"} for i in range(200)]})
+    ctx = m.get_context(max_tokens=100)
+    assert "Pool exhausted" in ctx
+    assert estimate_tokens(ctx) <= 110
+
+
+def test_get_context_ranks_evidence_by_alert():
+    from src.alert_layer import parse_alert
+
+    alert = parse_alert({"service": "api", "trigger_type": "latency_spike"})
+    m = IncidentMemory(alert=alert)
+    m.add_evidence("logs", {"logs": [{"level": "ERROR", "message": "boom"}]})
+    m.add_evidence("metrics", {"p99_latency_ms": 4200})
+    ctx = m.get_context()
+    assert ctx.index("metrics") < ctx.index("logs")
+
+
+def test_concurrent_writes_get_unique_ids_and_versioned_context():
+    import threading
+
+    m = IncidentMemory()
+
+    def write(n):
+        for i in range(500):
+            m.add_evidence("metrics", {"i": i, "writer": n})
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [e.id for e in m.evidence]
+    assert len(ids) == len(set(ids)) == 4000
+
+    version = m.version
+    ctx = m.get_context(max_tokens=50)
+    assert m.get_context(max_tokens=50) is ctx
+    assert m.snapshot().version == version
+    m.add_finding("logs", "Pool exhausted", 0.9)
+    assert m.version == version + 1
+    assert "Pool exhausted" in m.get_context(max_tokens=50)
+    assert [f.to_model() for f in m.findings] == [Finding(agent="logs", content="Pool exhausted", confidence=0.9)]
+
+
+def test_get_context_budget_follows_callers_model(monkeypatch):
+    from src.agents.llm import get_model_name
+    from src.config import Settings
+    from src.memory import context
+
+    settings = Settings(
+        llm_role_models={"decision": "anthropic:claude-small"}, context_token_budgets={"claude-small": 40}
+    )
+    monkeypatch.setattr(context, "get_settings", lambda: settings)
+    monkeypatch.setattr("src.agents.llm.get_settings", lambda: settings)
+    m = IncidentMemory()
+    for i in range(50):
+        m.add_evidence("logs", {"error": f"timeout talking to db-{i}"})
+
+    model = get_model_name("decision")
+    assert model == "claude-small"
+    small, default = m.get_context(model=model), m.get_context()
+    assert context.estimate_tokens(small) <= 40 < context.estimate_tokens(default)
+    assert m.get_context(model=model) is small
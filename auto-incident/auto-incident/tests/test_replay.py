@@ -0,0 +1,40 @@
+"""Tests for incident record/replay."""
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.agents import llm
+from src.alert_layer import parse_alert
+from src.config import Settings
+from src.replay import Cassette, CassetteChatModel, list_cassettes, replay_dir
+from src.replay import cassette as cassette_module
+from tests.conftest import RCA_JSON
+
+
+def test_recorded_incident_replays_without_backends_or_llm(tmp_path, monkeypatch):
+    from src.agents import CommanderAgent
+    from src.integrations import deploy_client, logs_client, metrics_client
+
+    recorder = CassetteChatModel(inner=FakeListChatModel(responses=[RCA_JSON]))
+    monkeypatch.setattr(llm, "_build_llm", lambda *args: recorder)
+    monkeypatch.setattr(cassette_module, "get_settings", lambda: Settings(cassette_dir=str(tmp_path)))
+    alert = parse_alert({"trigger_type": "error_rate", "service": "api-gateway", "threshold": 0.05})
+    recorded = CommanderAgent().run(alert, incident_id="inc-rec")
+
+    [path] = list_cassettes(str(tmp_path))
+    cassette = Cassette.load(str(path))
+    assert cassette.incident_id == "inc-rec"
+    assert {"log_stream:api-gateway", "metrics:api-gateway", "deploys:api-gateway"} <= set(cassette.fetches)
+    assert "decision_engine" in {call["node"] for call in cassette.llm_calls}
+    assert cassette.result["rca"] == recorded["rca"]
+
+    def offline(*args, **kwargs):
+        raise AssertionError("replay reached a backend")
+
+    for module in (logs_client, metrics_client, deploy_client):
+        monkeypatch.setattr(module, "get_settings", offline)
+    monkeypatch.setattr(logs_client, "_mock_logs", offline)
+
+    report = replay_dir(str(tmp_path), workers=1)
+    assert (report["errors"], report["rca_changed"], report["llm_prompts_changed"]) == (0, 0, 0), report
+    assert "decision_engine" in report["nodes"]
+    [incident] = report["incidents"]
+    assert incident["matches"]["llm_exact"] == len(cassette.llm_calls)
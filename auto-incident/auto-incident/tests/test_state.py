@@ -0,0 +1,131 @@
+"""Tests for the shared state backends and the components that use them across processes."""
+import asyncio
+
+import pytest
+
+from src.alert_layer import AlertDeduplicator, parse_alert
+from src.jobs import InvestigationQueue
+from src.state import InMemoryStateBackend, SQLiteStateBackend
+
+
+def make_alert(service="api-gateway"):
+    return parse_alert({"trigger_type": "latency_spike", "service": service, "threshold": 1000})
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    now = [1000.0]
+    backends = []
+
+    def factory():
+        if request.param == "memory":
+            backend = InMemoryStateBackend(clock=lambda: now[0])
+        else:
+            backend = SQLiteStateBackend(str(tmp_path / "state.db"), clock=lambda: now[0])
+        backends.append(backend)
+        return backend
+
+    factory.now = now
+    yield factory
+    for backend in backends:
+        backend.close()
+
+
+def test_backend_operations(make_backend):
+    backend = make_backend()
+    backend.set("a", "1", ttl=10)
+    assert backend.get("a") == "1"
+    assert backend.add("a", "2") is False
+    assert backend.incr("n") == 1 and backend.incr("n") == 2
+
+    backend.push("q", "x")
+    backend.push("q", "y")
+    assert backend.length("q") == 2
+    assert [backend.pop("q"), backend.pop("q"), backend.pop("q")] == ["x", "y", None]
+
+    assert [backend.append("log", e, max_len=2) for e in "abc"] == [1, 2, 3]
+    assert backend.read("log") == [(2, "b"), (3, "c")]
+    assert backend.read("log", after=2) == [(3, "c")]
+
+    make_backend.now[0] += 11
+    assert backend.get("a") is None
+    assert backend.add("a", "3") is True
+    backend.delete_prefix("")
+    assert backend.get("a") is None and backend.get("n") is None
+
+    async def async_ops():
+        await backend.aset("b", "1")
+        return await backend.aget("b"), await backend.aincr("m")
+
+    assert asyncio.run(async_ops()) == ("1", 1)
+
+
+def test_trim_prefix_purges_expired_then_oldest(make_backend):
+    backend = make_backend()
+    backend.set("other", "x" * 100)
+    backend.set("llm:old", "x" * 10, ttl=5)
+    for i in range(4):
+        backend.set(f"llm:{i}", "x" * 10, ttl=100 + i)
+    backend.set("llm:forever", "x" * 10)
+
+    make_backend.now[0] += 6
+    assert backend.trim_prefix("llm:") == 1
+    assert backend.get("llm:0") == "x" * 10
+
+    # Kept: no expiry first, then the latest-expiring, within both limits
+    assert backend.trim_prefix("llm:", max_keys=3) == 2
+    assert [backend.get(f"llm:{i}") is not None for i in range(4)] == [False, False, True, True]
+    assert asyncio.run(backend.atrim_prefix("llm:", max_bytes=25)) == 1
+    assert backend.get("llm:forever") and backend.get("llm:3") and backend.get("other")
+
+
+def test_worker_process_runs_job_submitted_by_another(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def scenario():
+        async def runner(alert, incident_id, emit):
+            for token in ("pool", "_", "size"):
+                emit({"type": "rca_token", "text": token})
+            return {"incident_id": incident_id}
+
+        # Two "processes": one only accepts alerts, the other only runs investigations
+        front = InvestigationQueue(runner, concurrency=0, backend=SQLiteStateBackend(path), poll_interval=0.01)
+        worker = InvestigationQueue(runner, concurrency=1, backend=SQLiteStateBackend(path), poll_interval=0.01)
+        await worker.start()
+        job = await front.submit(make_alert())
+        stream = await front.events(job.incident_id)
+        events = [e async for e in stream.subscribe()]
+        await worker.stop()
+        result = await front.get(job.incident_id)
+        front.backend.close()
+        worker.backend.close()
+        return events, result
+
+    events, job = asyncio.run(scenario())
+    assert job.status == "completed"
+    assert events[-1]["type"] == "completed"
+    assert "".join(e["text"] for e in events if e["type"] == "rca_token") == "pool_size"
+
+
+def test_dedup_and_duplicate_counts_are_shared(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def scenario():
+        backends = [SQLiteStateBackend(path), SQLiteStateBackend(path)]
+        queues = [InvestigationQueue(lambda a, i, e: None, backend=b) for b in backends]
+        dedups = [AlertDeduplicator(is_active=q.is_active, backend=b) for q, b in zip(queues, backends)]
+
+        job = await queues[0].submit(make_alert())
+        await dedups[0].arecord(make_alert(), job.incident_id)
+        existing = await dedups[1].acheck(make_alert())
+        await queues[1].attach_duplicate(existing)
+        seen = await queues[0].get(job.incident_id)
+        fresh = await dedups[1].acheck(make_alert("billing"))
+        for backend in backends:
+            backend.close()
+        return job.incident_id, existing, seen, fresh
+
+    incident_id, existing, seen, fresh = asyncio.run(scenario())
+    assert existing == incident_id
+    assert seen.duplicate_count == 1
+    assert fresh is None
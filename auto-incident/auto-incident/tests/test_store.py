@@ -0,0 +1,109 @@
+"""Tests for the persistent incident store."""
+from datetime import datetime, timedelta
+
+from src.alert_layer import parse_alert
+from src.memory import IncidentMemory, SQLiteIncidentStore, WriteBehindStore
+
+
+def make_record(service="api-gateway", trigger_type="latency_spike", created_at=None):
+    alert = parse_alert({"trigger_type": trigger_type, "service": service, "threshold": 1000})
+    memory = IncidentMemory(alert=alert)
+    ev_id = memory.add_evidence("logs", {"templates": [], "total_lines": 0})
+    memory.add_finding("logs_agent", "Connection pool exhausted", 0.9)
+    memory.add_hypothesis("DB saturation", [ev_id])
+    record = memory.to_record({"summary": f"{service} degraded", "root_cause": "pool exhausted"})
+    if created_at is not None:
+        record.created_at = created_at
+    return record
+
+
+def test_save_and_get_round_trip(tmp_path):
+    store = SQLiteIncidentStore(str(tmp_path / "incidents.db"))
+    record = make_record()
+    store.save(record)
+
+    loaded = store.get(record.incident_id)
+    assert loaded.service == "api-gateway"
+    assert loaded.rca["root_cause"] == "pool exhausted"
+    assert loaded.findings[0].content == "Connection pool exhausted"
+    assert loaded.hypotheses[0].supporting_evidence_ids == [loaded.evidence[0].id]
+    assert store.get("missing") is None
+    assert store.existing([record.incident_id, "missing"]) == {record.incident_id}
+
+
+def test_list_filters_and_paginates(tmp_path):
+    store = SQLiteIncidentStore(str(tmp_path / "incidents.db"))
+    now = datetime(2026, 1, 1)
+    store.save_many(
+        make_record(service="checkout" if i % 2 else "api-gateway", created_at=now + timedelta(minutes=i))
+        for i in range(10)
+    )
+
+    items, total = store.list(service="checkout", limit=2)
+    assert total == 5
+    assert [i["service"] for i in items] == ["checkout", "checkout"]
+    assert items[0]["created_at"] > items[1]["created_at"]
+
+    page, _ = store.list(limit=3, offset=3)
+    assert len(page) == 3
+    _, recent = store.list(since=now + timedelta(minutes=8))
+    assert recent == 2
+    _, none = store.list(trigger_type="error_rate")
+    assert none == 0
+
+
+def test_write_behind_serves_pending_and_flushes(tmp_path):
+    inner = SQLiteIncidentStore(str(tmp_path / "incidents.db"))
+    store = WriteBehindStore(inner, batch_size=10, flush_interval=0.05)
+    records = [make_record() for _ in range(25)]
+    for record in records:
+        store.save(record)
+    assert store.get(records[-1].incident_id) is not None
+
+    store.flush()
+    assert inner.list()[1] == 25
+    store.close()
+
+
+def test_recent_outcomes_reads_alert_rca_and_findings_only(tmp_path):
+    store = SQLiteIncidentStore(str(tmp_path / "incidents.db"))
+    old = make_record(created_at=datetime(2026, 1, 1))
+    new = make_record(service="billing", created_at=datetime(2026, 1, 2))
+    unresolved = make_record(created_at=datetime(2026, 1, 3))
+    unresolved.rca = None
+    store.save_many([old, new, unresolved])
+
+    outcomes = store.recent_outcomes(limit=10)
+    assert [r.incident_id for r in outcomes] == [new.incident_id, old.incident_id]
+    assert outcomes[0].alert == new.alert and outcomes[0].rca == new.rca
+    assert outcomes[0].findings == new.findings
+    assert outcomes[0].evidence == [] and outcomes[0].hypotheses == []
+    assert [r.incident_id for r in store.recent_outcomes(limit=1)] == [new.incident_id]
+
+
+class FlakyBatchStore(SQLiteIncidentStore):
+    """Fails every multi-record batch, as a write conflict on one record would."""
+
+    def save_many(self, records):
+        if len(records) > 1:
+            raise RuntimeError("batch rejected")
+        super().save_many(records)
+
+
+def test_write_behind_lists_pending_and_retries_failed_batches(tmp_path):
+    inner = FlakyBatchStore(str(tmp_path / "incidents.db"))
+    store = WriteBehindStore(inner, batch_size=10, flush_interval=1.0)
+    older = make_record(created_at=datetime(2026, 1, 1))
+    inner.save(older)
+    newer = [make_record(created_at=datetime(2026, 1, 2, hour=h)) for h in range(3)]
+    store.save_many(newer)
+
+    items, total = store.list(limit=2)
+    assert total == 4
+    assert [i["incident_id"] for i in items] == [newer[2].incident_id, newer[1].incident_id]
+    assert items[0]["root_cause"] == "pool exhausted"
+    assert store.list(service="other")[1] == 0
+
+    store.flush()
+    assert inner.list()[1] == 4
+    store.close()